@@ -85,6 +85,17 @@ DATABASES = {
     }
 }
 
+# Cache
+# Defaults to a per-process in-memory cache. Point DJANGO_CACHE_BACKEND/DJANGO_CACHE_LOCATION
+# at a shared backend (e.g. django.core.cache.backends.redis.RedisCache, redis://127.0.0.1:6379/1)
+# when running several workers.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', ''),
+    }
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -129,7 +140,8 @@ REST_FRAMEWORK = {
         # OR
         # 'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
+    # Limit/offset with opt-in cursor pagination and count control (see core/pagination.py)
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.FlexiblePagination',
     'PAGE_SIZE': 10
 }
 
@@ -193,5 +205,86 @@ CORS_ALLOWED_ORIGINS = [
     "https://yourfrontend.com",
 ]
 
+# Cached public salon site payloads (salons.views.SalonViewSet.sample_lookup, see salons/site_cache.py)
+SALON_SITE_CACHE_ALIAS = 'default' # Which CACHES entry to use
+SALON_SITE_CACHE_TTL = 60 * 60 # Seconds; saves invalidate earlier, this bounds anything signals miss
+
+# Site statistics (core.models.Stats.load, kept up to date by core/stats.py)
+STATS_CACHE_ALIAS = 'default' # Which CACHES entry to use
+STATS_CACHE_TTL = 60 * 5 # Seconds in the shared cache; changes clear it earlier
+STATS_LOCAL_CACHE_TTL = 5 # Seconds a process reuses its own copy (other processes can't clear it)
+STATS_SHARDS = 8 # Rows counter changes are spread over (core.StatsShard); 1 puts every writer on the same row
+
+# Visit tracking (tracking.middleware.VisitorTrackingMiddleware)
+# Visits are queued in memory and written in batches by a background thread.
+# Set TRACKING_BUFFER_ENABLED to False to write each visit synchronously instead.
+# The test runner (TEST_RUNNER below) always writes synchronously, so the background writer
+# never outlives (or writes outside of) the test database.
+TRACKING_BUFFER_ENABLED = os.environ.get('TRACKING_BUFFER_ENABLED', 'True') == 'True'
+TRACKING_BATCH_SIZE = 100 # Flush as soon as this many visits are waiting
+TRACKING_FLUSH_INTERVAL = 2.0 # Seconds between flushes when traffic is low
+TRACKING_MAX_QUEUE_SIZE = 10000 # Visits beyond this are dropped (and counted) instead of blocking requests
+# Seconds after TRACKING_FLUSH_INTERVAL past UTC midnight before the previous day is rolled up,
+# so the visits still buffered by any worker are in its rollup (tracking/rollups.py)
+TRACKING_ROLLUP_GRACE_MARGIN = 60
+
+# Requests the tracking middleware doesn't record (compiled once in tracking/exclusions.py).
+# Path prefixes are plain strings, user agents are case-insensitive regex fragments.
+TRACKING_EXCLUDED_PATH_PREFIXES = [
+    STATIC_URL,
+    MEDIA_URL,
+    '/admin/',
+    '/api/schema/', # Schema endpoints
+    '/stripe/webhook/', # Webhook endpoint
+    '/favicon.ico',
+    '/robots.txt',
+    '/__debug__/', # Django debug toolbar if used
+]
+TRACKING_EXCLUDED_METHODS = ['HEAD', 'OPTIONS'] # CORS preflights and uptime pings
+TRACKING_EXCLUDED_USER_AGENTS = [
+    r'bot\b', 'crawler', 'spider', 'slurp', 'facebookexternalhit', # Search engines and link previews
+    'ELB-HealthChecker', 'kube-probe', 'GoogleHC', 'UptimeRobot', 'Pingdom', # Health checkers
+]
+# Still recorded, but left out of the popular pages report
+TRACKING_REPORT_EXCLUDED_PATH_PREFIXES = ['/api/']
+
+# Visit sampling (tracking/sampling.py). A rate of 0.1 records about one request in ten,
+# each with a sample weight of 10 so the reported visit counts stay unbiased.
+TRACKING_SAMPLE_RATE = float(os.environ.get('TRACKING_SAMPLE_RATE', 1.0)) # Default for every path
+TRACKING_SAMPLE_RATES = {} # Per path prefix, e.g. {'/api/salons/': 0.1}; the longest match wins
+TRACKING_SAMPLE_ALWAYS_AUTHENTICATED = True # Logged-in users are always recorded
+
+# Cached overview reports (tracking.views_api.ReportOverviewAPIView)
+TRACKING_REPORT_CACHE_ALIAS = 'default' # Which CACHES entry to use
+TRACKING_REPORT_CACHE_TTL = 60 * 60 * 24 # Seconds, for ranges that ended before today
+TRACKING_REPORT_CACHE_TTL_TODAY = 60 # Seconds, for ranges that include today and are still changing
+TRACKING_REPORT_MAX_DAYS = 366 # Longest range (in days) the overview endpoint accepts
+
+# Visit retention (tracking archive_visits command)
+# Raw visits older than this are written to monthly gzip'd JSONL files and deleted;
+# reports keep reading the daily rollups for the archived period.
+TRACKING_RETENTION_DAYS = int(os.environ.get('TRACKING_RETENTION_DAYS', 180))
+TRACKING_ARCHIVE_DIR = os.environ.get('TRACKING_ARCHIVE_DIR', os.path.join(BASE_DIR, 'archive', 'visits'))
+
+# Blog post view counts (blog/view_counter.py)
+# Views are tallied in memory and added to BlogPost.view_count by a background thread.
+# Like the visit buffer, the test runner writes each view synchronously.
+BLOG_VIEW_BUFFER_ENABLED = os.environ.get('BLOG_VIEW_BUFFER_ENABLED', 'True') == 'True'
+BLOG_VIEW_FLUSH_INTERVAL = 10.0 # Seconds between writes of the tally
+BLOG_VIEW_DEDUPE_WINDOW = 60 * 30 # Seconds a visitor's repeat views of a post are not counted; 0 counts every view
+BLOG_VIEW_CACHE_ALIAS = 'default' # Which CACHES entry keeps the "already viewed" markers
+
+# Chatbot conversation memory (chatbot/memory.py)
+# Clients send only their newest message; the context is rebuilt from the stored conversation.
+CHATBOT_HISTORY_WINDOW = 10 # Latest messages always sent verbatim
+CHATBOT_SUMMARY_BATCH = 10 # Older messages are folded into the rolling summary this many at a time
+CHATBOT_SUMMARY_MAX_CHARS = 2000 # Bound on the rolling summary
+# Summaries are made by a background thread once the reply is sent; the test runner summarizes inline
+CHATBOT_SUMMARY_IN_BACKGROUND = os.environ.get('CHATBOT_SUMMARY_IN_BACKGROUND', 'True') == 'True'
+CHATBOT_MAX_MESSAGE_CHARS = 4000 # Longer user messages are rejected
+
+# Turns the background writers above off for the test run (see backend/test_runner.py)
+TEST_RUNNER = 'backend.test_runner.TestRunner'
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
@@ -0,0 +1,25 @@
+# backend/test_runner.py
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+# Background writers are off under test: each visit, view and summary is written inline, so no
+# thread writes outside a test's transaction or after the test database is gone.
+# Tests of the background paths turn them back on with override_settings.
+TEST_SETTINGS = {
+    'TRACKING_BUFFER_ENABLED': False,
+    'BLOG_VIEW_BUFFER_ENABLED': False,
+    'CHATBOT_SUMMARY_IN_BACKGROUND': False,
+}
+
+
+class TestRunner(DiscoverRunner):
+    """DiscoverRunner applying TEST_SETTINGS for the whole run."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._test_settings = override_settings(**TEST_SETTINGS)
+        self._test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._test_settings.disable()
+        super().teardown_test_environment(**kwargs)
@@ -1,6 +1,6 @@
 # blog/admin.py
 from django.contrib import admin
-from .models import BlogPost, BlogComment
+from .models import BlogPost, BlogComment, BlogTag
 
 @admin.register(BlogPost)
 class BlogPostAdmin(admin.ModelAdmin):
@@ -23,6 +23,17 @@ class BlogPostAdmin(admin.ModelAdmin):
         }),
     )
 
+@admin.register(BlogTag)
+class BlogTagAdmin(admin.ModelAdmin):
+    list_display = ('name', 'post_count')
+    search_fields = ('name',)
+    ordering = ('-post_count', 'name')
+    # Maintained from BlogPost.tags (blog/tags.py), edit the posts instead
+    readonly_fields = ('name', 'post_count')
+
+    def has_add_permission(self, request):
+        return False
+
 @admin.register(BlogComment)
 class BlogCommentAdmin(admin.ModelAdmin):
     list_display = ('post', 'user', 'name', 'email', 'approved', 'created_at')
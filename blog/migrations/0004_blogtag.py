@@ -0,0 +1,65 @@
+# Generated by Django 5.2 on 2026-10-17 05:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models.functions import Now
+
+
+def index_existing_tags(apps, schema_editor):
+    # Same normalization as blog.tags.normalize_tags, on the historical models
+    BlogPost = apps.get_model('blog', 'BlogPost')
+    BlogTag = apps.get_model('blog', 'BlogTag')
+    BlogPostTag = apps.get_model('blog', 'BlogPostTag')
+    links = set()
+    for post_id, tags in BlogPost.objects.values_list('pk', 'tags').iterator():
+        if isinstance(tags, list):
+            for tag in tags:
+                if isinstance(tag, dict):
+                    tag = tag.get('tag')
+                if not isinstance(tag, str):
+                    continue
+                name = ' '.join(tag.split()).lower()[:100]
+                if name:
+                    links.add((post_id, name))
+    BlogTag.objects.bulk_create([BlogTag(name=name) for name in {name for _, name in links}], batch_size=1000)
+    tag_ids = dict(BlogTag.objects.values_list('name', 'pk'))
+    BlogPostTag.objects.bulk_create([BlogPostTag(post_id=post_id, tag_id=tag_ids[name]) for post_id, name in links], batch_size=1000)
+    counts = BlogPostTag.objects.filter(post__published=True, post__published_at__lte=Now()).values('tag').annotate(total=models.Count('pk'))
+    for row in counts:
+        BlogTag.objects.filter(pk=row['tag']).update(post_count=row['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_blogpost_cursor_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlogTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Name')),
+                ('post_count', models.PositiveIntegerField(default=0, editable=False, help_text='Number of published posts with this tag', verbose_name='Post Count')),
+            ],
+            options={
+                'verbose_name': 'Blog Tag',
+                'verbose_name_plural': 'Blog Tags',
+                'ordering': ['name'],
+                'indexes': [models.Index(fields=['-post_count', 'name'], name='blogtag_count_name_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BlogPostTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_links', to='blog.blogpost', verbose_name='Post')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_links', to='blog.blogtag', verbose_name='Tag')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('tag', 'post'), name='blogposttag_tag_post_uniq')],
+            },
+        ),
+        migrations.RunPython(index_existing_tags, migrations.RunPython.noop),
+    ]
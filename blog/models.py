@@ -4,6 +4,8 @@ from django.utils.text import slugify
 # from django.urls import reverse # Useful for getting canonical URLs
 from django.utils.translation import gettext_lazy as _ # <<< Import this
 
+from core.slugs import allocate_unique_slug, save_with_unique_slug
+
 # Using settings.AUTH_USER_MODEL is the standard way to refer to your user model
 User = settings.AUTH_USER_MODEL
 
@@ -107,18 +109,19 @@ class BlogPost(models.Model):
         ordering = ['-created_at']
         verbose_name = _("Blog Post") # <<< Marked verbose_name
         verbose_name_plural = _("Blog Posts") # <<< Marked verbose_name_plural
+        indexes = [
+            # Cursor pagination order of the post list
+            models.Index(fields=['created_at', 'id'], name='blogpost_created_id_idx'),
+        ]
 
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            base_slug = slugify(self.title)
-            unique_slug = base_slug
-            counter = 1
-            while BlogPost.objects.filter(slug=unique_slug).exists():
-                unique_slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = unique_slug
-        super().save(*args, **kwargs)
+        if self.slug:
+            return super().save(*args, **kwargs)
+        # One prefix query finds the next free suffix (see core/slugs.py), retried on a race
+        base_slug = slugify(self.title) or 'post'
+        self.slug = allocate_unique_slug(BlogPost, 'slug', base_slug, exclude_pk=self.pk)
+        save_with_unique_slug(self, 'slug', base_slug, super().save, *args, **kwargs)
 
     def __str__(self):
         return self.title
@@ -126,6 +129,56 @@ class BlogPost(models.Model):
     def get_absolute_url(self):
         return f"/api/blog/posts/{self.slug}/" # API URL
 
+class BlogTag(models.Model):
+    """A tag used by blog posts, normalized from BlogPost.tags (kept in sync by blog/tags.py)."""
+    name = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name=_('Name') # <<< Marked verbose_name
+    )
+    post_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text=_('Number of published posts with this tag'), # <<< Marked help_text
+        verbose_name=_('Post Count') # <<< Marked verbose_name
+    )
+
+    class Meta:
+        ordering = ['name']
+        verbose_name = _("Blog Tag") # <<< Marked verbose_name
+        verbose_name_plural = _("Blog Tags") # <<< Marked verbose_name_plural
+        indexes = [
+            # Tag cloud order
+            models.Index(fields=['-post_count', 'name'], name='blogtag_count_name_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+class BlogPostTag(models.Model):
+    """Links a post to one of its tags."""
+    post = models.ForeignKey(
+        BlogPost,
+        on_delete=models.CASCADE,
+        related_name='tag_links',
+        verbose_name=_('Post') # <<< Marked verbose_name
+    )
+    tag = models.ForeignKey(
+        BlogTag,
+        on_delete=models.CASCADE,
+        related_name='post_links',
+        verbose_name=_('Tag') # <<< Marked verbose_name
+    )
+
+    class Meta:
+        constraints = [
+            # Also the index of the tag filters: tag -> posts
+            models.UniqueConstraint(fields=['tag', 'post'], name='blogposttag_tag_post_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id}: {self.tag_id}"
+
 class BlogComment(models.Model):
     """Represents a comment on a blog post."""
     post = models.ForeignKey(
@@ -1,8 +1,13 @@
 # blog/serializers.py
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
-from .models import BlogPost, BlogComment
+from .models import BlogPost, BlogComment, BlogTag
 from users.serializers import UserSerializer # To show author/commenter details
 
+# Comments embedded in a post's detail; the rest are paginated at /posts/{slug}/comments/
+DETAIL_COMMENTS_LIMIT = 10
+
 class BlogCommentSerializer(serializers.ModelSerializer):
     # Display user details if comment is by a registered user
     user = UserSerializer(read_only=True)
@@ -35,11 +40,9 @@ class BlogCommentSerializer(serializers.ModelSerializer):
 class BlogPostSerializer(serializers.ModelSerializer):
     # Display author details instead of just ID
     author = UserSerializer(read_only=True)
-    # Include related comments (read-only in this context)
-    # Can be computationally expensive if there are many comments, consider pagination or separate endpoint
-    comments = BlogCommentSerializer(many=True, read_only=True)
-    # You might want a simpler serializer for list views without comments:
-    # comments_count = serializers.IntegerField(source='comments.count', read_only=True)
+    # First page of the comments (read-only in this context), see BlogPostViewSet.get_queryset
+    comments = serializers.SerializerMethodField()
+    comments_count = serializers.SerializerMethodField()
 
     class Meta:
         model = BlogPost
@@ -47,18 +50,31 @@ class BlogPostSerializer(serializers.ModelSerializer):
             'id', 'title', 'slug', 'content', 'excerpt', 'cover_image',
             'author', 'category', 'tags', 'published', 'featured',
             'published_at', 'view_count', 'created_at', 'updated_at',
-            'comments', # Include the nested comments
-            # 'comments_count', # Optional alternative
+            'comments', # Include the nested comments (first DETAIL_COMMENTS_LIMIT)
+            'comments_count', # Approved comments (all of them for admins)
         )
         # Slug is read-only as it's auto-generated
         # Author is set based on authenticated user during creation
         # Comments are read-only here; created via separate endpoint/action
-        read_only_fields = ('slug', 'author', 'view_count', 'created_at', 'updated_at', 'comments')
+        read_only_fields = ('slug', 'author', 'view_count', 'created_at', 'updated_at', 'comments', 'comments_count')
+
+    @extend_schema_field(BlogCommentSerializer(many=True))
+    def get_comments(self, post):
+        comments = getattr(post, 'comments_page', None)
+        if comments is None: # Not prefetched by the view (e.g. the response to a create/update)
+            comments = post.comments.filter(approved=True).select_related('user')[:DETAIL_COMMENTS_LIMIT]
+        return BlogCommentSerializer(comments, many=True, context=self.context).data
+
+    @extend_schema_field(OpenApiTypes.INT)
+    def get_comments_count(self, post):
+        count = getattr(post, 'comments_count', None)
+        return post.comments.filter(approved=True).count() if count is None else count
 
 # Optional: A simpler serializer for list views
 class BlogPostListSerializer(serializers.ModelSerializer):
      author = UserSerializer(read_only=True)
-     comments_count = serializers.IntegerField(source='comments.count', read_only=True)
+     # Annotated by BlogPostViewSet.get_queryset (approved comments, all of them for admins)
+     comments_count = serializers.IntegerField(read_only=True)
 
      class Meta:
          model = BlogPost
@@ -67,4 +83,10 @@ class BlogPostListSerializer(serializers.ModelSerializer):
              'category', 'tags', 'published', 'featured', 'published_at',
              'view_count', 'created_at', 'comments_count',
          )
-         read_only_fields = ('slug', 'author', 'view_count', 'created_at', 'comments_count')
\ No newline at end of file
+         read_only_fields = ('slug', 'author', 'view_count', 'created_at', 'comments_count')
+
+class BlogTagSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BlogTag
+        fields = ('name', 'post_count')
+        read_only_fields = fields
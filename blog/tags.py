@@ -0,0 +1,131 @@
+# blog/tags.py
+"""
+Normalized index of BlogPost.tags, so tag filters are indexed joins instead of substring
+matches over the serialized JSON.
+
+BlogPost.tags stays the source of truth (the API reads and writes it). Saving or deleting a
+post re-indexes it (receivers below, connected in BlogConfig.ready); bulk_create callers pass
+their posts to index_posts(). BlogTag.post_count counts the live posts with the tag (published,
+published_at reached, as in the public post list) and is recomputed for every tag a change
+touches. Scheduled posts go live without a save, so the tag cloud first calls
+refresh_scheduled_tag_counts() to count the posts whose published_at passed since its last call.
+"""
+from django.core.cache import cache
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import BlogPost, BlogPostTag, BlogTag
+
+TAG_MAX_LENGTH = BlogTag._meta.get_field('name').max_length
+
+# When refresh_scheduled_tag_counts() last ran
+COUNTS_REFRESHED_AT_KEY = 'blog:tag_counts_refreshed_at'
+
+
+def normalize_tag(tag):
+    """Case and whitespace insensitive form of a tag: ' Nail  Art' -> 'nail art'."""
+    return ' '.join(str(tag).split()).lower()[:TAG_MAX_LENGTH]
+
+
+def tag_name(tag):
+    """The name of a stored tag: a string, or {'tag': name} as some clients send them. None for anything else."""
+    if isinstance(tag, dict):
+        tag = tag.get('tag')
+    return tag if isinstance(tag, str) else None
+
+
+def normalize_tags(tags):
+    """Distinct non-empty normalized tags, in order. Anything but a list (malformed JSON) has none."""
+    if not isinstance(tags, (list, tuple)):
+        return []
+    names = (normalize_tag(name) for name in map(tag_name, tags) if name is not None)
+    return [tag for tag in dict.fromkeys(names) if tag]
+
+
+def refresh_tag_counts(tag_ids):
+    """Recomputes post_count of the given tags in one UPDATE statement."""
+    if not tag_ids:
+        return
+    counted = (
+        BlogPostTag.objects.filter(tag=OuterRef('pk'), post__published=True, post__published_at__lte=timezone.now())
+        .order_by().values('tag').annotate(total=Count('pk')).values('total')
+    )
+    BlogTag.objects.filter(pk__in=tag_ids).update(post_count=Coalesce(Subquery(counted), 0))
+
+
+def refresh_scheduled_tag_counts():
+    """
+    Counts the scheduled posts that went live since the last call: refreshes the tags of the posts
+    whose published_at passed in between (all tags when the last call isn't known).
+    """
+    now = timezone.now()
+    last_refreshed = cache.get(COUNTS_REFRESHED_AT_KEY)
+    if last_refreshed is None:
+        refresh_tag_counts(list(BlogTag.objects.values_list('pk', flat=True)))
+    else:
+        went_live = BlogPostTag.objects.filter(
+            post__published=True, post__published_at__gt=last_refreshed, post__published_at__lte=now,
+        )
+        refresh_tag_counts(set(went_live.values_list('tag_id', flat=True)))
+    cache.set(COUNTS_REFRESHED_AT_KEY, now, None)
+
+
+def index_posts(posts):
+    """Brings the index of the given (saved) posts in line with their tags field."""
+    wanted = {post.pk: normalize_tags(post.tags) for post in posts if post.pk is not None}
+    if not wanted:
+        return
+    names = {name for tags in wanted.values() for name in tags}
+    BlogTag.objects.bulk_create([BlogTag(name=name) for name in names], ignore_conflicts=True)
+    tag_ids = dict(BlogTag.objects.filter(name__in=names).values_list('name', 'pk'))
+
+    desired = {(post_id, tag_ids[name]) for post_id, tags in wanted.items() for name in tags}
+    existing = {
+        (post_id, tag_id): link_id
+        for link_id, post_id, tag_id in BlogPostTag.objects.filter(post_id__in=wanted).values_list('pk', 'post_id', 'tag_id')
+    }
+    stale = [link_id for pair, link_id in existing.items() if pair not in desired]
+    if stale:
+        BlogPostTag.objects.filter(pk__in=stale).delete()
+    BlogPostTag.objects.bulk_create(
+        [BlogPostTag(post_id=post_id, tag_id=tag_id) for post_id, tag_id in desired - existing.keys()],
+        ignore_conflicts=True,
+    )
+    # Also the kept tags: publishing, unpublishing or rescheduling a post changes their counts
+    refresh_tag_counts({tag_id for _, tag_id in desired | existing.keys()})
+
+
+def tagged_post_ids(tags, match_all=True):
+    """
+    Subquery of the ids of the posts having all (or, with match_all=False, any) of the tags,
+    e.g. BlogPost.objects.filter(pk__in=tagged_post_ids(['gel', 'trends'])).
+    """
+    tags = normalize_tags(tags)
+    links = BlogPostTag.objects.filter(tag__name__in=tags).order_by()
+    if match_all and len(tags) > 1:
+        # Grouped on the (tag, post) index: posts linked to every one of the tags
+        links = links.values('post_id').annotate(matched=Count('tag_id')).filter(matched=len(tags))
+    return links.values('post_id')
+
+
+@receiver(post_save, sender=BlogPost, dispatch_uid='blog_tags_post_saved')
+def post_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return # Fixture loading: index_posts() the loaded posts afterwards
+    if update_fields is not None and not {'tags', 'published', 'published_at'} & set(update_fields):
+        return
+    index_posts([instance])
+
+
+@receiver(pre_delete, sender=BlogPost, dispatch_uid='blog_tags_post_deleting')
+def post_deleting(sender, instance, **kwargs):
+    # The links are gone (cascade) by post_delete: remember which counts to refresh
+    instance._indexed_tag_ids = list(instance.tag_links.values_list('tag_id', flat=True))
+
+
+@receiver(post_delete, sender=BlogPost, dispatch_uid='blog_tags_post_deleted')
+def post_deleted(sender, instance, **kwargs):
+    refresh_tag_counts(getattr(instance, '_indexed_tag_ids', None))
@@ -1,3 +1,159 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from .models import BlogComment, BlogPost, BlogTag
+from .serializers import DETAIL_COMMENTS_LIMIT
+from .view_counter import get_view_counter
+from .views import BlogPostViewSet, BlogTagViewSet
+
+
+class BlogViewCountTests(TestCase):
+    def setUp(self):
+        cache.clear() # Drops the "already viewed" markers of other tests
+        self.post = BlogPost.objects.create(title='Fall Nail Trends', content='...', published=True, published_at=timezone.now())
+        self.factory = APIRequestFactory()
+        self.view = BlogPostViewSet.as_view({'get': 'retrieve'})
+
+    def retrieve(self, ip='10.0.0.1'):
+        response = self.view(self.factory.get(f'/api/blog/posts/{self.post.slug}/', REMOTE_ADDR=ip), slug=self.post.slug)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def view_count(self):
+        return BlogPost.objects.values_list('view_count', flat=True).get(pk=self.post.pk)
+
+    def test_repeat_views_are_counted_once(self):
+        self.retrieve()
+        self.retrieve()
+        self.retrieve(ip='10.0.0.2')
+        self.assertEqual(self.view_count(), 2)
+
+    @override_settings(BLOG_VIEW_BUFFER_ENABLED=True, BLOG_VIEW_FLUSH_INTERVAL=3600, BLOG_VIEW_DEDUPE_WINDOW=0)
+    def test_buffered_views_are_written_in_one_update(self):
+        other = BlogPost.objects.create(title='Gel Basics', content='...', published=True, published_at=timezone.now())
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(3):
+                self.retrieve()
+        self.assertTrue(all(query['sql'].startswith('SELECT') for query in queries)) # The retrieve is write-free
+        self.assertEqual(self.view_count(), 0)
+
+        counter = get_view_counter()
+        counter.add(other.pk)
+        with self.assertNumQueries(1):
+            counter.flush()
+        self.assertEqual(self.view_count(), 3)
+        self.assertEqual(BlogPost.objects.get(pk=other.pk).view_count, 1)
+
+
+class BlogPostCommentsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+
+    def create_post(self, title, comments=0, pending=0):
+        post = BlogPost.objects.create(title=title, content='...', published=True, published_at=timezone.now())
+        BlogComment.objects.bulk_create(
+            [BlogComment(post=post, name='Guest', email='guest@example.com', content=f'Comment {i}', approved=True) for i in range(comments)]
+            + [BlogComment(post=post, name='Guest', email='guest@example.com', content='Pending', approved=False) for _ in range(pending)]
+        )
+        return post
+
+    def list_posts(self):
+        response = BlogPostViewSet.as_view({'get': 'list'})(self.factory.get('/api/blog/posts/'))
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_list_counts_approved_comments_in_constant_queries(self):
+        self.create_post('Fall Nail Trends', comments=3, pending=2)
+        with self.assertNumQueries(2): # COUNT(*) and the annotated page
+            results = self.list_posts()
+        self.assertEqual(results[0]['comments_count'], 3)
+
+        for i in range(5):
+            self.create_post(f'Post {i}', comments=i)
+        with self.assertNumQueries(2):
+            results = self.list_posts()
+        self.assertEqual(sorted(post['comments_count'] for post in results), [0, 1, 2, 3, 3, 4])
+
+    def test_detail_embeds_the_first_page_of_approved_comments(self):
+        post = self.create_post('Fall Nail Trends', comments=DETAIL_COMMENTS_LIMIT + 5, pending=2)
+        with self.assertNumQueries(3): # The annotated post, its first comments and the (synchronous here) view count
+            response = BlogPostViewSet.as_view({'get': 'retrieve'})(self.factory.get(f'/api/blog/posts/{post.slug}/'), slug=post.slug)
+        self.assertEqual(response.data['comments_count'], DETAIL_COMMENTS_LIMIT + 5)
+        self.assertEqual([comment['content'] for comment in response.data['comments']], [f'Comment {i}' for i in range(DETAIL_COMMENTS_LIMIT)])
+
+    def test_admins_count_the_pending_comments_they_see(self):
+        post = self.create_post('Fall Nail Trends', comments=2, pending=1)
+        admin = get_user_model().objects.create_user(username='admin', email='admin@example.com', password='password', role='admin')
+        request = self.factory.get(f'/api/blog/posts/{post.slug}/')
+        force_authenticate(request, user=admin)
+        response = BlogPostViewSet.as_view({'get': 'retrieve'})(request, slug=post.slug)
+        self.assertEqual(response.data['comments_count'], 3)
+        self.assertEqual(len(response.data['comments']), 3)
+
+        request = self.factory.get('/api/blog/posts/')
+        force_authenticate(request, user=admin)
+        self.assertEqual(BlogPostViewSet.as_view({'get': 'list'})(request).data['results'][0]['comments_count'], 3)
+        self.assertEqual(self.list_posts()[0]['comments_count'], 2)
+
+
+class BlogTagIndexTests(TestCase):
+    def setUp(self):
+        cache.clear() # Forgets when the scheduled tag counts were last refreshed
+        self.factory = APIRequestFactory()
+        self.gel = self.create_post('Gel Basics', ['Gel', 'tutorial'])
+        self.trends = self.create_post('Fall Trends', ['gel ', 'Trends'])
+        self.create_post('Acrylic Care', ['acrylic', 'Tutorial'])
+        self.create_post('Draft', ['gel'], published=False)
+
+    def create_post(self, title, tags, published=True):
+        return BlogPost.objects.create(title=title, content='...', tags=tags, published=published, published_at=timezone.now())
+
+    def filter_posts(self, **params):
+        response = BlogPostViewSet.as_view({'get': 'list'})(self.factory.get('/api/blog/posts/', params))
+        return sorted(post['title'] for post in response.data['results'])
+
+    def tag_cloud(self):
+        response = BlogTagViewSet.as_view({'get': 'list'})(self.factory.get('/api/blog/tags/'))
+        return [(tag['name'], tag['post_count']) for tag in response.data['results']]
+
+    def test_tag_filters(self):
+        self.assertEqual(self.filter_posts(tag='GEL'), ['Fall Trends', 'Gel Basics'])
+        self.assertEqual(self.filter_posts(tag='gel,tutorial'), ['Gel Basics'])
+        self.assertEqual(self.filter_posts(tag=['gel', 'tutorial'], tag_match='any'), ['Acrylic Care', 'Fall Trends', 'Gel Basics'])
+        self.assertEqual(self.filter_posts(tag='tut'), []) # No substring matches
+        self.assertEqual(self.filter_posts(tag=''), ['Acrylic Care', 'Fall Trends', 'Gel Basics'])
+        self.assertEqual(self.filter_posts(tag='gel, ,'), ['Fall Trends', 'Gel Basics'])
+
+    def test_tag_objects_are_unwrapped_and_other_values_skipped(self):
+        self.create_post('Nail Art', [{'tag': 'Nail  Art'}, {'tag': 'gel'}, {'name': 'x'}, 42, None, ['gel'], 'Tutorial'])
+        self.assertEqual(self.filter_posts(tag='nail art'), ['Nail Art'])
+        self.assertEqual(self.filter_posts(tag='gel,tutorial'), ['Gel Basics', 'Nail Art'])
+        self.assertEqual(len(self.tag_cloud()), 5) # No tags made of str({'name': 'x'}), '42' or 'None'
+
+    def test_scheduled_posts_are_counted_once_live(self):
+        self.tag_cloud()
+        publish_at = timezone.now() + timedelta(hours=1)
+        BlogPost.objects.create(title='Winter Trends', content='...', tags=['winter', 'gel'], published=True, published_at=publish_at)
+        self.assertEqual(self.filter_posts(tag='winter'), [])
+        self.assertEqual(self.tag_cloud(), [('gel', 2), ('tutorial', 2), ('acrylic', 1), ('trends', 1)])
+
+        with mock.patch('blog.tags.timezone.now', return_value=publish_at + timedelta(minutes=1)):
+            self.assertEqual(self.tag_cloud(), [('gel', 3), ('tutorial', 2), ('acrylic', 1), ('trends', 1), ('winter', 1)])
+
+    def test_tag_cloud_follows_post_changes(self):
+        self.assertEqual(self.tag_cloud(), [('gel', 2), ('tutorial', 2), ('acrylic', 1), ('trends', 1)])
+
+        self.gel.tags = ['trends']
+        self.gel.save()
+        self.trends.delete()
+        self.assertEqual(self.tag_cloud(), [('acrylic', 1), ('trends', 1), ('tutorial', 1)])
+        self.assertTrue(BlogTag.objects.filter(name='gel', post_count=0).exists())
@@ -9,6 +9,7 @@ app_name = 'blog'
 router = DefaultRouter()
 router.register(r'posts', views.BlogPostViewSet, basename='post')
 router.register(r'comments', views.BlogCommentViewSet, basename='comment') # For moderation actions
+router.register(r'tags', views.BlogTagViewSet, basename='tag') # Tag cloud
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -19,4 +20,5 @@ urlpatterns = [
 # /posts/{slug}/comments/ (list_comments, create_comment actions)
 # /comments/ (base for comment moderation router)
 # /comments/{pk}/
-# /comments/{pk}/approve/ (approve action)
\ No newline at end of file
+# /comments/{pk}/approve/ (approve action)
+# /tags/ (tag cloud)
\ No newline at end of file
@@ -0,0 +1,138 @@
+# blog/view_counter.py
+"""
+View counting for BlogPost.view_count without a write per read.
+
+record_view() drops repeat views of a post by the same visitor within BLOG_VIEW_DEDUPE_WINDOW
+(a marker in the shared cache), then hands the view to the process-wide counter. The buffered
+counter only adds to an in-memory {post id: views} tally; a background thread writes the tally
+every BLOG_VIEW_FLUSH_INTERVAL seconds with a single UPDATE, so BlogPostViewSet.retrieve stays
+read-only and popular posts no longer queue on their row lock.
+"""
+import hashlib
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+
+from core.background import PeriodicWriter, ProcessWriter
+from core.http import get_client_ip
+
+from .models import BlogPost
+
+logger = logging.getLogger(__name__)
+
+# Posts per UPDATE statement (keeps the CASE expression reasonable)
+UPDATE_CHUNK_SIZE = 500
+
+
+def apply_view_counts(counts):
+    """Adds {post id: views} to BlogPost.view_count, one UPDATE per UPDATE_CHUNK_SIZE posts."""
+    post_ids = [post_id for post_id, views in counts.items() if views]
+    for start in range(0, len(post_ids), UPDATE_CHUNK_SIZE):
+        chunk = post_ids[start:start + UPDATE_CHUNK_SIZE]
+        views = Case(
+            *[When(pk=post_id, then=Value(counts[post_id])) for post_id in chunk],
+            default=Value(0),
+            output_field=PositiveIntegerField(),
+        )
+        BlogPost.objects.filter(pk__in=chunk).update(view_count=F('view_count') + views)
+
+
+class ViewCounter(PeriodicWriter):
+    """
+    In-process tally of post views, written by a background thread (see core/background.py)
+    every `flush_interval` seconds.
+    Views still in memory when a process is killed are lost: acceptable for a popularity counter.
+    """
+    thread_name = 'blog-view-counter'
+
+    def __init__(self, flush_interval=10.0):
+        super().__init__(flush_interval)
+        self._counts = Counter()
+        self._lock = threading.Lock() # Guards _counts
+        self.written = 0 # Views successfully saved
+
+    def add(self, post_id):
+        self.ensure_writer()
+        with self._lock:
+            self._counts[post_id] += 1
+
+    def pending(self):
+        """Number of views waiting to be written."""
+        with self._lock:
+            return sum(self._counts.values())
+
+    def write_pending(self):
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        if not counts:
+            return
+        try:
+            apply_view_counts(counts)
+            self.written += sum(counts.values())
+        except Exception as e:
+            # Keep the views for the next flush rather than losing them
+            logger.error(f"Error writing views of {len(counts)} posts: {e}", exc_info=True)
+            with self._lock:
+                self._counts.update(counts)
+
+    def forked(self):
+        self._counts = Counter() # The parent's views are the parent's to write
+
+
+class SynchronousViewCounter:
+    """Fallback used when buffering is disabled: writes each view immediately."""
+
+    def __init__(self):
+        self.written = 0
+
+    def add(self, post_id):
+        apply_view_counts({post_id: 1})
+        self.written += 1
+
+    def pending(self):
+        return 0
+
+    def flush(self):
+        pass
+
+
+def build_view_counter():
+    if getattr(settings, 'BLOG_VIEW_BUFFER_ENABLED', True):
+        return ViewCounter(flush_interval=getattr(settings, 'BLOG_VIEW_FLUSH_INTERVAL', 10.0))
+    return SynchronousViewCounter()
+
+
+# Rebuilt when a BLOG_VIEW_* setting is overridden (e.g. in tests)
+_view_counter = ProcessWriter('BLOG_VIEW_', build_view_counter)
+
+
+def get_view_counter():
+    """Returns the process-wide view counter configured from settings."""
+    return _view_counter.get()
+
+
+def get_visitor_key(request):
+    """Identifies the visitor: the user, else the session, else the IP address and user agent."""
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    session = getattr(request, 'session', None)
+    if session is not None and session.session_key:
+        return f'session:{session.session_key}'
+    return f"ip:{get_client_ip(request)}:{request.META.get('HTTP_USER_AGENT', '')}"
+
+
+def record_view(request, post):
+    """Counts a view of the post unless the visitor already viewed it within the window. Returns whether it counted."""
+    window = getattr(settings, 'BLOG_VIEW_DEDUPE_WINDOW', 60 * 30)
+    if window:
+        visitor = hashlib.sha1(get_visitor_key(request).encode('utf-8')).hexdigest()
+        cache = caches[getattr(settings, 'BLOG_VIEW_CACHE_ALIAS', 'default')]
+        # add() only succeeds for the first view in the window (atomic on memcached/redis)
+        if not cache.add(f'blog:viewed:{post.pk}:{visitor}', 1, window):
+            return False
+    get_view_counter().add(post.pk)
+    return True
@@ -1,26 +1,34 @@
-from rest_framework import viewsets, permissions, status, generics
+from rest_framework import viewsets, permissions, status, generics, mixins
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from django.db.models import F
-from rest_framework.pagination import LimitOffsetPagination
+from django.db.models import Count, Prefetch, Q
+from core.pagination import FlexiblePagination
 from drf_spectacular.utils import (
     extend_schema, OpenApiParameter, OpenApiExample, OpenApiResponse
 )
 from drf_spectacular.types import OpenApiTypes
 
-from .models import BlogPost, BlogComment
+from .models import BlogPost, BlogComment, BlogTag
+from .tags import refresh_scheduled_tag_counts, tagged_post_ids
+from .view_counter import record_view
 from .serializers import (
+    DETAIL_COMMENTS_LIMIT,
     BlogPostSerializer,
     BlogPostListSerializer,
-    BlogCommentSerializer
+    BlogCommentSerializer,
+    BlogTagSerializer,
 )
 
-class StandardResultsSetPagination(LimitOffsetPagination):
+class StandardResultsSetPagination(FlexiblePagination):
     default_limit = 10
     max_limit = 100
 
+class TagCloudPagination(FlexiblePagination):
+    default_limit = 50
+    max_limit = 500
+
 class BlogPostViewSet(viewsets.ModelViewSet):
     """
     API endpoint for managing blog posts with nested comments.
@@ -28,6 +36,8 @@ class BlogPostViewSet(viewsets.ModelViewSet):
     """
     serializer_class = BlogPostSerializer
     pagination_class = StandardResultsSetPagination
+    # Keyset order for ?pagination=cursor (indexed, see BlogPost.Meta.indexes)
+    cursor_ordering = ('-created_at', '-id')
     lookup_field = 'slug'
 
     @extend_schema(
@@ -46,9 +56,17 @@ class BlogPostViewSet(viewsets.ModelViewSet):
             ),
             OpenApiParameter(
                 name='tag',
-                description='Filter by tag name',
+                description='Filter by tag name; repeat it or separate tags with commas for several',
+                required=False,
+                type=str,
+                location=OpenApiParameter.QUERY
+            ),
+            OpenApiParameter(
+                name='tag_match',
+                description='With several tags: posts having all of them (default) or any of them',
                 required=False,
                 type=str,
+                enum=['all', 'any'],
                 location=OpenApiParameter.QUERY
             ),
             OpenApiParameter(
@@ -80,8 +98,10 @@ class BlogPostViewSet(viewsets.ModelViewSet):
     @extend_schema(
         tags=['Blog'],
         summary="Retrieve blog post",
-        description="""Get full details of a blog post by slug.
-        Automatically increments view count for published posts.""",
+        description="""Get full details of a blog post by slug, with its first comments
+        (the rest are paginated at /posts/{slug}/comments/).
+        Counts a view for published posts, once per visitor every BLOG_VIEW_DEDUPE_WINDOW.
+        Views are written in batches, so view_count can lag by BLOG_VIEW_FLUSH_INTERVAL seconds.""",
         responses={
             200: BlogPostSerializer,
             404: OpenApiResponse(
@@ -93,8 +113,7 @@ class BlogPostViewSet(viewsets.ModelViewSet):
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
         if instance.published and (not instance.published_at or instance.published_at <= timezone.now()):
-            BlogPost.objects.filter(pk=instance.pk).update(view_count=F('view_count') + 1)
-            instance.refresh_from_db(fields=['view_count'])
+            record_view(request, instance) # No write here: the counter flushes in the background
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
@@ -180,10 +199,7 @@ class BlogPostViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'], url_path='comments', serializer_class=BlogCommentSerializer)
     def list_comments(self, request, slug=None):
         post = self.get_object()
-        is_admin = request.user.is_authenticated and request.user.is_admin()
-        comments_queryset = post.comments.select_related('user').order_by('created_at')
-        if not is_admin:
-            comments_queryset = comments_queryset.filter(approved=True)
+        comments_queryset = self.get_comments_queryset().filter(post=post)
         page = self.paginate_queryset(comments_queryset)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
@@ -221,9 +237,28 @@ class BlogPostViewSet(viewsets.ModelViewSet):
         serializer.save(post=post, user=user)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    def get_comments_queryset(self):
+        """The comments the user may see: approved ones, or all of them for admins."""
+        queryset = BlogComment.objects.select_related('user').order_by('created_at')
+        if not self.is_admin():
+            queryset = queryset.filter(approved=True)
+        return queryset
+
+    def is_admin(self):
+        return self.request.user.is_authenticated and self.request.user.is_admin()
+
     def get_queryset(self):
-        queryset = BlogPost.objects.select_related('author').prefetch_related('comments')
-        is_admin = self.request.user.is_authenticated and self.request.user.is_admin()
+        queryset = BlogPost.objects.select_related('author')
+        is_admin = self.is_admin()
+        if self.action in ('list', 'retrieve'):
+            # One aggregate in the page query instead of loading the comments to count them.
+            # Counts the same comments as get_comments_queryset(): all of them for admins
+            comments_filter = None if is_admin else Q(comments__approved=True)
+            queryset = queryset.annotate(comments_count=Count('comments', filter=comments_filter))
+        if self.action == 'retrieve':
+            # Only the first page of comments, the rest through list_comments
+            first_comments = self.get_comments_queryset()[:DETAIL_COMMENTS_LIMIT]
+            queryset = queryset.prefetch_related(Prefetch('comments', queryset=first_comments, to_attr='comments_page'))
         if not is_admin:
             queryset = queryset.filter(published=True, published_at__lte=timezone.now())
         else:
@@ -233,14 +268,17 @@ class BlogPostViewSet(viewsets.ModelViewSet):
                 queryset = queryset.filter(published=is_published)
         category = self.request.query_params.get('category')
         featured = self.request.query_params.get('featured')
-        tag = self.request.query_params.get('tag')
+        # Empty items (?tag= or 'gel,') are ignored rather than matching no post
+        tags = [tag for value in self.request.query_params.getlist('tag') for tag in value.split(',') if tag.strip()]
         if category:
             queryset = queryset.filter(category=category)
         if featured is not None:
             is_featured = featured.lower() in ['true', '1', 'yes']
             queryset = queryset.filter(featured=is_featured)
-        if tag:
-            queryset = queryset.filter(tags__contains=tag)
+        if tags:
+            # Indexed lookup in the tag table (blog/tags.py) instead of matching the JSON text
+            match_all = self.request.query_params.get('tag_match', 'all').lower() != 'any'
+            queryset = queryset.filter(pk__in=tagged_post_ids(tags, match_all=match_all))
         return queryset.order_by('-published_at', '-created_at')
 
     def get_serializer_class(self):
@@ -317,4 +355,26 @@ class BlogCommentViewSet(viewsets.GenericViewSet):
         }
     )
     def destroy(self, request, *args, **kwargs):
-        return super().destroy(request, *args, **kwargs)
\ No newline at end of file
+        return super().destroy(request, *args, **kwargs)
+
+class BlogTagViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    API endpoint for the tag cloud: tags of published posts, most used first.
+    Post counts are precomputed on BlogTag (see blog/tags.py); the scheduled posts that went live
+    since the last request are counted first.
+    """
+    queryset = BlogTag.objects.filter(post_count__gt=0).order_by('-post_count', 'name')
+    serializer_class = BlogTagSerializer
+    pagination_class = TagCloudPagination
+    permission_classes = [permissions.AllowAny]
+
+    @extend_schema(
+        tags=['Blog'],
+        summary="Tag cloud",
+        description="""Returns the tags used by published posts with their post counts, most used first.
+        Use ?limit= for the top N.""",
+        responses={200: BlogTagSerializer(many=True)}
+    )
+    def list(self, request, *args, **kwargs):
+        refresh_scheduled_tag_counts()
+        return super().list(request, *args, **kwargs)
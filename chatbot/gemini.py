@@ -0,0 +1,29 @@
+# chatbot/gemini.py
+import os
+
+import requests
+
+GEMINI_API_URL = 'https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent'
+
+
+def get_api_key():
+    return os.getenv('GOOGLE_API_KEY')
+
+
+def generate_content(body, timeout=30):
+    """POSTs a generateContent request body to Gemini and returns the requests.Response."""
+    return requests.post(
+        GEMINI_API_URL,
+        params={'key': get_api_key()},
+        json=body,
+        headers={'Content-Type': 'application/json'},
+        timeout=timeout,
+    )
+
+
+def response_text(response_data):
+    """Text of the first candidate of a generateContent response, or None."""
+    try:
+        return response_data['candidates'][0]['content']['parts'][0]['text']
+    except (KeyError, IndexError, TypeError):
+        return None
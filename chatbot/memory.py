@@ -0,0 +1,160 @@
+# chatbot/memory.py
+"""
+Server-side conversation memory for chatbot.views.chat.
+
+The client only sends its newest message; the context sent to Gemini is rebuilt from the stored
+ChatMessage rows of the conversation:
+  - a rolling summary (ChatConversation.summary) of the older messages, passed with the system
+    instruction
+  - the messages after the summary, verbatim
+Once CHATBOT_HISTORY_WINDOW + CHATBOT_SUMMARY_BATCH messages are past the summary, all but the last
+CHATBOT_HISTORY_WINDOW are folded into it with one extra Gemini call. Every turn thus sends at most
+that many messages plus a summary of bounded size, however long the conversation.
+The summarizing call runs in a background thread after the turn's response (schedule_summary()),
+so it never delays a reply.
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .gemini import generate_content, response_text
+from .models import ChatConversation, ChatMessage
+
+logger = logging.getLogger(__name__)
+
+# Messages folded per summarizing call (caps the prompt when earlier calls failed and they piled up)
+SUMMARY_MAX_MESSAGES = 100
+
+SUMMARY_PROMPT = """Update the summary of a customer support conversation with the new messages below.
+Keep the facts the assistant needs later (names, salon details, requests, answers given, open questions).
+Reply with the updated summary only, at most {max_chars} characters.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}"""
+
+
+def get_window_size():
+    return max(getattr(settings, 'CHATBOT_HISTORY_WINDOW', 10), 1)
+
+
+def get_summary_batch():
+    return max(getattr(settings, 'CHATBOT_SUMMARY_BATCH', 10), 1)
+
+
+def get_summary_max_chars():
+    return getattr(settings, 'CHATBOT_SUMMARY_MAX_CHARS', 2000)
+
+
+def to_content(message):
+    return {'role': 'user' if message.is_from_user else 'model', 'parts': [{'text': message.content}]}
+
+
+def unsummarized_messages(conversation):
+    return ChatMessage.objects.filter(conversation=conversation, id__gt=conversation.summary_until)
+
+
+def recent_messages(conversation):
+    """The messages after the summary (the last window + batch at most, should summarizing fail), oldest first."""
+    recent = unsummarized_messages(conversation).order_by('-id')[:get_window_size() + get_summary_batch()]
+    return list(reversed(recent))
+
+
+def build_request(conversation, instruction):
+    """generateContent body: the instruction (plus summary) and the recent messages, newest last."""
+    if conversation.summary:
+        instruction = f"{instruction}\n\nSummary of the earlier conversation:\n{conversation.summary}"
+    return {
+        'systemInstruction': {'parts': [{'text': instruction}]},
+        'contents': [to_content(message) for message in recent_messages(conversation)],
+    }
+
+
+# Conversations a background thread of this process is summarizing
+_summarizing = set()
+_summarizing_lock = threading.Lock()
+
+
+def needs_summary(conversation):
+    return unsummarized_messages(conversation).count() >= get_window_size() + get_summary_batch()
+
+
+def summarize_conversation(conversation_id):
+    """update_summary() for a conversation by id (what the background thread runs)."""
+    conversation = ChatConversation.objects.filter(pk=conversation_id).first()
+    return update_summary(conversation) if conversation is not None else False
+
+
+def schedule_summary(conversation):
+    """
+    Summarizes the conversation, if due, without holding up the current request: in a background
+    thread started once the request's transaction commits, or inline when
+    CHATBOT_SUMMARY_IN_BACKGROUND is off. Skipped while this process is already summarizing it.
+    """
+    if not needs_summary(conversation):
+        return
+    if not getattr(settings, 'CHATBOT_SUMMARY_IN_BACKGROUND', True):
+        update_summary(conversation)
+        return
+
+    conversation_id = conversation.pk
+
+    def run():
+        try:
+            summarize_conversation(conversation_id)
+        except Exception:
+            logger.exception(f"Could not summarize conversation {conversation_id}")
+        finally:
+            with _summarizing_lock:
+                _summarizing.discard(conversation_id)
+            connection.close() # The thread's own connection
+
+    def start():
+        with _summarizing_lock:
+            if conversation_id in _summarizing:
+                return
+            _summarizing.add(conversation_id)
+        threading.Thread(target=run, name=f'chat-summary-{conversation_id}', daemon=True).start()
+
+    transaction.on_commit(start)
+
+
+def update_summary(conversation):
+    """
+    Folds all but the last CHATBOT_HISTORY_WINDOW messages into the summary, once the window plus
+    CHATBOT_SUMMARY_BATCH messages are waiting. Returns whether the summary changed. A failed call
+    leaves the summary as it was: the messages are retried on a later turn.
+    """
+    waiting = unsummarized_messages(conversation).count()
+    if waiting < get_window_size() + get_summary_batch():
+        return False
+    pending = list(unsummarized_messages(conversation).order_by('id')[:min(waiting - get_window_size(), SUMMARY_MAX_MESSAGES)])
+
+    max_chars = get_summary_max_chars()
+    prompt = SUMMARY_PROMPT.format(
+        max_chars=max_chars,
+        summary=conversation.summary or '(none yet)',
+        messages='\n'.join(f"{'User' if message.is_from_user else 'Assistant'}: {message.content}" for message in pending),
+    )
+    try:
+        response = generate_content({'contents': [{'role': 'user', 'parts': [{'text': prompt}]}]})
+        summary = response_text(response.json()) if response.ok else None
+    except Exception as e:
+        logger.warning(f"Could not summarize conversation {conversation.pk}: {e}")
+        return False
+    if not summary:
+        logger.warning(f"Could not summarize conversation {conversation.pk}: no summary in the response")
+        return False
+
+    summary = summary.strip()[:max_chars]
+    # Only if no concurrent turn summarized the same messages first
+    updated = ChatConversation.objects.filter(pk=conversation.pk, summary_until=conversation.summary_until).update(
+        summary=summary, summary_until=pending[-1].id,
+    )
+    if updated:
+        conversation.summary, conversation.summary_until = summary, pending[-1].id
+    return bool(updated)
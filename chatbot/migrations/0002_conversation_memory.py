@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-17 05:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatconversation',
+            name='summary',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='chatconversation',
+            name='summary_until',
+            field=models.BigIntegerField(default=0, help_text='Id of the last message included in the summary'),
+        ),
+        migrations.AlterField(
+            model_name='chatconversation',
+            name='session_id',
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+    ]
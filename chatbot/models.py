@@ -8,10 +8,13 @@ class ChatConversation(models.Model):
         null=True, 
         blank=True
     )
-    session_id = models.CharField(max_length=255)
+    session_id = models.CharField(max_length=255, db_index=True) # Looked up on every chat turn
     started_at = models.DateTimeField(auto_now_add=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(null=True, blank=True)
+    # Rolling summary of the messages older than the history window (see chatbot/memory.py)
+    summary = models.TextField(blank=True, default='')
+    summary_until = models.BigIntegerField(default=0, help_text="Id of the last message included in the summary")
 
 class ChatMessage(models.Model):
     conversation = models.ForeignKey(ChatConversation, on_delete=models.CASCADE, related_name='messages')
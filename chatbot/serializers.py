@@ -18,8 +18,6 @@ class ChatConversationSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'started_at', 'user']
 
 class ChatRequestSerializer(serializers.Serializer):
-    contents = serializers.ListField(
-        child=serializers.DictField(),
-        required=True
-    )
+    # Only the newest message, the history is kept server-side (chatbot/memory.py)
+    message = serializers.CharField(required=True)
     session_id = serializers.CharField(required=False, allow_null=True)
\ No newline at end of file
@@ -1,3 +1,112 @@
-from django.test import TestCase
+import json
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from .models import ChatConversation
+
+
+def gemini_reply(text):
+    return mock.Mock(ok=True, status_code=200, json=mock.Mock(return_value={
+        'candidates': [{'content': {'role': 'model', 'parts': [{'text': text}]}}],
+    }))
+
+
+@override_settings(CHATBOT_HISTORY_WINDOW=4, CHATBOT_SUMMARY_BATCH=4)
+@mock.patch.dict('os.environ', {'GOOGLE_API_KEY': 'test-key'})
+class ChatMemoryTests(TestCase):
+    session_id = None
+
+    def send(self, message, session_id=None):
+        """Sends a message in the current conversation (or the given one) and continues under the returned id."""
+        response = self.client.post(
+            '/api/chat/', json.dumps({'message': message, 'session_id': session_id or self.session_id}), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.session_id = response.json()['session_id']
+        return response.json()
+
+    @mock.patch('chatbot.gemini.requests.post')
+    def test_context_is_rebuilt_from_a_window_and_a_rolling_summary(self, post):
+        def reply(url, params, json, **kwargs):
+            if 'systemInstruction' not in json:
+                return gemini_reply('User asked about gel nails.') # Summarizing call
+            return gemini_reply(f"Answer to: {json['contents'][-1]['parts'][0]['text']}")
+        post.side_effect = reply
+
+        for turn in range(8):
+            self.assertEqual(self.send(f'Question {turn}')['candidates'][0]['content']['parts'][0]['text'], f'Answer to: Question {turn}')
+
+        conversation = ChatConversation.objects.get(session_id=self.session_id)
+        self.assertEqual(conversation.messages.count(), 16)
+        self.assertEqual(conversation.summary, 'User asked about gel nails.')
+        # Every turn sends at most window + batch messages, whatever the conversation length
+        chat_calls = [call.kwargs['json'] for call in post.call_args_list if 'systemInstruction' in call.kwargs['json']]
+        self.assertTrue(all(len(body['contents']) <= 8 for body in chat_calls))
+        last = chat_calls[-1]
+        self.assertIn('User asked about gel nails.', last['systemInstruction']['parts'][0]['text'])
+        self.assertEqual([content['role'] for content in last['contents']][-2:], ['model', 'user'])
+        # Summaries after turns 4, 6 and 8: the last turn sent messages 9-15 only
+        self.assertEqual(len(last['contents']), 7)
+        self.assertEqual(conversation.messages.filter(pk__lte=conversation.summary_until).count(), 12)
+
+    @mock.patch('chatbot.gemini.requests.post')
+    def test_failed_summary_keeps_the_messages_unsummarized(self, post):
+        post.side_effect = lambda url, params, json, **kwargs: (
+            gemini_reply('Reply') if 'systemInstruction' in json else mock.Mock(ok=False, json=mock.Mock(return_value={}))
+        )
+        with self.assertLogs('chatbot.memory', 'WARNING'):
+            for turn in range(5):
+                self.send(f'Question {turn}')
+        conversation = ChatConversation.objects.get(session_id=self.session_id)
+        self.assertEqual((conversation.summary, conversation.summary_until), ('', 0))
+
+    @override_settings(CHATBOT_SUMMARY_IN_BACKGROUND=True)
+    @mock.patch('chatbot.memory.threading.Thread')
+    @mock.patch('chatbot.gemini.requests.post')
+    def test_summary_is_made_after_the_response(self, post, thread):
+        post.side_effect = lambda url, params, json, **kwargs: gemini_reply('Reply' if 'systemInstruction' in json else 'Summary')
+        for turn in range(4):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.send(f'Question {turn}')
+
+        # The fourth turn fills window + batch: it started a thread instead of summarizing inline
+        thread.assert_called_once()
+        thread.return_value.start.assert_called_once()
+        self.assertEqual(post.call_count, 4)
+        conversation = ChatConversation.objects.get(session_id=self.session_id)
+        self.assertEqual(conversation.summary, '')
+
+        with mock.patch('chatbot.memory.connection'): # Run the thread's target here, on the test connection
+            thread.call_args.kwargs['target']()
+        conversation.refresh_from_db()
+        self.assertEqual(conversation.summary, 'Summary')
+
+    @mock.patch('chatbot.gemini.requests.post')
+    def test_only_server_issued_ids_continue_a_conversation(self, post):
+        post.return_value = gemini_reply('Reply')
+        first = self.send('My name is Ann')['session_id']
+        self.assertEqual(self.send('Hello again')['session_id'], first)
+
+        # An id the server never issued starts a new conversation under a fresh id
+        self.assertNotEqual(self.send('Hi', session_id='chosen-by-client')['session_id'], 'chosen-by-client')
+        self.assertFalse(ChatConversation.objects.filter(session_id='chosen-by-client').exists())
+
+    @mock.patch('chatbot.gemini.requests.post')
+    def test_signed_in_conversations_are_bound_to_their_user(self, post):
+        post.return_value = gemini_reply('Reply')
+        User = get_user_model()
+        self.client.force_login(User.objects.create_user(username='ann', email='ann@example.com', password='password'))
+        owned = self.send('My name is Ann')['session_id']
+
+        self.client.force_login(User.objects.create_user(username='bob', email='bob@example.com', password='password'))
+        post.reset_mock()
+        self.assertNotEqual(self.send('What is my name?', session_id=owned)['session_id'], owned)
+        # Ann's messages were not replayed to Bob's request
+        self.assertEqual(len(post.call_args.kwargs['json']['contents']), 1)
+        self.assertEqual(ChatConversation.objects.get(session_id=owned).messages.count(), 2)
+
+    def test_message_is_required(self):
+        response = self.client.post('/api/chat/', json.dumps({'contents': []}), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
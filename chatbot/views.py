@@ -4,9 +4,7 @@ from django.views.decorators.http import require_POST
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from .models import ChatConversation, ChatMessage
-import requests
 import json
-import os
 from dotenv import load_dotenv
 import uuid
 from rest_framework.decorators import api_view, permission_classes
@@ -14,6 +12,8 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from .serializers import ChatConversationSerializer
+from .gemini import generate_content, get_api_key, response_text
+from .memory import build_request, schedule_summary
 load_dotenv()
 
 User = get_user_model()  # Get the active user model
@@ -27,89 +27,96 @@ def get_business_knowledge(query):
     return []
 
 def get_or_create_conversation(request, session_id):
+    """
+    The conversation of a session_id issued by chat(), or a new one under a fresh id.
+    Ids are only issued by the server (random UUIDs), so a client can't choose one to replay
+    someone else's history, and a conversation started by a signed-in user is only continued
+    by that user. Unknown or foreign ids start a new conversation instead.
+    """
     user = request.user if request.user.is_authenticated else None
-    ip = request.META.get('REMOTE_ADDR')
-    user_agent = request.META.get('HTTP_USER_AGENT')
-    
-    conversation, created = ChatConversation.objects.get_or_create(
-        session_id=session_id,
-        defaults={
-            'user': user,
-            'ip_address': ip,
-            'user_agent': user_agent
-        }
+    if session_id:
+        conversation = ChatConversation.objects.filter(session_id=session_id).first()
+        if conversation is not None and conversation.user_id in (None, getattr(user, 'pk', None)):
+            return conversation
+
+    return ChatConversation.objects.create(
+        session_id=str(uuid.uuid4()),
+        user=user,
+        ip_address=request.META.get('REMOTE_ADDR'),
+        user_agent=request.META.get('HTTP_USER_AGENT'),
     )
-    return conversation
+
+def get_user_message(data):
+    """The newest user message: "message", or the last user turn of a (legacy) full "contents" history."""
+    message = data.get('message')
+    contents = data.get('contents')
+    if message is None and isinstance(contents, list) and contents:
+        try:
+            if contents[-1]['role'] == 'user':
+                message = contents[-1]['parts'][0]['text']
+        except (KeyError, IndexError, TypeError):
+            message = None
+    return message.strip() if isinstance(message, str) else None
+
+def get_instruction(user_message):
+    # Get business knowledge relevant to this message
+    business_info = "\n".join([f"Q: {item['question']}\nA: {item['answer']}"
+                      for item in get_business_knowledge(user_message)])
+    return f"""
+    You are a customer support assistant for [Your Business Name].
+    Here's some key information about our business:
+
+    {business_info}
+
+    Always respond in a friendly, professional tone. If the answer isn't
+    in the provided information, say you don't know and direct them to
+    our contact channels.
+    """
 
 @csrf_exempt
 @require_POST
 def chat(request):
+    """
+    One chat turn. The body is {"message": "...", "session_id": "..."}: only the newest message,
+    the earlier context is rebuilt from the stored conversation (see chatbot/memory.py).
+    session_id is the one returned by the previous turn, omitted for a new conversation.
+    """
     try:
         # Get request data
         data = json.loads(request.body)
-        contents = data.get('contents')
-        session_id = data.get('session_id', str(uuid.uuid4()))  # Generate new if not provided
-        
+        session_id = data.get('session_id') if isinstance(data.get('session_id'), str) else None
+        user_message = get_user_message(data)
+
         # Input validation
-        if not contents or not isinstance(contents, list):
+        if not user_message:
             return JsonResponse(
-                {'error': 'Invalid request body: "contents" array is required.'},
+                {'error': 'Invalid request body: "message" is required.'},
                 status=400
             )
-        
-        # Get conversation
-        conversation = get_or_create_conversation(request, session_id)
-        
-        # Log user message (last item in contents is the user's latest message)
-        user_message = contents[-1]['parts'][0]['text'] if contents and contents[-1]['role'] == 'user' else None
-        if user_message:
-            ChatMessage.objects.create(
-                conversation=conversation,
-                content=user_message,
-                is_from_user=True
+        max_chars = getattr(settings, 'CHATBOT_MAX_MESSAGE_CHARS', 4000)
+        if len(user_message) > max_chars:
+            return JsonResponse(
+                {'error': f'Message is too long (at most {max_chars} characters).'},
+                status=400
             )
-        
-            # Get business knowledge relevant to this message
-            business_info = "\n".join([f"Q: {item['question']}\nA: {item['answer']}" 
-                              for item in get_business_knowledge(user_message)])
-
-            business_context = {
-                "role": "user",
-                "parts": [{
-                    "text": f"""
-                    You are a customer support assistant for [Your Business Name]. 
-                    Here's some key information about our business:
-                    
-                    {business_info}
-                    
-                    Always respond in a friendly, professional tone. If the answer isn't 
-                    in the provided information, say you don't know and direct them to 
-                    our contact channels.
-                    """
-                }]
-            }
-            
-            # Insert business context at the beginning if it's a new conversation
-            if len(contents) == 1:  # Assuming first message is user's initial message
-                contents.insert(0, business_context)
-        
-        # Get API key
-        api_key = os.getenv('GOOGLE_API_KEY')
-        if not api_key:
+
+        if not get_api_key():
             return JsonResponse(
                 {'error': 'Server configuration error.'},
                 status=500
             )
-        
-        # Call Google API
-        google_api_url = f'https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent?key={api_key}'
-        
-        response = requests.post(
-            google_api_url,
-            json={'contents': contents},
-            headers={'Content-Type': 'application/json'}
+
+        # Get conversation and log the user message
+        conversation = get_or_create_conversation(request, session_id)
+        ChatMessage.objects.create(
+            conversation=conversation,
+            content=user_message,
+            is_from_user=True
         )
-        
+
+        # Call Google API with the summary and the recent messages (this one included)
+        response = generate_content(build_request(conversation, get_instruction(user_message)))
+
         # Handle Google API response
         if not response.ok:
             error_data = response.json()
@@ -118,22 +125,25 @@ def chat(request):
                 {'error': error_msg},
                 status=response.status_code
             )
-        
+
         response_data = response.json()
-        
+
         # Log bot response
-        if 'candidates' in response_data and response_data['candidates']:
-            bot_response = response_data['candidates'][0]['content']['parts'][0]['text']
+        bot_response = response_text(response_data)
+        if bot_response:
             ChatMessage.objects.create(
                 conversation=conversation,
                 content=bot_response,
                 is_from_user=False
             )
-        
-        # Include session_id in response for future requests
-        response_data['session_id'] = session_id
+            # Fold the messages leaving the window into the summary (an extra call every few turns,
+            # made in the background once this response is on its way)
+            schedule_summary(conversation)
+
+        # Include session_id in response for future requests (a new one if the given one was refused)
+        response_data['session_id'] = conversation.session_id
         return JsonResponse(response_data)
-        
+
     except json.JSONDecodeError:
         return JsonResponse(
             {'error': 'Invalid JSON format in request body.'},
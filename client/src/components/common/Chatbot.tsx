@@ -13,11 +13,6 @@ type Message = {
   timestamp: Date;
 };
 
-interface ChatMessage {
-  role: "user" | "model";
-  parts: { text: string }[];
-}
-
 const initialMessages: Message[] = [
   {
     id: "1",
@@ -74,14 +69,7 @@ export function Chatbot() {
     setIsTyping(true);
 
     try {
-      const payload: ChatMessage[] = [
-        {
-          role: "user",
-          parts: [{ text: userMessageContent }],
-        },
-      ];
-
-      const response = await API.chat.sendMessage(payload, sessionId);
+      const response = await API.chat.sendMessage(userMessageContent, sessionId);
       const botResponseData = response.data;
 
       // Update session ID if returned
@@ -155,11 +155,6 @@ interface Salon {
   updated_at: string; // ISO 8601 string
 }
 
-interface ChatMessage {
-  role: 'user' | 'model';
-  parts: { text: string }[];
-}
-
 interface ChatResponse {
   candidates: {
     content: {
@@ -458,9 +453,10 @@ export const API = {
   },
 
   chat: {
-    sendMessage: async (messages: ChatMessage[], sessionId?: string): Promise<AxiosResponse<ChatResponse>> => {
+    // Only the newest message: the server keeps the conversation history per session
+    sendMessage: async (message: string, sessionId?: string): Promise<AxiosResponse<ChatResponse>> => {
       return await apiClient.post('/chat/', {
-        contents: messages,
+        message,
         session_id: sessionId
       });
     },
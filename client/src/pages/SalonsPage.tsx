@@ -174,7 +174,7 @@ export default function SalonsPage() {
                        <div className="relative aspect-video bg-gray-200 overflow-hidden rounded-md">
                            {/* Use salon image first, then template preview */}
                            <img
-                                src={salon.image || salon.template?.preview_image || '/placeholder-template.png'}
+                                src={salon.image || salon.template_preview_image || '/placeholder-template.png'}
                                 alt={`${salon.name || 'Salon'} preview`}
                                 className="object-cover w-full h-full"
                                 onError={(e) => {
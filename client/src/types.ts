@@ -113,6 +113,7 @@ export interface SalonData {
 
   // The link to the associated template - MUST be nested TemplateData for SampleSite
   template?: TemplateData | null; // Nested template data
+  template_preview_image?: string | null; // The template's preview image, also in the compact list cards
 
   created_at?: string; // ISO 8601 string
   updated_at?: string; // ISO 8601 string
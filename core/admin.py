@@ -1,6 +1,9 @@
 
 from django.contrib import admin
-from .models import Stats
+from django.db import transaction
+
+from .models import STATS_COUNTERS, ImportJob, Stats, StatsShard
+from .stats import fold_shards
 
 @admin.register(Stats)
 class StatsAdmin(admin.ModelAdmin):
@@ -8,10 +11,36 @@ class StatsAdmin(admin.ModelAdmin):
     # Make fields read-only as they should be updated programmatically
     readonly_fields = ('created_at', 'last_updated') # Allow editing counts for manual correction if needed
 
+    def get_object(self, request, object_id, from_field=None):
+        # Edit the stored row (never the cached Stats.load() copy), showing it with the shard deltas
+        # folded in. A submitted form keeps the later deltas apart: save_model() adds them.
+        if request.method != 'POST':
+            fold_shards()
+        return super().get_object(request, object_id, from_field)
+
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            # Deltas that landed since the form was loaded still count on top of the corrected totals
+            shards = list(StatsShard.objects.select_for_update().values(*STATS_COUNTERS))
+            for field in STATS_COUNTERS:
+                setattr(obj, field, max(getattr(obj, field) + sum(shard[field] for shard in shards), 0))
+            obj.save() # Resets the shards, whose deltas are now part of the totals
+
     # Prevent adding new Stats objects via admin
     def has_add_permission(self, request):
         return False
 
     # Prevent deleting the Stats object via admin
     def has_delete_permission(self, request, obj=None):
-        return False
\ No newline at end of file
+        return False
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ('source', 'status', 'last_row', 'imported', 'updated', 'skipped', 'failed', 'updated_at')
+    list_filter = ('status',)
+    # Written by the import command only
+    readonly_fields = [field.name for field in ImportJob._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
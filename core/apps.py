@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # Keeps the Stats counters in line with salon and user saves/deletes (see core/stats.py)
+        from .stats import connect_signals
+        connect_signals()
@@ -0,0 +1,103 @@
+# core/background.py
+"""
+In-process write-behind shared by the visit buffer (tracking/buffer.py) and the blog view
+counter (blog/view_counter.py): requests only hand their writes to an object in memory, and a
+background thread saves them every few seconds.
+
+PeriodicWriter is the base of those objects: it owns the writer thread, restarts it after a fork
+and serializes flushes. ProcessWriter holds the process-wide instance built from settings.
+"""
+import atexit
+import os
+import threading
+
+from django.core.signals import setting_changed
+from django.db import close_old_connections
+
+
+class PeriodicWriter:
+    """
+    Base for buffers written by a background thread every `flush_interval` seconds, or as soon as
+    wake() is called. The thread starts with the first ensure_writer() call (subclasses call it
+    when they get something to write) and is started again in a forked process (e.g. gunicorn
+    --preload), where threads don't survive.
+
+    Subclasses implement write_pending(); flush() runs it in one thread at a time.
+    """
+    thread_name = 'periodic-writer'
+
+    def __init__(self, flush_interval):
+        self.flush_interval = float(flush_interval)
+        self._wakeup = threading.Event()
+        self._flush_lock = threading.Lock() # Only one thread writes at a time
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def write_pending(self):
+        """Save whatever is waiting. Must not raise: a failed write is the subclass' to log or keep."""
+        raise NotImplementedError
+
+    def forked(self):
+        """Called in a forked process before its writer starts, e.g. to drop the parent's pending writes."""
+
+    def flush(self):
+        """Write everything pending now. Safe to call from any thread."""
+        with self._flush_lock:
+            self.write_pending()
+
+    def wake(self):
+        """Have the writer flush now instead of at the end of the interval."""
+        self._wakeup.set()
+
+    def ensure_writer(self):
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            if self._pid is not None and self._pid != os.getpid():
+                self.forked()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            # The writer thread keeps its own DB connection, drop it if it went stale
+            close_old_connections()
+            self.flush()
+
+
+class ProcessWriter:
+    """
+    The process-wide writer made by `build` (e.g. a PeriodicWriter, or a synchronous fallback
+    when buffering is disabled) on first use. Whatever it still holds is written when the
+    process exits cleanly, and it is flushed and rebuilt on the next use when a setting starting
+    with `setting_prefix` is overridden (e.g. in tests).
+    """
+
+    def __init__(self, setting_prefix, build):
+        self.setting_prefix = setting_prefix
+        self.build = build
+        self._writer = None
+        self._lock = threading.Lock()
+        setting_changed.connect(self.reset, weak=False, dispatch_uid=f'process_writer_{setting_prefix}')
+
+    def get(self):
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = self.build()
+                    atexit.register(self._writer.flush)
+        return self._writer
+
+    def reset(self, setting, **kwargs):
+        if setting.startswith(self.setting_prefix):
+            with self._lock:
+                if self._writer is not None:
+                    self._writer.flush()
+                    atexit.unregister(self._writer.flush)
+                self._writer = None
@@ -0,0 +1,13 @@
+# core/http.py
+
+
+def get_client_ip(request):
+    """
+    The client's IP address: the first X-Forwarded-For entry when a proxy (e.g. Nginx) set one,
+    else REMOTE_ADDR. Configure the proxy to set X-Forwarded-For, REMOTE_ADDR is then the proxy.
+    """
+    forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if forwarded_for:
+        # X-Forwarded-For can contain a comma-separated list. The client's IP is typically first.
+        return forwarded_for.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR')
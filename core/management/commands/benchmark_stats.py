@@ -0,0 +1,109 @@
+# core/management/commands/benchmark_stats.py
+
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings, setup_databases, teardown_databases
+
+from core.models import Stats, StatsShard
+from core.stats import adjust_stats, fold_shards
+
+
+class Command(BaseCommand):
+    help = (
+        'Hammers the site statistics counters from concurrent threads in a test database and '
+        'compares the throughput of a single counter row with the counters spread over N shards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent writers (default: 16).')
+        parser.add_argument('--updates', type=int, default=200, help='Counter updates per thread (default: 200).')
+        parser.add_argument('--shards', type=int, nargs='+', default=[1, 8], help='Shard counts to compare (default: 1 8).')
+        parser.add_argument(
+            '--hold', type=float, default=1.0,
+            help='Simulated rest of the request transaction after the update, in ms (default: 1).',
+        )
+
+    def handle(self, *args, **options):
+        if options['threads'] < 1 or options['updates'] < 1 or min(options['shards']) < 1:
+            raise CommandError('--threads, --updates and --shards must be at least 1.')
+
+        # An in-memory SQLite test database can't be shared by writer threads: use a file
+        temp_dir = None
+        if connection.vendor == 'sqlite':
+            temp_dir = tempfile.TemporaryDirectory()
+            connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(temp_dir.name, 'benchmark_stats.sqlite3')
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+        try:
+            Stats.load()
+            results = {}
+            for shards in options['shards']:
+                with override_settings(STATS_SHARDS=shards):
+                    results[shards] = self.run(options)
+                self.check_totals(options)
+            self.print_results(results, options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            if temp_dir is not None:
+                temp_dir.cleanup()
+
+    def run(self, options):
+        hold = options['hold'] / 1000
+        latencies = []
+        errors = []
+
+        def write():
+            try:
+                for _ in range(options['updates']):
+                    started = time.perf_counter()
+                    # Like a view under ATOMIC_REQUESTS: the row lock is held until the request ends
+                    with transaction.atomic():
+                        adjust_stats(total_salons=1, pending_contacts=1)
+                        time.sleep(hold)
+                    latencies.append(time.perf_counter() - started)
+            except Exception as exc: # Reported after the run, a dead thread would just skew the numbers
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=write) for _ in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        if errors:
+            raise CommandError(f'{len(errors)} writer(s) failed, first error: {errors[0]!r}')
+        return elapsed, latencies
+
+    def check_totals(self, options):
+        """Every update must have been counted exactly once."""
+        expected = Stats.objects.get(pk=1).total_salons + options['threads'] * options['updates']
+        Stats.clear_cache()
+        if Stats.load().total_salons != expected:
+            raise CommandError(f'Lost updates: expected total_salons={expected}, got {Stats.load().total_salons}.')
+        fold_shards()
+        StatsShard.objects.all().delete()
+
+    def print_results(self, results, options):
+        self.stdout.write(
+            f"{options['threads']} threads x {options['updates']} updates, "
+            f"{options['hold']:g} ms held per transaction ({connection.vendor})"
+        )
+        self.stdout.write(f'{"shards":<10}{"updates/s":>12}{"p50 (ms)":>12}{"p95 (ms)":>12}')
+        for shards, (elapsed, latencies) in results.items():
+            p50 = statistics.median(latencies) * 1000
+            p95 = statistics.quantiles(latencies, n=20)[-1] * 1000 if len(latencies) > 1 else p50
+            self.stdout.write(f'{shards:<10}{len(latencies) / elapsed:>12.0f}{p50:>12.2f}{p95:>12.2f}')
+        if connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING(
+                'SQLite takes one lock for the whole database, so shards can not help here: '
+                'run against PostgreSQL/MySQL (row locks) to see the difference.'
+            ))
+        self.stdout.write(self.style.SUCCESS('Benchmark finished, the test database has been removed.'))
@@ -1,14 +1,49 @@
 # salon_app/management/commands/import_salons_csv.py
 
 import csv
+import hashlib
 import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
 from django.core.management.base import BaseCommand, CommandError
-from django.db import transaction
-from django.utils.text import slugify
-from django.utils import timezone # Import timezone if your save method uses it
+from django.db import DatabaseError, transaction
 
 # Make sure this import path is correct for your app
-from salons.models import Salon, Template
+from core.models import ImportJob
+from core.slugs import SlugAllocator, save_with_unique_slug
+from core.stats import record_created
+from salons.models import Salon, Template, import_fingerprints
+from salons.site_cache import invalidate_salon_sites
+
+# Define the column mapping based on observation of row 852 and previous rows.
+# ADJUST THESE INDICES CAREFULLY BASED ON YOUR EXACT CSV FILE STRUCTURE.
+COLUMN_MAPPING = {
+    'name': 0,
+    # 1: Google Maps URL (ignored - if you need this, add a field)
+    'image': 2, # Main image URL string
+    # 3: Rating (ignored)
+    'location': 4, # e.g., "Not Available" or "Bellingham, WA"
+    'description': 5, # e.g., "Massage spa", "Nail salon" - Often short category text in this data
+    'address': 6, # Full street address
+    'opening_hours': 7, # String format like "Day,Hours,Day,Hours,..."
+    # 8, 9: Seem to be "Not Available" placeholders in the example data
+    'phone_number': 10,
+    'gallery_images_string': 11, # Comma-separated URLs string
+    # 12 onwards: Latitude, Longitude, other "Not Available" fields (ignored)
+}
+
+# Determine the minimum number of columns expected
+MIN_COLUMNS = max(COLUMN_MAPPING.values()) + 1
+
+# Rows parsed, deduplicated and written (one bulk INSERT, one transaction) at a time
+DEFAULT_BATCH_SIZE = 500
+
+# Salon fields taken from the CSV, refreshed on existing salons by --update-existing
+UPSERT_FIELDS = ['name', 'location', 'address', 'phone_number', 'image', 'description', 'opening_hours', 'gallery_images', 'updated_at']
 
 # --- Helper Functions ---
 
@@ -50,11 +85,67 @@ def parse_gallery_images(image_string):
 
     return urls
 
+def parse_row(row_num, row):
+    """
+    Turns one CSV row into Salon field values.
+    Returns ('ok', salon_data), or ('skipped', message) / ('failed', message) for rows that can't be imported.
+    """
+    # Skip completely empty rows
+    if not row or all(clean_csv_value(cell) is None for cell in row):
+        return 'skipped', f'Skipping empty or all-null row {row_num}.'
+
+    # Check if the row has enough columns
+    if len(row) < MIN_COLUMNS:
+        return 'failed', f'Skipping row {row_num}: Expected at least {MIN_COLUMNS} columns based on mapping, found {len(row)}. Data: {row}'
+
+    try:
+        name = clean_csv_value(row[COLUMN_MAPPING['name']])
+        # Name is a required field in the model, skip row if missing
+        if not name:
+            return 'skipped', f'Skipping row {row_num}: Salon name is missing or "Not Available". Raw value: "{row[COLUMN_MAPPING["name"]]}"'
+        # Location is required as well; rejected here rather than failing the whole batch INSERT
+        location = clean_csv_value(row[COLUMN_MAPPING['location']])
+        if not location:
+            return 'failed', f'Skipping row {row_num}: Location is missing or "Not Available" for salon "{name}".'
+
+        # Fields not in the mapped columns keep their model defaults (blank/empty lists),
+        # claiming status defaults to unclaimed / notContacted, sample_url is allocated by the importer.
+        return 'ok', {
+            'name': name,
+            'location': location,
+            'address': clean_csv_value(row[COLUMN_MAPPING['address']]),
+            'phone_number': clean_csv_value(row[COLUMN_MAPPING['phone_number']]),
+            'image': clean_csv_value(row[COLUMN_MAPPING['image']]), # Main image URL string
+            # Assuming CSV description column 5 is meant for the main description field
+            'description': clean_csv_value(row[COLUMN_MAPPING['description']]),
+            # Opening hours as a single text block
+            'opening_hours': clean_csv_value(row[COLUMN_MAPPING['opening_hours']]),
+            'gallery_images': parse_gallery_images(row[COLUMN_MAPPING['gallery_images_string']]),
+        }
+    except (IndexError, ValueError, TypeError) as e:
+        return 'failed', f'Failed to process data for row {row_num}: {type(e).__name__}: {e} - Raw row data (first 12 columns): {row[:12]}...'
+
+def parse_chunk(chunk):
+    """Parses a list of (row_num, row) into (row_num, status, result). Runs in the pool with --workers."""
+    return [(row_num, *parse_row(row_num, row)) for row_num, row in chunk]
+
+def hash_file(path):
+    """SHA-256 of the file contents, identifying the source of an ImportJob."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for block in iter(lambda: source.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
 # --- End Helper Functions ---
 
 
 class Command(BaseCommand):
-    help = 'Imports salon data from a specified CSV file, creating new salons.'
+    help = (
+        'Imports salon data from a specified CSV file, creating new salons. '
+        'Rows are streamed and written in batches, each batch in its own transaction together with '
+        'a checkpoint, so an interrupted import can continue with --resume.'
+    )
 
     def add_arguments(self, parser):
         parser.add_argument('csv_file', type=str, help='The path to the CSV file to import.')
@@ -69,210 +160,319 @@ class Command(BaseCommand):
              action='store_true',
              help='Force creation even if a salon with the same name and address exists.'
         )
+        parser.add_argument(
+            '--update-existing',
+            action='store_true',
+            help='Update salons that already exist (same name and address/location) with the CSV values instead of skipping them.'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continue the last unfinished import of this file after its last committed row.'
+        )
         parser.add_argument(
             '--encoding',
             type=str,
             default='utf-8',
             help='Encoding of the CSV file (default: utf-8).'
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Rows written per INSERT and transaction (default: {DEFAULT_BATCH_SIZE}).'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Processes parsing and validating rows; the command itself does all database writes (default: 1, no pool).'
+        )
 
-
-    # Keep transaction.atomic on handle() for overall import consistency.
-    # Improved error handling inside the loop will prevent the atomic error.
-    @transaction.atomic
     def handle(self, *args, **options):
         csv_file_path = options['csv_file']
         template_slug_to_assign = options['template_slug']
-        force_create = options['force_create']
+        self.force_create = options['force_create']
+        self.update_existing = options['update_existing']
         csv_encoding = options['encoding']
+        batch_size = options['batch_size']
+        workers = options['workers']
 
         # --- Validation ---
         if not os.path.exists(csv_file_path):
             raise CommandError(f'File "{csv_file_path}" does not exist.')
-
-        default_template = None
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1.')
+        if workers < 1:
+            raise CommandError('--workers must be at least 1.')
+        if self.force_create and self.update_existing:
+            raise CommandError('--force-create and --update-existing cannot be combined.')
+
+        self.default_template = None
         if template_slug_to_assign:
             try:
-                default_template = Template.objects.get(slug=template_slug_to_assign)
-                self.stdout.write(self.style.SUCCESS(f'Assigning default template: "{default_template.name}" (Slug: {default_template.slug})'))
+                self.default_template = Template.objects.get(slug=template_slug_to_assign)
+                self.stdout.write(self.style.SUCCESS(f'Assigning default template: "{self.default_template.name}" (Slug: {self.default_template.slug})'))
             except Template.DoesNotExist:
                 raise CommandError(f'Template with slug "{template_slug_to_assign}" not found.')
 
+        self.job = self.get_job(csv_file_path, options['resume'])
+        if self.job is None:
+            return
         self.stdout.write(self.style.SUCCESS(f'Starting import from {csv_file_path} with encoding {csv_encoding}...'))
 
-        imported_count = 0
-        skipped_count = 0
-        failed_count = 0
-
-        # Define the column mapping based on observation of row 852 and previous rows.
-        # ADJUST THESE INDICES CAREFULLY BASED ON YOUR EXACT CSV FILE STRUCTURE.
-        COLUMN_MAPPING = {
-            'name': 0,
-            # 1: Google Maps URL (ignored - if you need this, add a field)
-            'image': 2, # Main image URL string
-            # 3: Rating (ignored)
-            'location': 4, # e.g., "Not Available" or "Bellingham, WA"
-            'description': 5, # e.g., "Massage spa", "Nail salon" - Often short category text in this data
-            'address': 6, # Full street address
-            'opening_hours': 7, # String format like "Day,Hours,Day,Hours,..."
-            # 8, 9: Seem to be "Not Available" placeholders in the example data
-            'phone_number': 10,
-            'gallery_images_string': 11, # Comma-separated URLs string
-            # 12 onwards: Latitude, Longitude, other "Not Available" fields (ignored)
-        }
+        self.counts = {key: getattr(self.job, key) for key in ('imported', 'updated', 'skipped', 'failed')}
+        self.verbosity = options['verbosity']
+        self.started = time.perf_counter()
+        self.rows_this_run = 0
 
-        # Determine the minimum number of columns expected
-        MIN_COLUMNS = max(COLUMN_MAPPING.values()) + 1
+        # Duplicate check against an index loaded once, instead of two queries per row
+        self.existing = self.load_fingerprints() if not self.force_create else {}
+        self.seen = set() # Fingerprints of this run, repeated rows of the file are skipped
+        # Slugs are reserved per batch: one prefix query per batch instead of a loop per salon
+        self.slugs = SlugAllocator(Salon, 'sample_url')
 
         # --- Read and Process CSV ---
         try:
             # Use the specified encoding
-            with open(csv_file_path, mode='r', encoding=csv_encoding) as csvfile:
+            with open(csv_file_path, mode='r', encoding=csv_encoding, newline='') as csvfile:
                 reader = csv.reader(csvfile)
 
                 # Optional: Skip header row if your CSV has one. Uncomment the line below.
                 # next(reader)
 
-                for row_num, row in enumerate(reader, start=1):
-                    # Skip completely empty rows
-                    if not row or all(clean_csv_value(cell) is None for cell in row):
-                        self.stdout.write(self.style.WARNING(f'Skipping empty or all-null row {row_num}.'))
-                        skipped_count += 1 # Count as skipped for reporting
-                        continue
-
-                    # Check if the row has enough columns
-                    if len(row) < MIN_COLUMNS:
-                        self.stdout.write(self.style.ERROR(f'Skipping row {row_num}: Expected at least {MIN_COLUMNS} columns based on mapping, found {len(row)}. Data: {row}'))
-                        failed_count += 1
-                        continue
-
-                    # --- Extract, Clean, and Prepare Data ---
-                    # Use a nested try-except block here to catch errors during
-                    # data extraction or dictionary creation, which are the *first*
-                    # errors that would cause the transaction issue.
-                    try:
-                        name = clean_csv_value(row[COLUMN_MAPPING['name']])
-                        # Name is a required field in the model, skip row if missing
-                        if not name:
-                             self.stdout.write(self.style.WARNING(f'Skipping row {row_num}: Salon name is missing or "Not Available". Raw value: "{row[COLUMN_MAPPING["name"]]}"'))
-                             skipped_count += 1
-                             continue
-
-                        address = clean_csv_value(row[COLUMN_MAPPING['address']])
-                        location = clean_csv_value(row[COLUMN_MAPPING['location']])
-                        phone_number = clean_csv_value(row[COLUMN_MAPPING['phone_number']])
-                        main_image_url = clean_csv_value(row[COLUMN_MAPPING['image']])
-                        raw_opening_hours = clean_csv_value(row[COLUMN_MAPPING['opening_hours']])
-                        raw_gallery_images_string = clean_csv_value(row[COLUMN_MAPPING['gallery_images_string']])
-                        short_description = clean_csv_value(row[COLUMN_MAPPING['description']])
-
-
-                        # --- Check for Duplicates (Optional but Recommended) ---
-                        # This check needs to happen *before* creating the object
-                        # to avoid unnecessary saves/slug generation for duplicates.
-                        # Only check if we have enough data for a meaningful check and not forcing create.
-                        if not force_create and name and (address or location): # Require name AND address or location for check
-                             # Use filter().exists() outside the object's save method
-                             if Salon.objects.filter(name=name, address=address).exists() or Salon.objects.filter(name=name, location=location).exists():
-                                 self.stdout.write(self.style.WARNING(f'Skipping row {row_num}: Salon "{name}" at address "{address}" or location "{location}" likely already exists. Use --force-create to import anyway.'))
-                                 skipped_count += 1
-                                 continue
-                             # Note: This duplicate check is simple. More complex checks
-                             # might involve fuzzy matching or checking combinations of fields.
-
-
-                        # --- Prepare Salon Data Dictionary ---
-                        salon_data = {
-                            'name': name, # Name is guaranteed not to be None here
-                            'location': location,
-                            'address': address,
-                            'phone_number': phone_number,
-                            'image': main_image_url, # Main image URL string
-
-                            # Assuming CSV description column 5 is meant for the main description field
-                            'description': short_description,
-
-                            # Opening hours as a single text block
-                            'opening_hours': raw_opening_hours, # Assign the cleaned string directly
-
-                            # JSON Fields - parse specifically or set to defaults if not in CSV
-                            'gallery_images': parse_gallery_images(raw_gallery_images_string),
-
-                            # Fields assumed not to be in the mapped columns of the CSV,
-                            # set to None or their model defaults (which are often blank/null)
-                            'email': None,
-                            'services': [],
-                            'testimonials': [],
-                            'social_links': [],
-
-                            'logo_image': None,
-                            'cover_image': None,
-                            'about_image': None,
-                            'footer_logo_image': None,
-
-                            'hero_subtitle': None,
-                            'services_tagline': None,
-                            'gallery_tagline': None,
-                            'footer_about': None,
-
-                            'booking_url': None,
-                            'gallery_url': None,
-                            'services_url': None,
-                            'map_embed_url': None, # CSV Col 1 is Place URL, not embed URL
-
-                            # Claiming/Ownership Status - default to unclaimed on import
-                            'claimed': False,
-                            'claimed_at': None,
-                            'contact_status': 'notContacted',
-                            'owner': None,
-
-                            # Assign the default template if provided via argument
-                            'template': default_template,
-
-                            # sample_url will be automatically generated by the model's save method
-                        }
-
-                        # --- Create Salon Instance ---
-                        # This call will trigger the model's save method, including slug generation.
-                        # Because we are now *inside* a try-except block dedicated to this row,
-                        # if the save method (or anything before it) fails, the exception
-                        # will be caught here, logged, and the loop will continue to the next row.
-                        # The atomic transaction *will* be marked for rollback for this specific row's work,
-                        # but subsequent rows can still be processed in the same transaction
-                        # because the exception is handled *within* the loop.
-                        salon = Salon.objects.create(**salon_data)
-
-                        imported_count += 1
-                        self.stdout.write(self.style.SUCCESS(f'Successfully imported row {row_num}: "{salon.name}"'))
-
-                    except (IndexError, ValueError, TypeError) as e:
-                         # Catch specific data-related errors during extraction/parsing
-                         self.stdout.write(self.style.ERROR(f'Failed to process data for row {row_num}: {type(e).__name__}: {e} - Raw row data (first 12 columns): {row[:12]}...'))
-                         failed_count += 1
-                         continue # Move to the next row
-
-                    except Exception as e:
-                        # Catch any other unexpected errors during the creation process (e.g., database error)
-                        # The 'An error occurred in the current transaction' might still appear
-                        # if the *original* error isn't caught by the more specific exceptions above,
-                        # but logging the general exception here will still provide the cause.
-                        self.stdout.write(self.style.ERROR(f'Failed to import row {row_num} for salon "{name or "Unnamed"}": {type(e).__name__}: {e} - Raw row data (first 12 columns): {row[:12]}...'))
-                        failed_count += 1
-                        continue # Move to the next row
-
+                # Rows up to the checkpoint are already in the database
+                rows = islice(enumerate(reader, start=1), self.job.last_row, None)
+                chunks = iter(lambda: list(islice(rows, batch_size)), [])
+                for parsed in self.parse_chunks(chunks, workers):
+                    self.import_chunk(parsed)
+                    self.report_progress()
 
         except FileNotFoundError:
              raise CommandError(f'Error opening file "{csv_file_path}".')
-        except Exception as e:
-            # Catch errors during file reading itself or critical errors outside the row loop
+        except (csv.Error, UnicodeDecodeError) as e:
+            # Batches written so far are committed, the summary below says how far the import got
              self.stdout.write(self.style.ERROR(f'A critical error occurred during CSV processing: {type(e).__name__}: {e}'))
-             # This exception will propagate and cause the @transaction.atomic to rollback everything.
-
+             self.finish_job('failed')
+        except BaseException:
+            # Anything else (including Ctrl+C): the checkpoint stays at the last committed batch
+            self.finish_job('failed')
+            raise
+        else:
+            self.finish_job('completed')
+
+        self.report_summary()
+
+    # --- Jobs and checkpoints ---
+
+    def get_job(self, csv_file_path, resume):
+        file_hash = hash_file(csv_file_path)
+        if resume:
+            job = ImportJob.objects.filter(file_hash=file_hash).first()
+            if job is not None and job.status == 'completed':
+                self.stdout.write(self.style.SUCCESS(f'Nothing to resume: this file was fully imported ({job}).'))
+                return None
+            if job is not None:
+                self.stdout.write(self.style.SUCCESS(f'Resuming after row {job.last_row} ({job}).'))
+                job.status = 'running'
+                job.save(update_fields=['status', 'updated_at'])
+                return job
+            self.stdout.write(self.style.WARNING('No earlier import of this file found, starting from the first row.'))
+        return ImportJob.objects.create(source=csv_file_path, file_hash=file_hash)
+
+    def checkpoint(self, last_row):
+        # Saved in the batch's transaction: the checkpoint moves exactly when the batch commits
+        self.job.last_row = last_row
+        for key, value in self.counts.items():
+            setattr(self.job, key, value)
+        self.job.save()
+
+    def finish_job(self, status):
+        self.job.status = status
+        self.job.save(update_fields=['status', 'updated_at'])
+
+    # --- Parsing ---
+
+    def parse_chunks(self, chunks, workers):
+        """
+        Yields the parsed chunks in file order. With several workers the chunks are parsed in a
+        process pool, at most two per worker ahead of the writer so memory stays bounded.
+        """
+        if workers == 1:
+            yield from map(parse_chunk, chunks)
+            return
+
+        # Workers never touch the database. django.setup: workers started with spawn/forkserver import the models through this module
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(parse_chunk, chunk))
+                if len(pending) >= workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    # --- Duplicates ---
+
+    def load_fingerprints(self):
+        """
+        Maps the import_fingerprints() of every salon, including those created outside the importer,
+        to the salon's stored fingerprint (the upsert's conflict target). With --update-existing,
+        salons without a stored fingerprint get one, so the upsert finds them.
+        """
+        existing, stored_fingerprints, unstamped = {}, set(), []
+        salons = Salon.objects.order_by('pk').values_list('pk', 'name', 'address', 'location', 'import_fingerprint')
+        for pk, name, address, location, stored in salons.iterator(chunk_size=2000):
+            fingerprints = import_fingerprints(name, address, location)
+            if stored:
+                stored_fingerprints.add(stored)
+                for fingerprint in fingerprints:
+                    existing.setdefault(fingerprint, stored)
+            else:
+                unstamped.append((pk, fingerprints))
+
+        stamp = []
+        for pk, fingerprints in unstamped:
+            # A salon whose fingerprint another salon already holds is a duplicate of that one
+            own = fingerprints[0] if fingerprints[0] not in stored_fingerprints else None
+            if own is not None:
+                stored_fingerprints.add(own)
+                stamp.append(Salon(pk=pk, import_fingerprint=own))
+            for fingerprint in fingerprints:
+                existing.setdefault(fingerprint, own or fingerprints[0])
+        if self.update_existing and stamp:
+            with transaction.atomic():
+                Salon.objects.bulk_update(stamp, ['import_fingerprint'], batch_size=500)
+        return existing
+
+    def classify(self, salon_data):
+        """
+        Returns (action, fingerprint) with action 'create', 'update', 'repeat' or 'exists'. A row is
+        a duplicate when its name and address or its name and location match, like in
+        import_fingerprints(). The fingerprint is the one stored on the salon the row creates or updates.
+        """
+        fingerprints = import_fingerprints(salon_data['name'], salon_data['address'], salon_data['location'])
+        if any(fingerprint in self.seen for fingerprint in fingerprints):
+            return 'repeat', None
+        self.seen.update(fingerprints)
+        if self.force_create:
+            return 'create', None # Deliberate duplicates don't claim the fingerprint
+        matched = next((self.existing[fingerprint] for fingerprint in fingerprints if fingerprint in self.existing), None)
+        if matched is not None:
+            if matched in self.seen and matched not in fingerprints:
+                return 'repeat', None # Another row of the file already matched this salon
+            self.seen.add(matched)
+            return ('update' if self.update_existing else 'exists'), matched
+        for fingerprint in fingerprints:
+            self.existing[fingerprint] = fingerprints[0]
+        return 'create', fingerprints[0]
+
+    # --- Writing ---
+
+    def import_chunk(self, parsed):
+        salons = []
+        for row_num, status, result in parsed:
+            if status == 'ok':
+                action, fingerprint = self.classify(result)
+                if action == 'exists':
+                    status = 'skipped'
+                    result = (
+                        f'Skipping row {row_num}: Salon "{result["name"]}" at address "{result["address"]}" or location '
+                        f'"{result["location"]}" likely already exists. Use --update-existing to update it or --force-create to import anyway.'
+                    )
+                elif action == 'repeat':
+                    status = 'skipped'
+                    result = f'Skipping row {row_num}: Salon "{result["name"]}" appears earlier in this file.'
+            if status != 'ok':
+                style = self.style.WARNING if status == 'skipped' else self.style.ERROR
+                self.stdout.write(style(result))
+                self.counts[status] += 1
+                continue
+            salon = Salon(template=self.default_template, import_fingerprint=fingerprint, **result)
+            salons.append((row_num, action, salon))
+
+        with transaction.atomic():
+            if salons:
+                self.write_salons(salons)
+            self.checkpoint(parsed[-1][0])
+        self.rows_this_run += len(parsed)
+
+    def write_salons(self, salons):
+        base_slugs = {row_num: salon.get_base_slug() for row_num, _, salon in salons}
+        self.slugs.prefetch(base_slugs.values())
+        for row_num, _, salon in salons:
+            # Updated salons keep their slug, this one is only part of the INSERT that turns into the update
+            salon.sample_url = self.slugs.reserve(base_slugs[row_num])
+
+        upserts = [salon for _, action, salon in salons if action == 'update']
+        try:
+            with transaction.atomic():
+                created = Salon.objects.bulk_create([salon for _, action, salon in salons if action == 'create'])
+                record_created(Salon, created) # bulk_create sends no post_save for the Stats counters
+                if upserts:
+                    Salon.objects.bulk_create(
+                        upserts, update_conflicts=True, unique_fields=['import_fingerprint'], update_fields=UPSERT_FIELDS,
+                    )
+            self.counts['imported'] += len(salons) - len(upserts)
+            self.counts['updated'] += len(upserts)
+        except DatabaseError as e:
+            # Find the bad rows one by one so the rest of the batch still gets imported
+            self.stdout.write(self.style.WARNING(f'Batch insert failed ({type(e).__name__}: {e}), retrying its rows one by one.'))
+            for row_num, action, salon in salons:
+                self.save_single(row_num, action, salon, base_slugs[row_num])
+
+        if upserts:
+            # Bulk writes send no signals: drop the cached public sites of the updated salons
+            transaction.on_commit(lambda: invalidate_salon_sites(
+                Salon.objects.filter(import_fingerprint__in=[salon.import_fingerprint for salon in upserts]).values('pk')
+            ))
+
+    def save_single(self, row_num, action, salon, base_slug):
+        salon.pk = None # The failed batch may have assigned primary keys before rolling back
+        salon._state.adding = True
+        try:
+            with transaction.atomic():
+                if action == 'update':
+                    values = {field: getattr(salon, field) for field in UPSERT_FIELDS if field != 'updated_at'}
+                    existing = Salon.objects.get(import_fingerprint=salon.import_fingerprint)
+                    for field, value in values.items():
+                        setattr(existing, field, value)
+                    existing.save()
+                else:
+                    # Picks another slug if someone else took this one since it was reserved
+                    save_with_unique_slug(salon, 'sample_url', base_slug, salon.save)
+        except (DatabaseError, Salon.DoesNotExist) as e:
+            self.stdout.write(self.style.ERROR(
+                f'Failed to import row {row_num} for salon "{salon.name}": {type(e).__name__}: {e}'
+            ))
+            self.counts['failed'] += 1
+            return
+        self.counts['updated' if action == 'update' else 'imported'] += 1
+        if self.verbosity > 1:
+            self.stdout.write(self.style.SUCCESS(f'Successfully imported row {row_num}: "{salon.name}"'))
+
+    # --- Reporting ---
+
+    def report_progress(self):
+        processed = sum(self.counts.values())
+        elapsed = time.perf_counter() - self.started
+        self.stdout.write(
+            f'{processed} rows processed ({self.counts["imported"]} imported, {self.counts["updated"]} updated, '
+            f'{self.counts["skipped"]} skipped, {self.counts["failed"]} failed) - '
+            f'{self.rows_this_run / elapsed if elapsed else 0:.0f} rows/s'
+        )
 
+    def report_summary(self):
+        processed = sum(self.counts.values())
+        elapsed = time.perf_counter() - self.started
         # --- Final Report ---
         self.stdout.write(self.style.SUCCESS('\n--- CSV Import Summary ---'))
-        self.stdout.write(self.style.SUCCESS(f'Import process completed.'))
-        self.stdout.write(self.style.SUCCESS(f'Successfully imported: {imported_count}'))
-        self.stdout.write(self.style.WARNING(f'Skipped (missing name or duplicate check): {skipped_count}'))
-        self.stdout.write(self.style.ERROR(f'Failed to import (processing error): {failed_count}'))
-        self.stdout.write(self.style.SUCCESS(f'Total rows processed: {imported_count + skipped_count + failed_count}'))
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS(
+            f'Import process {self.job.status} in {elapsed:.1f}s '
+            f'({self.rows_this_run / elapsed if elapsed else 0:.0f} rows/s, checkpoint at row {self.job.last_row}).'
+        ))
+        self.stdout.write(self.style.SUCCESS(f'Successfully imported: {self.counts["imported"]}'))
+        self.stdout.write(self.style.SUCCESS(f'Updated existing salons: {self.counts["updated"]}'))
+        self.stdout.write(self.style.WARNING(f'Skipped (missing name or duplicate check): {self.counts["skipped"]}'))
+        self.stdout.write(self.style.ERROR(f'Failed to import (processing error): {self.counts["failed"]}'))
+        self.stdout.write(self.style.SUCCESS(f'Total rows processed: {processed}'))
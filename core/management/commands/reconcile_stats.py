@@ -0,0 +1,35 @@
+# core/management/commands/reconcile_stats.py
+
+from django.core.management.base import BaseCommand
+
+from core.models import Stats
+from core.stats import counter_querysets, refresh_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Folds the counter shards into the site statistics (core.Stats), recomputes them from the '
+        'salon and user tables and reports any drift. Schedule it (e.g. hourly cron) to repair '
+        'counters that writes outside the ORM signals missed.'
+    )
+
+    def handle(self, *args, **options):
+        fields = list(counter_querysets())
+        Stats.clear_cache()
+        before = Stats.load() if Stats.objects.filter(pk=1).exists() else None
+        refresh_stats()
+        after = Stats.objects.get(pk=1)
+
+        drifted = False
+        for field in fields:
+            old = getattr(before, field, None)
+            new = getattr(after, field)
+            if old != new:
+                drifted = True
+                self.stdout.write(self.style.WARNING(f'{field}: {old} -> {new}'))
+            elif options['verbosity'] > 1:
+                self.stdout.write(f'{field}: {new}')
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('Stats were up to date.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Stats reconciled.'))
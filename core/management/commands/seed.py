@@ -0,0 +1,363 @@
+# core/management/commands/seed.py
+
+import random
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router, transaction
+from django.utils import timezone
+from django.utils.text import slugify
+from faker import Faker
+
+from blog.models import BlogComment, BlogPost
+from blog.tags import index_posts
+from chatbot.models import BusinessKnowledge, ChatConversation, ChatMessage
+from core.slugs import SlugAllocator
+from core.stats import TRACKED_MODELS, record_created
+from salons.models import Salon, Template
+from tracking.models import Visit
+
+User = get_user_model()
+
+# Faker is slow per call, so every run draws this many values of each kind up front and
+# builds rows by combining them. Plenty of variety for load tests at a fraction of the cost.
+POOL_SIZE = 500
+
+DEFAULT_BATCH_SIZE = 2000
+
+TEMPLATE_STYLES = ["Elegant", "Modern", "Luxury", "Friendly", "Minimalist",
+                   "Artistic", "Vibrant", "Dark Mode", "Natural", "Classic"]
+FONT_FAMILIES = ["'Poppins', sans-serif", "'Georgia', serif", "'Roboto', sans-serif", "'Open Sans', sans-serif"]
+SALON_KINDS = ['Nails', 'Spa', 'Studio']
+KNOWLEDGE_CATEGORIES = ['General', 'Products', 'Services', 'Pricing', 'Support', 'Shipping', 'Returns', 'Account']
+STATIC_PATHS = ['/', '/pricing/', '/blog/', '/about/', '/contact/', '/login/', '/register/']
+
+SAMPLE_OPENING_HOURS = "Monday - Friday: 9:00 AM - 7:00 PM\nSaturday: 9:00 AM - 6:00 PM\nSunday: Closed"
+
+
+class Command(BaseCommand):
+    help = (
+        'Generates a (large) dataset for development and load testing: templates, users, salons, '
+        'blog posts and comments, visits, chat conversations and business knowledge. '
+        'Rows are written with bulk_create, unique keys are precomputed and the same --seed '
+        'always produces the same data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--templates', type=int, default=10, help='Templates to create (default: 10).')
+        parser.add_argument('--users', type=int, default=15, help='Users to create (default: 15).')
+        parser.add_argument('--salons', type=int, default=30, help='Salons to create (default: 30).')
+        parser.add_argument('--posts', type=int, default=25, help='Blog posts to create (default: 25).')
+        parser.add_argument('--comments-per-post', type=int, default=5, help='Average comments per post (default: 5).')
+        parser.add_argument('--visits', type=int, default=0, help='Website visits to create (default: 0).')
+        parser.add_argument('--visit-days', type=int, default=90, help='Visits are spread over this many past days (default: 90).')
+        parser.add_argument('--conversations', type=int, default=20, help='Chat conversations to create (default: 20).')
+        parser.add_argument('--messages-per-conversation', type=int, default=8, help='Average messages per conversation (default: 8).')
+        parser.add_argument('--knowledge', type=int, default=50, help='Business knowledge entries to create (default: 50).')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed gives the same data (default: 0).')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help=f'Rows per transaction (default: {DEFAULT_BATCH_SIZE}).')
+
+    def handle(self, *args, **options):
+        count_options = ('templates', 'users', 'salons', 'posts', 'comments_per_post', 'visits',
+                         'conversations', 'messages_per_conversation', 'knowledge')
+        if any(options[key] < 0 for key in count_options):
+            raise CommandError('Counts must not be negative.')
+        if options['batch_size'] < 1 or options['visit_days'] < 1:
+            raise CommandError('--batch-size and --visit-days must be at least 1.')
+
+        self.options = options
+        self.batch_size = options['batch_size']
+        self.random = random.Random(options['seed'])
+        self.fake = Faker()
+        self.fake.seed_instance(options['seed'])
+        self.now = timezone.now()
+        self.total_rows = 0
+
+        started = time.perf_counter()
+        self.stdout.write(self.style.SUCCESS(f'Seeding with seed {options["seed"]}...'))
+        self.build_pools()
+
+        self.seed_templates(options['templates'])
+        self.seed_users(options['users'])
+        self.seed_salons(options['salons'])
+        self.seed_posts(options['posts'], options['comments_per_post'])
+        self.seed_visits(options['visits'], options['visit_days'])
+        self.seed_conversations(options['conversations'], options['messages_per_conversation'])
+        self.seed_knowledge(options['knowledge'])
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'\nDatabase seeding completed: {self.total_rows} rows in {elapsed:.1f}s '
+            f'({self.total_rows / elapsed if elapsed else 0:.0f} rows/s).'
+        ))
+
+    # --- Helpers ---
+
+    def build_pools(self):
+        fake = self.fake
+        self.pools = {
+            'first_name': [fake.first_name()[:30] for _ in range(POOL_SIZE)],
+            'last_name': [fake.last_name()[:30] for _ in range(POOL_SIZE)],
+            'company': [fake.company()[:80] for _ in range(POOL_SIZE)],
+            'city': [f'{fake.city()[:50]}, {fake.state_abbr()}' for _ in range(POOL_SIZE)],
+            'street': [fake.street_address()[:200] for _ in range(POOL_SIZE)],
+            'phone': [fake.numerify('(###) ###-####') for _ in range(POOL_SIZE)],
+            'url': [fake.url()[:200] for _ in range(POOL_SIZE)],
+            'word': [fake.word() for _ in range(POOL_SIZE)],
+            'sentence': [fake.sentence(nb_words=10)[:200] for _ in range(POOL_SIZE)],
+            'paragraph': [fake.paragraph(nb_sentences=4) for _ in range(POOL_SIZE)],
+            'ip': [fake.ipv4() for _ in range(POOL_SIZE)],
+            'user_agent': [fake.user_agent() for _ in range(50)],
+            'color': [fake.hex_color() for _ in range(50)],
+        }
+        self.pools['session_key'] = ['%032x' % self.random.getrandbits(128) for _ in range(POOL_SIZE * 4)]
+
+    def pick(self, pool):
+        return self.random.choice(self.pools[pool])
+
+    def batches(self, count):
+        for start in range(0, count, self.batch_size):
+            yield start, min(self.batch_size, count - start)
+
+    def insert(self, model, objs):
+        with transaction.atomic():
+            created = model.objects.bulk_create(objs)
+            if model._meta.label in TRACKED_MODELS:
+                record_created(model, created) # bulk_create sends no post_save for the Stats counters
+        self.total_rows += len(created)
+        return created
+
+    def insert_rows(self, model, field_names, rows):
+        """
+        Plain executemany() INSERT for the narrow, high-volume tables (visits). Skipping model
+        instances and bulk_create's per-field compilation is several times faster. Rows hold
+        database-ready values in field_names order.
+        """
+        connection = connections[router.db_for_write(model)]
+        quote = connection.ops.quote_name
+        columns = ', '.join(quote(model._meta.get_field(name).column) for name in field_names)
+        sql = f'INSERT INTO {quote(model._meta.db_table)} ({columns}) VALUES ({", ".join(["%s"] * len(field_names))})'
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+        self.total_rows += len(rows)
+
+    def report(self, label, count, started):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'  {label}: {count} in {elapsed:.2f}s ({count / elapsed if elapsed else 0:.0f} rows/s)')
+
+    def ids(self, queryset, limit=10000):
+        # Foreign key targets for the generated rows (in a stable order, so runs are reproducible)
+        return list(queryset.order_by('pk').values_list('pk', flat=True)[:limit])
+
+    # --- Models ---
+
+    def seed_templates(self, count):
+        started = time.perf_counter()
+        slugs = SlugAllocator(Template, 'slug')
+        for start, size in self.batches(count):
+            templates = []
+            for n in range(start, start + size):
+                name = TEMPLATE_STYLES[n % len(TEMPLATE_STYLES)]
+                if n >= len(TEMPLATE_STYLES):
+                    name = f'{name} {n // len(TEMPLATE_STYLES) + 1}'
+                templates.append(Template(
+                    name=name,
+                    slug=slugs.reserve(slugify(name)),
+                    description=self.pick('sentence'),
+                    primary_color=self.pick('color'),
+                    secondary_color=self.pick('color'),
+                    background_color=self.pick('color'),
+                    text_color=self.pick('color'),
+                    font_family=self.random.choice(FONT_FAMILIES),
+                    features={
+                        'show_gallery': self.random.random() < 0.8,
+                        'show_testimonials': self.random.random() < 0.7,
+                        'show_social_icons': self.random.random() < 0.9,
+                        'show_map_or_form': self.random.random() < 0.85,
+                    },
+                ))
+            self.insert(Template, templates)
+        self.report('Templates', count, started)
+
+    def seed_users(self, count):
+        started = time.perf_counter()
+        # Usernames continue after the ones earlier runs with this seed created: one query, no exists() loop
+        prefix = f'seed{self.options["seed"]}_'
+        offset = User.objects.filter(username__startswith=prefix).count()
+        password = make_password('password') # Hashing once instead of per user saves seconds per thousand users
+        for start, size in self.batches(count):
+            users = []
+            for n in range(offset + start, offset + start + size):
+                users.append(User(
+                    username=f'{prefix}{n}',
+                    email=f'{prefix}{n}@example.com',
+                    first_name=self.pick('first_name'),
+                    last_name=self.pick('last_name'),
+                    phone_number=self.pick('phone'),
+                    password=password,
+                    role='user',
+                ))
+            self.insert(User, users)
+        self.report('Users (pw: password)', count, started)
+
+    def seed_salons(self, count):
+        started = time.perf_counter()
+        template_ids = self.ids(Template.objects.all()) or [None]
+        slugs = SlugAllocator(Salon, 'sample_url')
+        services = [
+            [{'name': self.pick('word').title(), 'price': f'${self.random.randint(20, 150)}', 'description': self.pick('sentence')}
+             for _ in range(self.random.randint(3, 10))]
+            for _ in range(50)
+        ]
+        for start, size in self.batches(count):
+            salons = []
+            for _ in range(size):
+                claimed = self.random.random() < 0.4
+                salon = Salon(
+                    name=f'{self.pick("company")} {self.random.choice(SALON_KINDS)}',
+                    location=self.pick('city'),
+                    address=self.pick('street'),
+                    phone_number=self.pick('phone'),
+                    description=self.pick('paragraph'),
+                    hero_subtitle=self.pick('sentence'),
+                    services_tagline=self.pick('sentence'),
+                    gallery_tagline=self.pick('sentence'),
+                    footer_about=self.pick('paragraph'),
+                    booking_url=self.pick('url') if self.random.random() < 0.7 else None,
+                    opening_hours=SAMPLE_OPENING_HOURS,
+                    services=self.random.choice(services),
+                    gallery_images=[f'https://picsum.photos/seed/{self.pick("word")}/600/400' for _ in range(4)],
+                    template_id=self.random.choice(template_ids),
+                    claimed=claimed,
+                    claimed_at=self.now - timedelta(days=self.random.randint(1, 365)) if claimed else None,
+                    contact_status='subscribed' if claimed else self.random.choice(['notContacted', 'contacted', 'interested', 'notInterested']),
+                )
+                salons.append(salon)
+            # One prefix query per batch reserves every slug (see core/slugs.py)
+            base_slugs = [salon.get_base_slug() for salon in salons]
+            slugs.prefetch(base_slugs)
+            for salon, base_slug in zip(salons, base_slugs):
+                salon.sample_url = slugs.reserve(base_slug)
+            self.insert(Salon, salons)
+        self.report('Salons', count, started)
+
+    def seed_posts(self, count, comments_per_post):
+        started = time.perf_counter()
+        user_ids = self.ids(User.objects.all()) or [None]
+        slugs = SlugAllocator(BlogPost, 'slug')
+        categories = [value for value, _ in BlogPost.CATEGORY_CHOICES]
+        comment_count = 0
+        for start, size in self.batches(count):
+            posts = []
+            for _ in range(size):
+                title = self.pick('sentence').rstrip('.')
+                published = self.random.random() < 0.8
+                posts.append(BlogPost(
+                    title=title,
+                    slug=slugs.reserve(slugify(title) or 'post'),
+                    content='\n\n'.join(self.pick('paragraph') for _ in range(3)),
+                    excerpt=self.pick('sentence'),
+                    author_id=self.random.choice(user_ids),
+                    category=self.random.choice(categories),
+                    tags=self.random.sample(self.pools['word'][:30], self.random.randint(0, 4)),
+                    published=published,
+                    featured=self.random.random() < 0.1,
+                    published_at=self.now - timedelta(days=self.random.randint(0, 365)) if published else None,
+                ))
+            posts = self.insert(BlogPost, posts)
+            if posts and posts[0].pk is None: # Backends that can't return primary keys from bulk inserts
+                pks = dict(BlogPost.objects.filter(slug__in=[post.slug for post in posts]).values_list('slug', 'pk'))
+                for post in posts:
+                    post.pk = pks[post.slug]
+            index_posts(posts) # bulk_create sends no post_save
+
+            comments = []
+            for post in posts:
+                for _ in range(self.random.randint(0, comments_per_post * 2)):
+                    comments.append(BlogComment(
+                        post_id=post.pk,
+                        name=f'{self.pick("first_name")} {self.pick("last_name")}',
+                        content=self.pick('sentence'),
+                        approved=self.random.random() < 0.8,
+                    ))
+            comment_count += len(self.insert(BlogComment, comments))
+        self.report('Blog posts', count, started)
+        self.stdout.write(f'  Blog comments: {comment_count}')
+
+    def seed_visits(self, count, days):
+        if not count:
+            return
+        started = time.perf_counter()
+        salon_paths = [f'/salons/{slug}/' for slug in Salon.objects.order_by('pk').values_list('sample_url', flat=True)[:1000]]
+        paths = STATIC_PATHS + salon_paths
+        user_ids = self.ids(User.objects.all(), limit=1000)
+        span = days * 24 * 60 * 60
+        adapt_datetime = connections[router.db_for_write(Visit)].ops.adapt_datetimefield_value
+        for start, size in self.batches(count):
+            visits = []
+            for _ in range(size):
+                # A quarter of the traffic from logged in users, the rest anonymous
+                user_id = self.random.choice(user_ids) if user_ids and self.random.random() < 0.25 else None
+                timestamp = self.now - timedelta(seconds=self.random.randrange(span))
+                visits.append((
+                    self.random.choice(paths), adapt_datetime(timestamp), self.pick('ip'),
+                    user_id, self.pick('session_key'), 1.0,
+                ))
+            self.insert_rows(Visit, ['path', 'timestamp', 'ip_address', 'user', 'session_key', 'sample_weight'], visits)
+        self.report('Visits', count, started)
+
+    def seed_conversations(self, count, messages_per_conversation):
+        started = time.perf_counter()
+        user_ids = self.ids(User.objects.all(), limit=1000)
+        message_count = 0
+        for start, size in self.batches(count):
+            conversations = []
+            for _ in range(size):
+                conversations.append(ChatConversation(
+                    user_id=self.random.choice(user_ids) if user_ids and self.random.random() < 0.7 else None,
+                    session_id=str(uuid.UUID(int=self.random.getrandbits(128), version=4)),
+                    ip_address=self.pick('ip') if self.random.random() < 0.8 else None,
+                    user_agent=self.pick('user_agent') if self.random.random() < 0.8 else None,
+                ))
+            conversations = self.insert(ChatConversation, conversations)
+            if conversations and conversations[0].pk is None:
+                pks = dict(ChatConversation.objects.filter(
+                    session_id__in=[conversation.session_id for conversation in conversations]
+                ).values_list('session_id', 'pk'))
+                for conversation in conversations:
+                    conversation.pk = pks[conversation.session_id]
+
+            messages = []
+            for conversation in conversations:
+                length = self.random.randint(1, max(1, messages_per_conversation * 2 - 1)) if messages_per_conversation else 0
+                for n in range(length):
+                    is_from_user = n % 2 == 0 # Conversations alternate, starting with the user
+                    content = self.pick('sentence') if is_from_user else self.pick('paragraph')
+                    messages.append(ChatMessage(
+                        conversation_id=conversation.pk,
+                        content=content,
+                        is_from_user=is_from_user,
+                        metadata={'length': len(content), 'source': 'user' if is_from_user else 'bot'},
+                    ))
+            message_count += len(self.insert(ChatMessage, messages))
+        self.report('Chat conversations', count, started)
+        self.stdout.write(f'  Chat messages: {message_count}')
+
+    def seed_knowledge(self, count):
+        started = time.perf_counter()
+        for start, size in self.batches(count):
+            entries = []
+            for _ in range(size):
+                entries.append(BusinessKnowledge(
+                    category=self.random.choice(KNOWLEDGE_CATEGORIES),
+                    question=self.pick('sentence').rstrip('.') + '?',
+                    answer=self.pick('paragraph'),
+                    metadata={'tags': self.random.sample(self.pools['word'][:30], self.random.randint(1, 3))},
+                    is_active=self.random.random() < 0.9,
+                ))
+            self.insert(BusinessKnowledge, entries)
+        self.report('Business knowledge', count, started)
@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-17 05:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_importjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatsShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField(unique=True)),
+                ('total_salons', models.IntegerField(default=0)),
+                ('sample_sites', models.IntegerField(default=0)),
+                ('active_subscriptions', models.IntegerField(default=0)),
+                ('pending_contacts', models.IntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -1,6 +1,18 @@
 # core/models.py
+import copy
+import time
+
+from django.conf import settings
 from django.db import models
-from django.core.cache import cache # Optional: for caching stats
+from django.core.cache import caches
+
+STATS_CACHE_KEY = 'site_stats'
+
+# This process' copy of the Stats row: (instance, expires at)
+_local_stats = [None, 0.0]
+
+# The counters of Stats, each also kept as a delta on the StatsShard rows
+STATS_COUNTERS = ('total_salons', 'sample_sites', 'active_subscriptions', 'pending_contacts')
 
 class Stats(models.Model):
     """Singleton model to store site-wide statistics."""
@@ -18,11 +30,18 @@ class Stats(models.Model):
         verbose_name_plural = "Stats" # Correct pluralization in admin
 
     def save(self, *args, **kwargs):
-        """Enforce singleton pattern (only one row with pk=1)."""
+        """
+        Enforce singleton pattern (only one row with pk=1).
+        Saving an existing row (e.g. a correction in the admin) sets the totals: the pending
+        shard deltas are dropped.
+        """
         self.pk = 1 # Always save to the same primary key
+        adding = self._state.adding
         super(Stats, self).save(*args, **kwargs)
-        # Optional: Clear cache after saving to ensure fresh data is loaded
-        # cache.delete('site_stats')
+        if not adding:
+            StatsShard.objects.update(**{field: 0 for field in STATS_COUNTERS})
+        # Clear cache after saving to ensure fresh data is loaded
+        self.clear_cache()
 
     def delete(self, *args, **kwargs):
         """Prevent deletion of the singleton instance."""
@@ -30,25 +49,81 @@ class Stats(models.Model):
 
     @classmethod
     def load(cls):
-        """Convenience method to load the singleton instance, creating if necessary."""
-        # Optional: Caching to reduce DB queries
-        # cached_stats = cache.get('site_stats')
-        # if cached_stats:
-        #     return cached_stats
+        """
+        Convenience method to load the singleton instance, creating if necessary.
+        The counters include the deltas waiting on the StatsShard rows.
+        Cached in this process for STATS_LOCAL_CACHE_TTL seconds and in the shared cache for
+        STATS_CACHE_TTL; every change to the counters clears both (see core/stats.py).
+        """
+        instance, expires_at = _local_stats
+        if instance is not None and expires_at > time.monotonic():
+            return copy.copy(instance)
 
-        obj, created = cls.objects.get_or_create(pk=1)
+        cache = caches[getattr(settings, 'STATS_CACHE_ALIAS', 'default')]
+        instance = cache.get(STATS_CACHE_KEY)
+        if instance is None:
+            instance, created = cls.objects.get_or_create(pk=1)
+            if created:
+                # Start from the real numbers rather than zeros
+                from .stats import refresh_stats # Local import to avoid circular deps
+                refresh_stats()
+                instance.refresh_from_db()
+            totals = StatsShard.objects.aggregate(**{field: models.Sum(field) for field in STATS_COUNTERS})
+            for field, delta in totals.items():
+                setattr(instance, field, max(getattr(instance, field) + (delta or 0), 0))
+            cache.set(STATS_CACHE_KEY, instance, getattr(settings, 'STATS_CACHE_TTL', 60 * 5))
 
-        # Optional: Cache the object
-        # cache.set('site_stats', obj, timeout=3600) # Cache for 1 hour
+        _local_stats[:] = [instance, time.monotonic() + getattr(settings, 'STATS_LOCAL_CACHE_TTL', 5)]
+        return copy.copy(instance)
 
-        return obj
+    @classmethod
+    def clear_cache(cls):
+        # Other processes keep their local copy until it expires (STATS_LOCAL_CACHE_TTL)
+        _local_stats[:] = [None, 0.0]
+        caches[getattr(settings, 'STATS_CACHE_ALIAS', 'default')].delete(STATS_CACHE_KEY)
 
     def __str__(self):
         return f"Site Stats (Updated: {self.last_updated.strftime('%Y-%m-%d %H:%M')})"
 
-# You could add methods here to recalculate stats if needed, e.g.:
-# def recalculate_pending_contacts(self):
-#     from salons.models import Salon # Local import to avoid circular deps
-#     count = Salon.objects.filter(contact_status='notContacted').count()
-#     self.pending_contacts = count
-#     self.save(update_fields=['pending_contacts', 'last_updated'])
\ No newline at end of file
+class StatsShard(models.Model):
+    """
+    Counter deltas not yet folded into the Stats row. Writers add to one of STATS_SHARDS rows
+    picked at random instead of all updating (and locking) the single Stats row; Stats.load()
+    adds them up and refresh_stats() folds them back in (see core/stats.py).
+    """
+    shard = models.PositiveSmallIntegerField(unique=True)
+    total_salons = models.IntegerField(default=0)
+    sample_sites = models.IntegerField(default=0)
+    active_subscriptions = models.IntegerField(default=0)
+    pending_contacts = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"Stats shard {self.shard}"
+
+class ImportJob(models.Model):
+    """One run of the salon CSV import (`manage.py import`), checkpointed so --resume can pick it up."""
+    STATUS_CHOICES = (
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    )
+
+    source = models.CharField(max_length=255, help_text="Path of the imported file")
+    file_hash = models.CharField(max_length=64, db_index=True, help_text="SHA-256 of the file contents")
+    last_row = models.PositiveIntegerField(default=0, help_text="Last CSV row committed to the database")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running')
+
+    # Totals over every run of the job
+    imported = models.PositiveIntegerField(default=0)
+    updated = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Import of {self.source} ({self.status}, row {self.last_row})"
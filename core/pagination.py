@@ -0,0 +1,150 @@
+# core/pagination.py
+import json
+
+from django.db import connections
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+# Largest number of rows counted for ?count=estimate on databases without a planner estimate
+COUNT_ESTIMATE_CAP = 1000
+
+COUNT_MODES = {
+    'exact': 'exact', 'true': 'exact', '1': 'exact', 'yes': 'exact',
+    'none': 'none', 'false': 'none', '0': 'none', 'no': 'none',
+    'estimate': 'estimate', 'approx': 'estimate',
+}
+
+
+class FlexiblePagination(LimitOffsetPagination):
+    """
+    Default pagination for list endpoints. Plain ?limit=&offset= works as before, plus two opt-ins:
+
+      ?pagination=cursor (then follow the returned ?cursor= links)
+          Keyset pagination on the view's `cursor_ordering`, e.g. ('-created_at', '-id').
+          Every page is a single indexed range query with no COUNT(*), however deep it is.
+          Views without `cursor_ordering` stay on limit/offset.
+
+      ?count=none | estimate
+          Limit/offset without the COUNT(*) over the filtered set. `next` is found by fetching
+          one extra row. `estimate` adds a cheap count, with count_mode saying what it is:
+            estimate   the query planner's row estimate (PostgreSQL)
+            exact      elsewhere, a count stopped at COUNT_ESTIMATE_CAP rows that stayed below it
+            at_least   the same count when it reached the cap: there are at least that many rows
+          count_estimated is true for planner estimates only.
+    """
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        self.count_mode = 'exact'
+
+        if self.wants_cursor(request, view):
+            self.cursor_paginator = self.get_cursor_paginator(view)
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+
+        self.count_mode = COUNT_MODES.get(request.query_params.get(self.count_query_param, 'exact').lower(), 'exact')
+        if self.count_mode == 'exact':
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.offset = self.get_offset(request)
+        self.display_page_controls = False # Page numbers need the exact count
+
+        rows = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(rows) > self.limit
+        self.count, self.count_kind = self.estimate_count(queryset) if self.count_mode == 'estimate' else (None, None)
+        return rows[:self.limit]
+
+    # --- Cursor mode ---
+
+    def wants_cursor(self, request, view):
+        if not getattr(view, 'cursor_ordering', None):
+            return False
+        return (
+            self.cursor_query_param in request.query_params
+            or request.query_params.get(self.mode_query_param, '').lower() == 'cursor'
+        )
+
+    def get_cursor_paginator(self, view):
+        paginator = CursorPagination()
+        paginator.ordering = view.cursor_ordering
+        paginator.page_size = self.default_limit
+        paginator.page_size_query_param = self.limit_query_param
+        paginator.max_page_size = self.max_limit
+        return paginator
+
+    # --- Counts ---
+
+    def estimate_count(self, queryset):
+        """Returns (count, count_mode): the planner's 'estimate', or an 'exact'/'at_least' capped count."""
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql':
+            sql, params = queryset.order_by().query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+                plan = cursor.fetchone()[0]
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            return int(plan[0]['Plan']['Plan Rows']), 'estimate'
+        # Counting a sliced queryset stops after COUNT_ESTIMATE_CAP rows
+        count = queryset.order_by()[:COUNT_ESTIMATE_CAP].count()
+        return count, 'at_least' if count >= COUNT_ESTIMATE_CAP else 'exact'
+
+    # --- Responses ---
+
+    def get_next_link(self):
+        if self.count_mode == 'exact':
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(url, self.offset_query_param, self.offset + self.limit)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        if self.count_mode == 'exact':
+            return super().get_paginated_response(data)
+
+        body = {}
+        if self.count is not None:
+            body['count'] = self.count
+            body['count_mode'] = self.count_kind
+            body['count_estimated'] = self.count_kind == 'estimate'
+        body.update(next=self.get_next_link(), previous=self.get_previous_link(), results=data)
+        return Response(body)
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema['properties']['count_mode'] = {'type': 'string', 'enum': ['estimate', 'exact', 'at_least'], 'example': 'at_least'}
+        schema['properties']['count_estimated'] = {'type': 'boolean', 'example': False}
+        schema['required'] = ['results']
+        return schema
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.append({
+            'name': self.count_query_param, 'required': False, 'in': 'query',
+            'description': 'Total count: exact (default), none, or estimate.',
+            'schema': {'type': 'string', 'enum': ['exact', 'none', 'estimate']},
+        })
+        if getattr(view, 'cursor_ordering', None):
+            parameters += [
+                {
+                    'name': self.mode_query_param, 'required': False, 'in': 'query',
+                    'description': 'Set to "cursor" for keyset pagination (no count, constant cost for deep pages).',
+                    'schema': {'type': 'string', 'enum': ['cursor']},
+                },
+                {
+                    'name': self.cursor_query_param, 'required': False, 'in': 'query',
+                    'description': 'Pagination cursor value taken from the next/previous links.',
+                    'schema': {'type': 'string'},
+                },
+            ]
+        return parameters
@@ -0,0 +1,126 @@
+# core/slugs.py
+"""
+Unique slug allocation for models with an auto-generated slug field (Salon.sample_url, BlogPost.slug).
+
+Instead of probing "slug", "slug-1", "slug-2"... with one query each, every slug sharing the
+base is fetched with a single prefix query and the next free suffix is picked in memory.
+SlugAllocator keeps that state across calls, so importers can reserve slugs for many rows
+with one query per batch of base slugs.
+"""
+import re
+
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Q
+
+# Bases per prefix query in SlugAllocator.prefetch (keeps the OR'ed WHERE clause reasonable)
+PREFETCH_CHUNK_SIZE = 200
+
+# Retries of save_with_unique_slug when a concurrent insert took the slug first
+SAVE_ATTEMPTS = 5
+
+
+class SlugAllocator:
+    """
+    Hands out unique values for `field` of `model`, e.g.:
+
+        allocator = SlugAllocator(Salon, 'sample_url')
+        allocator.prefetch(base_slugs)          # one query per PREFETCH_CHUNK_SIZE bases
+        salon.sample_url = allocator.reserve(base_slug)
+
+    Reserved slugs count as taken for later reserve() calls on the same allocator, so a batch
+    never hands out the same slug twice. Another process can still take a slug between reserve()
+    and the INSERT; save_with_unique_slug (or catching IntegrityError) covers that.
+    """
+
+    def __init__(self, model, field='slug', exclude_pk=None):
+        self.model = model
+        self.field = field
+        self.max_length = model._meta.get_field(field).max_length
+        self.exclude_pk = exclude_pk # The row being saved keeps its own slug available
+        self._next_suffix = {} # base -> next suffix to try, or 0 when the bare base is free
+        self._taken = set()
+
+    def _prefix_query(self, bases):
+        manager = self.model._default_manager
+        # SQLite's LIKE can't use the unique index (a full scan per query), a range can:
+        # with its binary collation 'base-' <= slug < 'base.' is exactly "starts with base-"
+        use_range = connections[manager.db].vendor == 'sqlite'
+        condition = Q()
+        for base in bases:
+            if use_range:
+                prefixed = Q(**{f'{self.field}__gte': f'{base}-', f'{self.field}__lt': f'{base}.'})
+            else:
+                prefixed = Q(**{f'{self.field}__startswith': f'{base}-'})
+            condition |= Q(**{self.field: base}) | prefixed
+        queryset = manager.filter(condition)
+        if self.exclude_pk is not None:
+            queryset = queryset.exclude(pk=self.exclude_pk)
+        return queryset.values_list(self.field, flat=True)
+
+    def prefetch(self, bases):
+        """Loads the existing slugs for every base not seen yet."""
+        bases = [base for base in dict.fromkeys(map(self.truncate, bases)) if base not in self._next_suffix]
+        for start in range(0, len(bases), PREFETCH_CHUNK_SIZE):
+            chunk = bases[start:start + PREFETCH_CHUNK_SIZE]
+            existing = set(self._prefix_query(chunk))
+            self._taken |= existing
+            for base in chunk:
+                self._next_suffix[base] = self._first_suffix(base, existing)
+
+    def _first_suffix(self, base, existing):
+        if base not in existing:
+            return 0
+        # One past the highest numeric suffix in use, e.g. "nail-spa-7" -> 8
+        pattern = re.compile(rf'^{re.escape(base)}-(\d+)$')
+        suffixes = [int(match.group(1)) for match in map(pattern.match, existing) if match]
+        return max(suffixes, default=0) + 1
+
+    def truncate(self, base):
+        return base[:self.max_length].strip('-') if self.max_length else base
+
+    def with_suffix(self, base, suffix):
+        if not suffix:
+            return base
+        ending = f'-{suffix}'
+        if self.max_length and len(base) + len(ending) > self.max_length:
+            base = base[:self.max_length - len(ending)].rstrip('-')
+        return f'{base}{ending}'
+
+    def reserve(self, base):
+        """Returns a free slug for the base and marks it as taken."""
+        base = self.truncate(base)
+        if base not in self._next_suffix:
+            self.prefetch([base])
+        suffix = self._next_suffix[base]
+        slug = self.with_suffix(base, suffix)
+        # Only a truncated base (or a slug reserved from another base) can already be taken here
+        while slug in self._taken:
+            suffix += 1
+            slug = self.with_suffix(base, suffix)
+        self._taken.add(slug)
+        self._next_suffix[base] = suffix + 1
+        return slug
+
+
+def allocate_unique_slug(model, field, base, exclude_pk=None):
+    """Returns a free slug for a single row (one query)."""
+    return SlugAllocator(model, field, exclude_pk=exclude_pk).reserve(base)
+
+
+def save_with_unique_slug(instance, field, base, save, *args, **kwargs):
+    """
+    Calls save(*args, **kwargs) for an instance whose slug was just allocated from `base`.
+    If a concurrent insert took the same slug in the meantime, the unique constraint fails:
+    a new slug is allocated and the save retried (a few times at most).
+    """
+    model = type(instance)
+    for attempt in range(SAVE_ATTEMPTS):
+        try:
+            with transaction.atomic(): # Savepoint, so a failed INSERT doesn't break an outer transaction
+                return save(*args, **kwargs)
+        except IntegrityError:
+            slug = getattr(instance, field)
+            collided = model._default_manager.filter(**{field: slug}).exclude(pk=instance.pk).exists()
+            if not collided or attempt == SAVE_ATTEMPTS - 1:
+                raise # Some other constraint failed, or we kept losing the race
+            setattr(instance, field, allocate_unique_slug(model, field, base, exclude_pk=instance.pk))
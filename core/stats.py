@@ -0,0 +1,169 @@
+# core/stats.py
+"""
+Keeps the counters of the core.Stats singleton in line with the tables they summarize.
+
+- save()/delete() of a tracked model (Salon, User) adjust the counters by the difference between
+  the row's old and new state (signal receivers below, connected in CoreConfig.ready).
+- Bulk writes send no signals: bulk_create callers report their rows with record_created(),
+  queryset.update() callers adjust_stats() by the delta they know.
+- Adjustments don't touch the Stats row itself: each one adds to a StatsShard row picked at
+  random out of STATS_SHARDS, so concurrent writers rarely wait on the same row lock.
+  Stats.load() returns the Stats row plus the sum of the shards.
+- refresh_stats() folds the shards into the Stats row and recomputes the counters from the
+  tables. The reconcile_stats command runs it, meant to be scheduled (e.g. hourly) to repair
+  any drift and keep the shards small.
+Every change clears the Stats.load() caches once the transaction commits.
+"""
+import random
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
+
+from .models import STATS_COUNTERS, Stats, StatsShard
+
+
+def _salon_counters(salon):
+    return {
+        'total_salons': 1,
+        'sample_sites': int(not salon.claimed),
+        'pending_contacts': int(salon.contact_status == 'notContacted'),
+    }
+
+
+def _user_counters(user):
+    return {'active_subscriptions': int(bool(user.stripe_subscription_id))}
+
+
+# Model label -> (fields the counters depend on, counters of one row)
+TRACKED_MODELS = {
+    'salons.Salon': (('claimed', 'contact_status'), _salon_counters),
+    settings.AUTH_USER_MODEL: (('stripe_subscription_id',), _user_counters),
+}
+
+
+def counter_querysets():
+    """The rows each counter counts."""
+    from salons.models import Salon # Local import to avoid circular deps
+    users = get_user_model().objects.exclude(stripe_subscription_id__isnull=True).exclude(stripe_subscription_id='')
+    return {
+        'total_salons': Salon.objects.all(),
+        'sample_sites': Salon.objects.filter(claimed=False),
+        'pending_contacts': Salon.objects.filter(contact_status='notContacted'),
+        'active_subscriptions': users,
+    }
+
+
+def _count(queryset):
+    # Scalar subquery: SELECT COUNT(*) FROM ... WHERE ... (the constant group adds no GROUP BY)
+    counted = queryset.order_by().annotate(_group=Value(1)).values('_group').annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counted), 0)
+
+
+def fold_shards():
+    """Moves the deltas waiting on the shards into the Stats row."""
+    with transaction.atomic():
+        Stats.objects.get_or_create(pk=1)
+        shards = list(StatsShard.objects.select_for_update().values('pk', *STATS_COUNTERS))
+        totals = {field: sum(shard[field] for shard in shards) for field in STATS_COUNTERS}
+        totals = {field: total for field, total in totals.items() if total}
+        if not totals:
+            return
+        Stats.objects.filter(pk=1).update(
+            last_updated=timezone.now(),
+            **{field: Greatest(F(field) + total, Value(0)) for field, total in totals.items()},
+        )
+        # Subtract what was read rather than reset, so an adjustment landing in between is kept
+        for shard in shards:
+            StatsShard.objects.filter(pk=shard['pk']).update(
+                **{field: F(field) - shard[field] for field in totals if shard[field]}
+            )
+        transaction.on_commit(Stats.clear_cache)
+
+
+def refresh_stats(*fields):
+    """Folds the shards in, then recomputes the given counters (all by default) from the tables in one UPDATE statement."""
+    querysets = counter_querysets()
+    fields = fields or tuple(querysets)
+    with transaction.atomic():
+        fold_shards()
+        Stats.objects.filter(pk=1).update(last_updated=timezone.now(), **{field: _count(querysets[field]) for field in fields})
+    transaction.on_commit(Stats.clear_cache)
+
+
+def get_shard_count():
+    return max(getattr(settings, 'STATS_SHARDS', 8), 1)
+
+
+def adjust_stats(**deltas):
+    """Adds the deltas to the counters, e.g. adjust_stats(pending_contacts=-3)."""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    shard = random.randrange(get_shard_count())
+    values = {field: F(field) + delta for field, delta in deltas.items()}
+    if not StatsShard.objects.filter(shard=shard).update(**values):
+        try:
+            with transaction.atomic(): # Savepoint, so losing the race doesn't break an outer transaction
+                StatsShard.objects.create(shard=shard, **deltas)
+        except IntegrityError: # Another writer created the shard first
+            StatsShard.objects.filter(shard=shard).update(**values)
+    transaction.on_commit(Stats.clear_cache)
+
+
+def _difference(new, old):
+    return {field: new.get(field, 0) - old.get(field, 0) for field in set(new) | set(old)}
+
+
+def record_created(model, objs):
+    """Counts rows inserted with bulk_create (which sends no post_save)."""
+    _, counters = TRACKED_MODELS[model._meta.label]
+    totals = {}
+    for obj in objs:
+        for field, value in counters(obj).items():
+            totals[field] = totals.get(field, 0) + value
+    adjust_stats(**totals)
+
+
+# --- Signal receivers (connected in CoreConfig.ready) ---
+
+def remember_counters(sender, instance, raw=False, update_fields=None, **kwargs):
+    """pre_save: the counters of the row as it is in the database, before this save."""
+    fields, counters = TRACKED_MODELS[sender._meta.label]
+    instance._stats_before = None # Unchanged
+    if raw:
+        return # Fixture loading: reconcile afterwards
+    if update_fields is not None and not set(fields) & set(update_fields):
+        return
+    if instance._state.adding or instance.pk is None:
+        instance._stats_before = {}
+        return
+    row = sender._default_manager.filter(pk=instance.pk).values(*fields).first()
+    instance._stats_before = counters(SimpleNamespace(**row)) if row else {}
+
+
+def count_saved(sender, instance, raw=False, **kwargs):
+    before = getattr(instance, '_stats_before', None)
+    if raw or before is None:
+        return
+    _, counters = TRACKED_MODELS[sender._meta.label]
+    adjust_stats(**_difference(counters(instance), before))
+
+
+def count_deleted(sender, instance, **kwargs):
+    _, counters = TRACKED_MODELS[sender._meta.label]
+    adjust_stats(**_difference({}, counters(instance)))
+
+
+def connect_signals():
+    from django.apps import apps
+    for label in TRACKED_MODELS:
+        model = apps.get_model(label)
+        pre_save.connect(remember_counters, sender=model, dispatch_uid=f'core_stats_pre_save_{label}')
+        post_save.connect(count_saved, sender=model, dispatch_uid=f'core_stats_post_save_{label}')
+        post_delete.connect(count_deleted, sender=model, dispatch_uid=f'core_stats_post_delete_{label}')
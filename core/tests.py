@@ -1,3 +1,266 @@
-from django.test import TestCase
+import csv
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from blog.models import BlogPost
+from chatbot.models import ChatMessage
+from salons.models import Salon
+from tracking.models import Visit
+
+from .background import PeriodicWriter, ProcessWriter
+from .http import get_client_ip
+from .models import ImportJob, Stats, StatsShard
+from .stats import adjust_stats, fold_shards
+
+
+def salon_row(name, location, address, description=''):
+    row = [''] * 12
+    row[0], row[4], row[5], row[6] = name, location, description, address
+    row[11] = 'https://a.test/1.jpg, https://a.test/2.jpg,'
+    return row
+
+
+class ImportSalonsCsvTests(TestCase):
+    def setUp(self):
+        Salon.objects.create(name='Glamour Nails', location='Austin, TX', address='1 Main St')
+        self.path = self.write_csv([
+            salon_row('Glamour Nails', 'Austin, TX', '1 main st.'), # Already in the database
+            salon_row('Polish Bar', 'Dallas, TX', '2 Elm St'),
+            salon_row('Polish Bar', 'Dallas, TX', '2 Elm St'), # Repeated within the file
+            salon_row('Polish Bar', 'Dallas, TX', '9 Oak St'), # Same name and location, another address
+            salon_row('Nail Spa', 'Dallas, TX', '3 Pine St'),
+            salon_row('Not Available', 'Dallas, TX', ''),
+            salon_row('Lost Salon', 'N/A', '4 Ash St'),
+            salon_row('Nail Spa', 'Houston, TX', ''),
+        ])
+
+    def write_csv(self, rows):
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w', newline='') as csvfile:
+            csv.writer(csvfile).writerows(rows)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def run_import(self, path=None, **options):
+        out = StringIO()
+        call_command('import', path or self.path, batch_size=2, stdout=out, **options)
+        return out.getvalue()
+
+    def test_imports_in_batches_and_skips_duplicates(self):
+        output = self.run_import()
+
+        self.assertIn('Successfully imported: 3', output)
+        self.assertIn('Skipped (missing name or duplicate check): 4', output)
+        self.assertIn('Failed to import (processing error): 1', output)
+        polish = Salon.objects.get(address='2 Elm St')
+        self.assertEqual(polish.sample_url, 'polish-bar-dallas')
+        self.assertEqual(polish.gallery_images, ['https://a.test/1.jpg', 'https://a.test/2.jpg'])
+        self.assertFalse(Salon.objects.filter(address='9 Oak St').exists())
+        job = ImportJob.objects.get()
+        self.assertEqual((job.status, job.last_row, job.imported), ('completed', 8, 3))
+
+    def test_parallel_parsing_gives_the_same_result(self):
+        output = self.run_import(workers=2)
+
+        self.assertIn('Successfully imported: 3', output)
+        # Row-numbered messages come out in file order
+        self.assertLess(output.index('row 6:'), output.index('row 7:'))
+        self.assertEqual(
+            sorted(Salon.objects.values_list('sample_url', flat=True)),
+            ['glamour-nails-austin', 'nail-spa-dallas', 'nail-spa-houston', 'polish-bar-dallas'],
+        )
+
+    def test_resume_continues_after_the_checkpoint(self):
+        self.run_import()
+        job = ImportJob.objects.get()
+        # As if the process died after committing the first two batches
+        Salon.objects.filter(name='Nail Spa').delete()
+        ImportJob.objects.filter(pk=job.pk).update(status='running', last_row=4)
+
+        output = self.run_import(resume=True)
+        self.assertIn('Resuming after row 4', output)
+        self.assertEqual(Salon.objects.filter(name='Nail Spa').count(), 2)
+        self.assertEqual(ImportJob.objects.get().status, 'completed')
+
+        self.assertIn('Nothing to resume', self.run_import(resume=True))
+
+    def test_rerun_is_a_no_op_and_updates_on_request(self):
+        self.run_import()
+        self.assertIn('Successfully imported: 0', self.run_import())
+        self.assertEqual(Salon.objects.count(), 4)
+
+        path = self.write_csv([salon_row('Glamour Nails', 'Austin, TX', '1 Main St', description='Gel and acrylic.')])
+        output = self.run_import(path, update_existing=True)
+        self.assertIn('Updated existing salons: 1', output)
+        glamour = Salon.objects.get(name='Glamour Nails')
+        self.assertEqual((glamour.description, glamour.sample_url), ('Gel and acrylic.', 'glamour-nails-austin'))
+        self.assertEqual(Salon.objects.count(), 4)
+
+    def test_same_name_and_location_is_a_duplicate_whatever_the_address(self):
+        Salon.objects.create(name='Nail Spa', location='Dallas, TX') # No address, no stored fingerprint
+        path = self.write_csv([
+            salon_row('Glamour Nails', 'Austin, TX', '7 Other St'),
+            salon_row('Nail Spa', 'Dallas, TX', '3 Pine St'),
+            salon_row('Glamour Nails', 'Austin TX', ''),
+        ])
+        output = self.run_import(path)
+        self.assertIn('Successfully imported: 0', output)
+        self.assertIn('Skipped (missing name or duplicate check): 3', output)
+
+        path = self.write_csv([
+            salon_row('Nail Spa', 'Dallas, TX', '3 Pine St', description='Walk-ins welcome.'),
+            salon_row('Glamour Nails', 'Austin, TX', '7 Other St', description='Moved.'),
+        ])
+        output = self.run_import(path, update_existing=True)
+        self.assertIn('Updated existing salons: 2', output)
+        self.assertEqual(Salon.objects.count(), 2)
+        self.assertEqual(
+            sorted(Salon.objects.values_list('name', 'address', 'description')),
+            [('Glamour Nails', '7 Other St', 'Moved.'), ('Nail Spa', '3 Pine St', 'Walk-ins welcome.')],
+        )
+
+
+class SeedCommandTests(TestCase):
+    def seed(self, **options):
+        options = {'templates': 3, 'users': 5, 'salons': 20, 'posts': 4, 'visits': 50, 'conversations': 3,
+                   'knowledge': 2, 'batch_size': 7, **options}
+        call_command('seed', stdout=StringIO(), **options)
+
+    def test_seeds_every_model_reproducibly(self):
+        self.seed()
+        self.assertEqual(Salon.objects.count(), 20)
+        self.assertEqual(Visit.objects.count(), 50)
+        self.assertEqual(BlogPost.objects.filter(author__isnull=False).count(), 4)
+        self.assertTrue(ChatMessage.objects.exists())
+        names = list(Salon.objects.order_by('pk').values_list('name', flat=True))
+
+        # Unique keys continue after the existing rows, the same seed repeats the same data
+        self.seed()
+        self.assertEqual(Salon.objects.count(), 40)
+        self.assertEqual(list(Salon.objects.order_by('pk').values_list('name', flat=True)[20:]), names)
+
+
+class StatsTests(TestCase):
+    def setUp(self):
+        Stats.clear_cache()
+        self.addCleanup(Stats.clear_cache)
+
+    def counters(self):
+        Stats.clear_cache()
+        stats = Stats.load()
+        return {field: getattr(stats, field) for field in ('total_salons', 'sample_sites', 'pending_contacts', 'active_subscriptions')}
+
+    def test_signals_and_bulk_hooks_keep_counters_in_line(self):
+        salon = Salon.objects.create(name='Glamour Nails', location='Austin, TX')
+        Salon.objects.create(name='Polish Bar', location='Dallas, TX', contact_status='contacted')
+        self.assertEqual(self.counters(), {'total_salons': 2, 'sample_sites': 2, 'pending_contacts': 1, 'active_subscriptions': 0})
+
+        salon.claimed = True
+        salon.contact_status = 'subscribed'
+        salon.save(update_fields=['claimed', 'contact_status'])
+        get_user_model().objects.create(username='owner', email='owner@example.com', stripe_subscription_id='sub_1')
+        self.assertEqual(self.counters(), {'total_salons': 2, 'sample_sites': 1, 'pending_contacts': 0, 'active_subscriptions': 1})
+
+        call_command('seed', templates=0, users=0, salons=3, posts=0, conversations=0, knowledge=0, stdout=StringIO())
+        Salon.objects.filter(name='Polish Bar').delete()
+        self.assertEqual(self.counters()['total_salons'], 4)
+
+    def test_reconcile_and_cached_load(self):
+        Salon.objects.create(name='Glamour Nails', location='Austin, TX')
+        self.assertEqual(self.counters()['total_salons'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            adjust_stats(total_salons=5) # Drift
+        with self.assertNumQueries(2): # The Stats row and the sum of its shards
+            self.assertEqual(Stats.load().total_salons, 6)
+        with self.assertNumQueries(0):
+            Stats.load()
+
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('reconcile_stats', stdout=out)
+        self.assertIn('total_salons: 6 -> 1', out.getvalue())
+        self.assertEqual(Stats.load().total_salons, 1)
+        self.assertFalse(StatsShard.objects.exclude(total_salons=0).exists())
+
+    def test_admin_edits_the_stored_totals(self):
+        admin = get_user_model().objects.create_superuser(username='admin', email='admin@example.com', password='password')
+        self.client.force_login(admin)
+        Salon.objects.create(name='Glamour Nails', location='Austin, TX')
+        Stats.load() # Cached copy the admin must not show or save
+        adjust_stats(total_salons=4)
+        url = reverse('admin:core_stats_change', args=[1])
+
+        response = self.client.get(url)
+        self.assertEqual(response.context['adminform'].form.initial['total_salons'], 5) # Row + shards, uncached
+
+        adjust_stats(pending_contacts=2, total_salons=1) # Lands while the form is open
+        response = self.client.post(url, {'total_salons': 1, 'sample_sites': 1, 'active_subscriptions': 0, 'pending_contacts': 1})
+        self.assertEqual(response.status_code, 302)
+
+        self.assertEqual(self.counters(), {'total_salons': 2, 'sample_sites': 1, 'pending_contacts': 3, 'active_subscriptions': 0})
+        self.assertFalse(StatsShard.objects.exclude(total_salons=0, pending_contacts=0).exists())
+
+    @override_settings(STATS_SHARDS=4)
+    def test_adjustments_spread_over_shards(self):
+        self.counters() # Creates the Stats row
+        for _ in range(40):
+            adjust_stats(total_salons=1, pending_contacts=-1)
+        self.assertGreater(StatsShard.objects.count(), 1)
+        self.assertLessEqual(StatsShard.objects.count(), 4)
+        self.assertEqual(Stats.objects.get(pk=1).total_salons, 0) # The row itself is untouched
+        self.assertEqual(self.counters(), {'total_salons': 40, 'sample_sites': 0, 'pending_contacts': 0, 'active_subscriptions': 0})
+
+        fold_shards()
+        self.assertEqual(Stats.objects.get(pk=1).total_salons, 40)
+        self.assertEqual(self.counters()['total_salons'], 40)
+
+
+class BackgroundWriterTests(SimpleTestCase):
+    class Tally(PeriodicWriter):
+        def __init__(self):
+            super().__init__(flush_interval=3600)
+            self.pending, self.saved = 0, 0
+
+        def add(self):
+            self.ensure_writer()
+            self.pending += 1
+
+        def write_pending(self):
+            self.saved, self.pending = self.saved + self.pending, 0
+
+        def forked(self):
+            self.pending = 0
+
+    def test_flush_and_fork_restart(self):
+        tally = self.Tally()
+        tally.add()
+        tally.flush()
+        self.assertEqual(tally.saved, 1)
+
+        tally.add()
+        parent_thread = tally._thread
+        tally._pid = -1 # As seen from a forked child
+        tally.add()
+        self.assertIsNot(tally._thread, parent_thread)
+        self.assertEqual(tally.pending, 1) # The parent's pending write was dropped
+
+    def test_process_writer_is_rebuilt_when_its_settings_change(self):
+        writer = ProcessWriter('BACKGROUND_TEST_', self.Tally)
+        first = writer.get()
+        self.assertIs(writer.get(), first)
+        with mock.patch.object(first, 'flush') as flush, self.settings(BACKGROUND_TEST_INTERVAL=1):
+            self.assertIsNot(writer.get(), first)
+        flush.assert_called_once()
+
+    def test_client_ip(self):
+        factory = RequestFactory()
+        self.assertEqual(get_client_ip(factory.get('/', REMOTE_ADDR='10.0.0.1')), '10.0.0.1')
+        request = factory.get('/', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='203.0.113.7, 10.0.0.1')
+        self.assertEqual(get_client_ip(request), '203.0.113.7')
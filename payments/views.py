@@ -16,7 +16,7 @@ from drf_spectacular.types import OpenApiTypes
 
 from .models import SubscriptionPlan
 from users.models import User
-from core.models import Stats
+from core.stats import adjust_stats
 from .serializers import (
     SubscriptionPlanSerializer,
     PaymentIntentRequestSerializer,
@@ -265,6 +265,7 @@ class CreateSubscriptionView(views.APIView):
                             )
                 except stripe.error.InvalidRequestError:
                     User.objects.filter(pk=user.pk).update(stripe_subscription_id=None)
+                    adjust_stats(active_subscriptions=-1) # update() sends no signals
                     user.refresh_from_db(fields=['stripe_subscription_id'])
 
             subscription_params = {
@@ -279,6 +280,8 @@ class CreateSubscriptionView(views.APIView):
 
             subscription = stripe.Subscription.create(**subscription_params)
             User.objects.filter(pk=user.pk).update(stripe_subscription_id=subscription.id)
+            if not user.stripe_subscription_id:
+                adjust_stats(active_subscriptions=1)
 
             client_secret = None
             if subscription.latest_invoice and subscription.latest_invoice.payment_intent:
@@ -406,11 +409,14 @@ class StripeWebhookView(views.APIView):
                     if sub_status in ['canceled', 'unpaid', 'incomplete_expired']:
                         if user.stripe_subscription_id == sub_id:
                             User.objects.filter(id=user_id).update(stripe_subscription_id=None)
+                            adjust_stats(active_subscriptions=-1)
                             print(f"Cleared subscription ID for user {user_id} due to status {sub_status}")
 
                     elif sub_status == 'active':
                         if user.stripe_subscription_id != sub_id:
                             User.objects.filter(id=user_id).update(stripe_subscription_id=sub_id)
+                            if not user.stripe_subscription_id:
+                                adjust_stats(active_subscriptions=1)
                             print(f"Set active subscription ID {sub_id} for user {user_id}")
                 except User.DoesNotExist:
                     print(f"Webhook Error: User with ID {user_id} not found for subscription {sub_id}")
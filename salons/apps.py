@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class SalonsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'salons'
+
+    def ready(self):
+        # The SQLite full-text index (FTS5 table and triggers) lives outside the models, so it's
+        # created after migrate and re-checked every time (see salons/search.py)
+        from .search import install_search_index
+        post_migrate.connect(install_search_index, sender=self, dispatch_uid='salons_install_search_index')
+        # Connects the receivers that invalidate cached salon site payloads
+        from . import site_cache # noqa: F401
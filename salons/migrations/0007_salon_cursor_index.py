@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-17 04:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salons', '0006_alter_salon_booking_url_alter_salon_footer_about_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='salon',
+            index=models.Index(fields=['created_at', 'id'], name='salon_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-17 04:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salons', '0007_salon_cursor_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salon',
+            name='import_fingerprint',
+            field=models.CharField(blank=True, editable=False, max_length=40, null=True, unique=True, verbose_name='Import Fingerprint'),
+        ),
+    ]
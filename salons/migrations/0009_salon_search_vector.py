@@ -0,0 +1,44 @@
+# Generated by Django 5.2 on 2026-10-17 09:30
+
+from django.db import migrations
+
+
+class PostgreSQLRunSQL(migrations.RunSQL):
+    """RunSQL applied on PostgreSQL only (other backends index salons differently, see salons/search.py)."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salons', '0008_salon_import_fingerprint'),
+    ]
+
+    operations = [
+        # Weighted tsvector over salons.search.SEARCH_FIELDS (weights TSVECTOR_WEIGHTS), kept up to date by PostgreSQL
+        PostgreSQLRunSQL(
+            sql=[
+                "ALTER TABLE salons_salon ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+                "setweight(to_tsvector('simple'::regconfig, coalesce(name, '')), 'A') || "
+                "setweight(to_tsvector('simple'::regconfig, coalesce(location, '')), 'B') || "
+                "setweight(to_tsvector('simple'::regconfig, coalesce(address, '')), 'B') || "
+                "setweight(to_tsvector('simple'::regconfig, coalesce(hero_subtitle, '')), 'C') || "
+                "setweight(to_tsvector('simple'::regconfig, coalesce(services_tagline, '')), 'C') || "
+                "setweight(to_tsvector('simple'::regconfig, coalesce(gallery_tagline, '')), 'C') || "
+                "setweight(to_tsvector('simple'::regconfig, coalesce(description, '')), 'D')"
+                ") STORED",
+                "CREATE INDEX IF NOT EXISTS salons_salon_search_vector_idx ON salons_salon USING GIN (search_vector)",
+            ],
+            reverse_sql=[
+                "DROP INDEX IF EXISTS salons_salon_search_vector_idx",
+                "ALTER TABLE salons_salon DROP COLUMN IF EXISTS search_vector",
+            ],
+        ),
+    ]
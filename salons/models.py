@@ -1,16 +1,45 @@
 # salon_app/models.py
 
+import hashlib
+import re
+
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
+
+from core.slugs import allocate_unique_slug, save_with_unique_slug
 # Make sure you import timezone for the claimed_at logic
 # from django.utils import timezone # Ensure this is imported if not already
 
 # Using settings.AUTH_USER_MODEL is the standard way to refer to your user model
 User = settings.AUTH_USER_MODEL
 
+
+def import_fingerprint(name, address=None, location=None):
+    """
+    Identity of a salon for CSV imports: the normalized name plus the address (the location when
+    there is no address). Case, punctuation and spacing differences give the same fingerprint.
+    """
+    def normalize(value):
+        return ' '.join(re.findall(r'\w+', (value or '').lower()))
+    key = f"{normalize(name)}|{normalize(address) or normalize(location)}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def import_fingerprints(name, address=None, location=None):
+    """
+    Every fingerprint a CSV row matches an existing salon by: the salon's import_fingerprint()
+    (name and address), then the name and location. A salon with the same name at the same
+    location is the same salon, whatever address either of them has.
+    """
+    fingerprints = [import_fingerprint(name, address, location)]
+    by_location = import_fingerprint(name, None, location)
+    if location and by_location not in fingerprints:
+        fingerprints.append(by_location)
+    return fingerprints
+
 # salon_app/models.py (Your Template model remains the same)
 class Template(models.Model):
     name = models.CharField(max_length=100, verbose_name=_('Template Name'))
@@ -108,62 +137,61 @@ class Salon(models.Model):
     claimed_at = models.DateTimeField(blank=True, null=True, verbose_name=_('Claimed At'))
     contact_status = models.CharField(max_length=20, choices=CONTACT_STATUS_CHOICES, default='notContacted', verbose_name=_('Contact Status'))
 
+    # Set by the CSV importer (import_fingerprint()), the conflict target for its upserts
+    import_fingerprint = models.CharField(max_length=40, unique=True, blank=True, null=True, editable=False, verbose_name=_('Import Fingerprint'))
+
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Created At'))
     updated_at = models.DateTimeField(auto_now=True, verbose_name=_('Updated At'))
 
-    def save(self, *args, **kwargs):
-        # Only generate slug if it doesn't exist
-        if not self.sample_url:
-            # --- UPDATED SLUG GENERATION LOGIC ---
-            base_slug_source = self.name # Start with just the name
-
-            # Add the first part of the location if it exists and is not empty
-            if self.location:
-                 location_part = ""
-                 try:
-                     # Attempt to split by comma and take the first part
-                     location_part = self.location.split(',')[0].strip()
-                 except IndexError:
-                     # If there's no comma, just use the whole location string
-                     location_part = self.location.strip()
-
-                 # Only append location part if it's a non-empty string
-                 if location_part:
-                     base_slug_source = f"{self.name}-{location_part}"
-
-            # Generate the initial slug from the constructed source string
-            base_slug = slugify(base_slug_source)
-
-            # Fallback if the base slug is empty (e.g., name was problematic for slugify)
-            if not base_slug:
-                 import random # Need random
-                 import string # Need string
-                 # Use a generic prefix + random characters
-                 base_slug = slugify(f"salon-{''.join(random.choices(string.ascii_lowercase + string.digits, k=6))}")
-
-
-            # Ensure uniqueness
-            unique_slug = base_slug
-            counter = 1
-            # When checking for existing slugs, exclude the current object if it already has a primary key (i.e., it's being updated)
-            while Salon.objects.filter(sample_url=unique_slug).exclude(pk=self.pk).exists():
-                unique_slug = f"{base_slug}-{counter}"
-                counter += 1
-
-            self.sample_url = unique_slug
-            # --- END UPDATED SLUG GENERATION LOGIC ---
+    def get_base_slug(self):
+        """The slug sample_url is derived from: name plus the first part of the location."""
+        base_slug_source = self.name # Start with just the name
+
+        # Add the first part of the location if it exists and is not empty
+        if self.location:
+             # Take the part before the first comma (the whole string if there is none)
+             location_part = self.location.split(',')[0].strip()
 
+             # Only append location part if it's a non-empty string
+             if location_part:
+                 base_slug_source = f"{self.name}-{location_part}"
+
+        # Generate the initial slug from the constructed source string
+        base_slug = slugify(base_slug_source)
+
+        # Fallback if the base slug is empty (e.g., name was problematic for slugify)
+        if not base_slug:
+             import random # Need random
+             import string # Need string
+             # Use a generic prefix + random characters
+             base_slug = slugify(f"salon-{''.join(random.choices(string.ascii_lowercase + string.digits, k=6))}")
+        return base_slug
+
+    def save(self, *args, **kwargs):
         # Automatically set claimed_at if the salon is marked as claimed for the first time
         if self.claimed and self.claimed_at is None:
              # Ensure timezone is imported (from django.utils import timezone)
              self.claimed_at = timezone.now()
 
-        super().save(*args, **kwargs)
+        # Only generate slug if it doesn't exist
+        if self.sample_url:
+            return super().save(*args, **kwargs)
+
+        # Ensure uniqueness: one query for every slug sharing the base, the next suffix is picked
+        # in memory (see core/slugs.py). Importers reserve slugs up front with a SlugAllocator.
+        base_slug = self.get_base_slug()
+        self.sample_url = allocate_unique_slug(Salon, 'sample_url', base_slug, exclude_pk=self.pk)
+        # Retries with a fresh slug if a concurrent save took this one first
+        save_with_unique_slug(self, 'sample_url', base_slug, super().save, *args, **kwargs)
 
     def __str__(self):
         return self.name
 
     class Meta:
         verbose_name = _("Salon")
-        verbose_name_plural = _("Salons")
\ No newline at end of file
+        verbose_name_plural = _("Salons")
+        indexes = [
+            # Cursor pagination order of the salon list
+            models.Index(fields=['created_at', 'id'], name='salon_created_id_idx'),
+        ]
\ No newline at end of file
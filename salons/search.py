@@ -0,0 +1,157 @@
+# salons/search.py
+"""
+Full-text search for salons.
+
+SQLite: an FTS5 table (salons_salon_fts) that mirrors the searchable columns of
+salons_salon through triggers, so every INSERT/UPDATE/DELETE (save(), bulk_create,
+queryset.update(), raw SQL) keeps it in sync.
+PostgreSQL: a generated, weighted tsvector column (search_vector) with a GIN index,
+maintained by the database itself and added by migration 0009_salon_search_vector.
+Any other backend falls back to DRF's icontains search over the same columns.
+"""
+import re
+
+from django.db import connections
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+# Searched columns, most important first (name matches rank highest)
+SEARCH_FIELDS = ['name', 'location', 'address', 'hero_subtitle', 'services_tagline', 'gallery_tagline', 'description']
+
+SALON_TABLE = 'salons_salon'
+FTS_TABLE = 'salons_salon_fts'
+
+# bm25() column weights for FTS5, same order as SEARCH_FIELDS
+FTS_WEIGHTS = [10.0, 5.0, 3.0, 2.0, 1.0, 1.0, 1.0]
+
+# setweight() classes for PostgreSQL, same order as SEARCH_FIELDS (a change needs a migration
+# rebuilding search_vector, see 0009_salon_search_vector)
+TSVECTOR_WEIGHTS = ['A', 'B', 'B', 'C', 'C', 'C', 'D']
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+# Aliases where the index was found (or installed), so requests don't introspect the schema
+_index_available = {}
+
+
+# --- Installation (SQLite, run after every migrate, see SalonsConfig.ready) ---
+# Django rebuilds SQLite tables for many ALTERs, dropping their triggers, so unlike the
+# PostgreSQL column this can't be a one-off migration.
+
+def _sqlite_statements():
+    columns = ', '.join(SEARCH_FIELDS)
+    new_values = ', '.join(f'new.{field}' for field in SEARCH_FIELDS)
+    old_values = ', '.join(f'old.{field}' for field in SEARCH_FIELDS)
+    delete_old = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values});"
+    insert_new = f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values});"
+    return {
+        'ai': f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {SALON_TABLE} BEGIN {insert_new} END",
+        'ad': f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {SALON_TABLE} BEGIN {delete_old} END",
+        'au': f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON {SALON_TABLE} BEGIN {delete_old} {insert_new} END",
+    }
+
+
+def _install_sqlite(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s", [SALON_TABLE])
+        existing_triggers = {row[0] for row in cursor.fetchall()}
+
+        # External content table: the text lives in salons_salon, FTS5 only stores the index.
+        # Prefix indexes for 2 and 3 characters make short prefix queries cheap.
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            f"{', '.join(SEARCH_FIELDS)}, content='{SALON_TABLE}', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        for suffix, sql in _sqlite_statements().items():
+            cursor.execute(sql)
+
+        # Django rebuilds SQLite tables for many ALTERs, which drops their triggers. Whenever a
+        # trigger was missing the index may have missed writes, so rebuild it from the table.
+        if any(f'{FTS_TABLE}_{suffix}' not in existing_triggers for suffix in ('ai', 'ad', 'au')):
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def install_search_index(using='default', **kwargs):
+    """Creates (or repairs) the SQLite full-text index for the database alias. Safe to run repeatedly."""
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        _install_sqlite(connection)
+        _index_available[using] = True
+
+
+def search_index_available(using='default'):
+    if using not in _index_available:
+        connection = connections[using]
+        if connection.vendor == 'sqlite':
+            available = FTS_TABLE in connection.introspection.table_names()
+        elif connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                columns = connection.introspection.get_table_description(cursor, SALON_TABLE)
+            available = any(column.name == 'search_vector' for column in columns)
+        else:
+            available = False
+        _index_available[using] = available
+    return _index_available[using]
+
+
+# --- Querying ---
+
+def search_words(terms):
+    """Splits search terms into plain words, dropping any query syntax characters."""
+    return [word for term in terms for word in WORD_RE.findall(term)]
+
+
+def search_salons(queryset, terms):
+    """
+    Filters a Salon queryset to the rows matching every word (each as a prefix) and
+    orders them by relevance, best first. The relevance is available as `search_rank`.
+    Returns None when the database has no full-text index, so callers can fall back.
+    """
+    words = search_words(terms)
+    if not words:
+        return queryset
+    if not search_index_available(queryset.db):
+        return None
+
+    vendor = connections[queryset.db].vendor
+    if vendor == 'sqlite':
+        # "word"* is an FTS5 prefix query, words separated by spaces must all match
+        match = ' '.join(f'"{word}"*' for word in words)
+        weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+        # Joining the FTS table lets SQLite drive the query from the index.
+        # bm25() is lower for better matches.
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = {SALON_TABLE}.id', f'{FTS_TABLE} MATCH %s'],
+            params=[match],
+            select={'search_rank': f'bm25({FTS_TABLE}, {weights})'},
+            order_by=['search_rank'],
+        )
+
+    # PostgreSQL: word:* is a prefix match, & requires every word
+    tsquery = ' & '.join(f'{word}:*' for word in words)
+    return queryset.annotate(
+        search_rank=RawSQL(f"ts_rank({SALON_TABLE}.search_vector, to_tsquery('simple', %s))", [tsquery])
+    ).extra(
+        where=[f"{SALON_TABLE}.search_vector @@ to_tsquery('simple', %s)"],
+        params=[tsquery],
+    ).order_by('-search_rank')
+
+
+class SalonSearchFilter(filters.SearchFilter):
+    """
+    Drop-in replacement for filters.SearchFilter on SalonViewSet: same ?search= parameter,
+    but backed by the full-text index with prefix matching and relevance ordering.
+    An explicit ?ordering= (OrderingFilter, applied after this one) still takes precedence.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        results = search_salons(queryset, terms)
+        if results is None:
+            # No full-text index on this database: plain icontains search over view.search_fields
+            return super().filter_queryset(request, queryset, view)
+        return results
@@ -39,7 +39,43 @@ class TemplateSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'slug', 'created_at', 'updated_at']
 
 
-class SalonSerializer(serializers.ModelSerializer):
+class SparseFieldsetMixin:
+    """
+    Lets GET requests pick the fields they need:
+      ?fields=id,name,services  -> only these fields
+      ?expand=template,services -> default_fields plus these
+    Unknown names are ignored. default_fields = None means every field.
+    """
+    default_fields = None
+
+    @classmethod
+    def selected_field_names(cls, request):
+        """The field names a request asks for, or None for every field."""
+        if request is None or request.method != 'GET':
+            return None if cls.default_fields is None else set(cls.default_fields)
+
+        def param(name):
+            value = request.query_params.get(name)
+            return {field.strip() for field in value.split(',') if field.strip()} if value else None
+
+        requested, expanded = param('fields'), param('expand')
+        if requested is not None:
+            selected = requested | (expanded or set())
+        elif cls.default_fields is not None:
+            selected = set(cls.default_fields) | (expanded or set())
+        else:
+            return None
+        return selected | {'id'} # Always identify the object
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.selected_field_names(self.context.get('request'))
+        if selected is not None:
+            for field_name in set(self.fields) - selected:
+                self.fields.pop(field_name)
+
+
+class SalonSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for the Salon model.
     Includes the new 'image' field and other fields.
@@ -58,6 +94,8 @@ class SalonSerializer(serializers.ModelSerializer):
     # ImageField serializers automatically provide the URL when read
     image = serializers.ImageField(read_only=True, allow_null=True)
     # -------------------------------
+    # The template's preview, the card image of salons without their own (no nested template needed)
+    template_preview_image = serializers.ImageField(source='template.preview_image', read_only=True, allow_null=True, default=None)
 
     # Existing image fields (also read_only=True)
     logo_image = serializers.ImageField(read_only=True, allow_null=True)
@@ -89,7 +127,7 @@ class SalonSerializer(serializers.ModelSerializer):
             'owner', 'template', 'template_id', 'claimed', 'claimed_at',
             'contact_status', 'created_at', 'updated_at',
             # --- Include the new 'image' field here ---
-            'image',
+            'image', 'template_preview_image',
             # -------------------------------------------
             # Include existing other new fields
             'logo_image', 'cover_image', 'about_image', 'footer_logo_image',
@@ -101,11 +139,28 @@ class SalonSerializer(serializers.ModelSerializer):
             'id', 'sample_url', 'owner', 'claimed', 'claimed_at',
             'created_at', 'updated_at',
             # Image fields are typically read-only in serializers for reads
-            'image', 'logo_image', 'cover_image', 'about_image', 'footer_logo_image',
+            'image', 'template_preview_image', 'logo_image', 'cover_image', 'about_image', 'footer_logo_image',
         ]
 
     def validate_contact_status(self, value):
         valid_choices = dict(Salon.CONTACT_STATUS_CHOICES).keys()
         if value not in valid_choices:
             raise serializers.ValidationError(f"Invalid contact status. Must be one of {list(valid_choices)}")
-        return value
\ No newline at end of file
+        return value
+
+
+# Fields of the compact salon cards returned by the list endpoint
+SALON_LIST_FIELDS = [
+    'id', 'name', 'location', 'address', 'phone_number', 'sample_url',
+    'image', 'template_preview_image', 'claimed', 'contact_status', 'created_at',
+]
+
+
+class SalonListSerializer(SalonSerializer):
+    """
+    Compact serializer for salon listings: only the card fields by default, without the nested
+    template, the extra images or the JSON content. Anything else from SalonSerializer can
+    still be requested with ?fields= or ?expand=.
+    """
+    default_fields = SALON_LIST_FIELDS
+
@@ -0,0 +1,162 @@
+# salons/site_cache.py
+"""
+Cache of the serialized salon payloads served by SalonViewSet.sample_lookup (public salon sites).
+
+Two levels, so invalidation never has to know every cached variant:
+  salons:site:<generation>:<sample_url>                         -> {'version': updated_at, 'salon_id'}
+  salons:site:<generation>:<sample_url>:<version>:<host hash>   -> {'data', 'etag', 'last_modified'}
+The payload key includes the salon's updated_at, and the host because image URLs are absolute.
+Salon saves/deletes drop the salon's pointer, Template saves/deletes bump the generation, and
+owner username changes drop the pointers of their salons (see the receivers at the bottom,
+connected in SalonsConfig.ready).
+
+A fill racing a save must not store the old payload after the save dropped it: the view reads
+get_site_token() (generation plus a per-sample_url stamp that every invalidation changes) before
+fetching the salon, and cache_site() drops what it stored if the token changed in the meantime.
+Invalidations also run again once the saving transaction commits, for fills that read the row
+before the commit.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Salon, Template
+
+GENERATION_KEY = 'salons:site:generation'
+
+
+def get_site_cache():
+    return caches[getattr(settings, 'SALON_SITE_CACHE_ALIAS', 'default')]
+
+
+def get_site_cache_ttl():
+    return getattr(settings, 'SALON_SITE_CACHE_TTL', 60 * 60)
+
+
+def _generation():
+    cache = get_site_cache()
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # Start from the clock rather than 0 so an evicted counter never revives old entries
+        generation = int(time.time())
+        cache.add(GENERATION_KEY, generation, None)
+    return generation
+
+
+def _pointer_key(sample_url, generation=None):
+    return f"salons:site:{_generation() if generation is None else generation}:{sample_url}"
+
+
+def _slug_key(salon_id):
+    # Last sample_url cached for a salon, so a renamed slug's old entry can be dropped too
+    return f"salons:site:slug:{salon_id}"
+
+
+def _stamp_key(sample_url):
+    # Changed by every invalidation of the sample_url (see get_site_token)
+    return f"salons:site:stamp:{sample_url}"
+
+
+def _payload_key(pointer_key, version, host):
+    return f"{pointer_key}:{version}:{hashlib.md5(host.encode('utf-8')).hexdigest()}"
+
+
+def get_cached_site(sample_url, host):
+    """Returns the cached {'data', 'etag', 'last_modified'} entry for a salon site, or None."""
+    cache = get_site_cache()
+    pointer_key = _pointer_key(sample_url)
+    pointer = cache.get(pointer_key)
+    if pointer is None:
+        return None
+    return cache.get(_payload_key(pointer_key, pointer['version'], host))
+
+
+def get_site_token(sample_url):
+    """The cache state of a sample_url, to read before fetching the salon and pass to cache_site()."""
+    cache = get_site_cache()
+    return (_generation(), cache.get(_stamp_key(sample_url)))
+
+
+def cache_site(salon, host, data, token=None):
+    """
+    Stores a salon's serialized payload with its validators and returns the entry.
+    With the token read before the salon was fetched, nothing stays cached if the salon or
+    the templates were invalidated since (the payload may predate the change).
+    """
+    cache = get_site_cache()
+    ttl = get_site_cache_ttl()
+    body = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True)
+    version = int(salon.updated_at.timestamp() * 1000000)
+    entry = {
+        'data': data,
+        # Strong validator: the hash of the exact payload
+        'etag': '"%s"' % hashlib.sha1(body.encode('utf-8')).hexdigest(),
+        'last_modified': int(salon.updated_at.timestamp()),
+    }
+    pointer_key = _pointer_key(salon.sample_url, token[0] if token else None)
+    cache.set(_payload_key(pointer_key, version, host), entry, ttl)
+    cache.set(pointer_key, {'version': version, 'salon_id': salon.pk}, ttl)
+    cache.set(_slug_key(salon.pk), salon.sample_url, ttl)
+    # Checked after storing: an invalidation between the fetch and here is seen now, a later one drops the pointer itself
+    if token is not None and get_site_token(salon.sample_url) != token:
+        cache.delete(pointer_key)
+    return entry
+
+
+def invalidate_salon_site(salon_id, sample_url=None):
+    """Drops the cached payloads of one salon (under its current and last cached sample_url)."""
+    cache = get_site_cache()
+    generation = _generation()
+    slugs = {sample_url, cache.get(_slug_key(salon_id))} - {None, ''}
+    stamp = time.time_ns()
+    cache.set_many({_stamp_key(slug): stamp for slug in slugs}, get_site_cache_ttl())
+    cache.delete_many([_pointer_key(slug, generation) for slug in slugs] + [_slug_key(salon_id)])
+
+
+def invalidate_salon_sites(salon_ids):
+    """Drops the cached payloads of several salons, e.g. after a queryset.update()."""
+    for salon_id, sample_url in Salon.objects.filter(pk__in=salon_ids).values_list('pk', 'sample_url'):
+        invalidate_salon_site(salon_id, sample_url)
+
+
+def invalidate_all_sites():
+    """Makes every cached salon site stale (their keys are simply never read again and expire)."""
+    cache = get_site_cache()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError: # Counter was never set or got evicted
+        cache.set(GENERATION_KEY, int(time.time()), None)
+
+
+def _invalidate_now_and_on_commit(invalidate, *args):
+    invalidate(*args)
+    transaction.on_commit(lambda: invalidate(*args))
+
+
+@receiver([post_save, post_delete], sender=Salon, dispatch_uid='salons_site_cache_salon_changed')
+def salon_changed(sender, instance, **kwargs):
+    _invalidate_now_and_on_commit(invalidate_salon_site, instance.pk, instance.sample_url)
+
+
+@receiver([post_save, post_delete], sender=Template, dispatch_uid='salons_site_cache_template_changed')
+def template_changed(sender, instance, **kwargs):
+    # Templates are nested in every payload using them and rarely change: start over
+    _invalidate_now_and_on_commit(invalidate_all_sites)
+
+
+@receiver(post_save, sender=get_user_model(), dispatch_uid='salons_site_cache_owner_changed')
+def owner_changed(sender, instance, created=False, update_fields=None, **kwargs):
+    # Payloads show the owner's username; logins only save last_login and are skipped
+    if created or (update_fields is not None and 'username' not in update_fields):
+        return
+    salon_ids = list(Salon.objects.filter(owner=instance).values_list('pk', flat=True))
+    if salon_ids:
+        _invalidate_now_and_on_commit(invalidate_salon_sites, salon_ids)
@@ -1,3 +1,171 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from core.slugs import SlugAllocator, allocate_unique_slug
+
+from .models import Salon, Template
+from .serializers import SALON_LIST_FIELDS
+from .site_cache import cache_site, get_cached_site, get_site_token
+
+
+class SalonSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.glam = Salon.objects.create(name='Glamour Nails', location='Austin, TX', description='Gel and acrylic sets.')
+        self.polish = Salon.objects.create(name='Polish Bar', location='Dallas, TX', description='Glamorous gel manicures.')
+        Salon.objects.create(name='Quick Cuts', location='Austin, TX', description='Haircuts only.')
+
+    def search(self, term, **params):
+        response = self.client.get('/api/salons/', {'search': term, **params})
+        self.assertEqual(response.status_code, 200)
+        return [salon['name'] for salon in response.data['results']]
+
+    def test_prefix_matches_are_ranked(self):
+        # A name match ranks above a description match
+        self.assertEqual(self.search('glam'), ['Glamour Nails', 'Polish Bar'])
+        self.assertEqual(self.search('gel aust'), ['Glamour Nails'])
+        self.assertEqual(self.search('glam', ordering='-name'), ['Polish Bar', 'Glamour Nails'])
+
+    def test_index_follows_updates_and_deletes(self):
+        Salon.objects.filter(pk=self.polish.pk).update(description='Classic manicures.')
+        self.glam.name = 'Shine Studio'
+        self.glam.save()
+        self.assertEqual(self.search('glam'), [])
+        self.assertEqual(self.search('shine'), ['Shine Studio'])
+
+        self.glam.delete()
+        self.assertEqual(self.search('shine'), [])
+
+    def test_query_syntax_is_ignored(self):
+        self.assertEqual(self.search('"glam*(-'), ['Glamour Nails', 'Polish Bar'])
+
+
+class SalonListFieldsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        template = Template.objects.create(name='Modern')
+        Salon.objects.create(name='Glamour Nails', location='Austin, TX', template=template, services=[{'name': 'Gel'}])
+
+    def test_list_returns_compact_cards_without_loading_large_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/salons/')
+        self.assertEqual(set(response.data['results'][0]), set(SALON_LIST_FIELDS))
+        sql = queries.captured_queries[-1]['sql']
+        self.assertNotIn('"description"', sql)
+        self.assertNotIn('"services"', sql)
+        # The template join loads only the preview image
+        self.assertNotIn('"salons_template"."description"', sql)
+
+    def test_cards_without_an_image_show_the_template_preview(self):
+        Template.objects.filter(name='Modern').update(preview_image='templates/previews/modern.png', description='Long text.')
+        Salon.objects.update(image='')
+        Salon.objects.create(name='Polish Bar', location='Dallas, TX')
+        response = self.client.get('/api/salons/')
+        cards = {card['name']: card for card in response.data['results']}
+        self.assertTrue(cards['Glamour Nails']['template_preview_image'].endswith('/templates/previews/modern.png'))
+        self.assertIsNone(cards['Glamour Nails']['image'])
+        self.assertIsNone(cards['Polish Bar']['template_preview_image'])
+
+    def test_fields_and_expand(self):
+        response = self.client.get('/api/salons/', {'fields': 'name,services,unknown'})
+        self.assertEqual(response.data['results'][0], {'id': response.data['results'][0]['id'], 'name': 'Glamour Nails', 'services': [{'name': 'Gel'}]})
+
+        response = self.client.get('/api/salons/', {'expand': 'template'})
+        salon = response.data['results'][0]
+        self.assertEqual(salon['template']['name'], 'Modern')
+        self.assertIn('sample_url', salon)
+
+    def test_cursor_pagination(self):
+        Salon.objects.create(name='Polish Bar', location='Dallas, TX')
+        response = self.client.get('/api/salons/', {'pagination': 'cursor', 'limit': 1})
+        self.assertEqual([salon['name'] for salon in response.data['results']], ['Polish Bar'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([salon['name'] for salon in response.data['results']], ['Glamour Nails'])
+        self.assertIsNone(response.data['next'])
+
+
+class SalonSlugTests(TestCase):
+    def test_duplicate_names_get_the_next_suffix_in_one_query(self):
+        Salon.objects.create(name='Glamour Nails', location='Austin, TX')
+        Salon.objects.create(name='Glamour Nails', location='Austin, TX', sample_url='glamour-nails-austin-7')
+        salon = Salon(name='Glamour Nails', location='Austin, TX')
+        with self.assertNumQueries(1):
+            slug = allocate_unique_slug(Salon, 'sample_url', salon.get_base_slug())
+        self.assertEqual(slug, 'glamour-nails-austin-8')
+        salon.save()
+        self.assertEqual(salon.sample_url, 'glamour-nails-austin-8')
+
+    def test_allocator_reserves_batches(self):
+        Salon.objects.create(name='Polish Bar', location='Dallas')
+        allocator = SlugAllocator(Salon, 'sample_url')
+        with self.assertNumQueries(1):
+            allocator.prefetch(['polish-bar-dallas', 'nail-spa'])
+        with self.assertNumQueries(0):
+            slugs = [allocator.reserve(base) for base in ['polish-bar-dallas', 'nail-spa', 'nail-spa']]
+        self.assertEqual(slugs, ['polish-bar-dallas-1', 'nail-spa', 'nail-spa-1'])
+
+
+@override_settings(TRACKING_EXCLUDED_PATH_PREFIXES=['/api/'])
+class SalonSiteCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.template = Template.objects.create(name='Modern')
+        self.salon = Salon.objects.create(name='Glamour Nails', location='Austin, TX', template=self.template)
+        self.url = f'/api/salons/sample/{self.salon.sample_url}/'
+
+    def test_cached_payload_and_conditional_requests(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_salon_and_template_saves_invalidate(self):
+        etag = self.client.get(self.url)['ETag']
+
+        self.salon.name = 'Glamour Nail Studio'
+        self.salon.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['name'], 'Glamour Nail Studio')
+
+        self.template.name = 'Classic'
+        self.template.save()
+        self.assertEqual(self.client.get(self.url).data['template']['name'], 'Classic')
+
+        self.salon.delete()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_fill_racing_a_save_is_not_kept(self):
+        token = get_site_token(self.salon.sample_url)
+        stale = Salon.objects.get(pk=self.salon.pk) # Fetched by a request before the save below
+        self.salon.name = 'Glamour Nail Studio'
+        self.salon.save()
+
+        cache_site(stale, 'testserver', {'name': stale.name}, token)
+        self.assertIsNone(get_cached_site(self.salon.sample_url, 'testserver'))
+        self.assertEqual(self.client.get(self.url).data['name'], 'Glamour Nail Studio')
+
+    def test_owner_username_change_invalidates(self):
+        owner = get_user_model().objects.create_user(username='ann', email='ann@example.com', password='password')
+        self.salon.owner = owner
+        self.salon.save()
+        self.assertEqual(self.client.get(self.url).data['owner'], 'ann')
+
+        owner.last_login = timezone.now()
+        owner.save(update_fields=['last_login'])
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+        owner.username = 'ann.smith'
+        owner.save()
+        self.assertEqual(self.client.get(self.url).data['owner'], 'ann.smith')
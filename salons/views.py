@@ -4,8 +4,9 @@
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from django.db.models import F
 from django.conf import settings # Import settings to get MEDIA_URL
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 
 # Django REST Framework Imports
 # Import necessary DRF modules including serializers and filters
@@ -20,28 +21,19 @@ from drf_spectacular.utils import (
 
 # Local app Imports (Models and Serializers)
 from .models import Template, Salon
-from .serializers import TemplateSerializer, SalonSerializer
+from .serializers import TemplateSerializer, SalonSerializer, SalonListSerializer
+from .search import SEARCH_FIELDS, SalonSearchFilter
+from .site_cache import cache_site, get_cached_site, get_site_token, invalidate_salon_sites
 
 # Core app Imports (assuming these exist)
 # If these models/permissions are not in core app, adjust imports
-# from core.models import Stats
+# Stats counters follow salon saves/deletes through signals, bulk updates report to adjust_stats
+from core.stats import adjust_stats
 # from core.permissions import IsOwnerOrAdmin, IsOwnerOrAdminOrReadOnly
 # from core.serializers import ErrorSerializer
 
 # --- Placeholder/Mock for core imports if they aren't available ---
 # Keep these mocks if you haven't integrated the real core models/permissions
-class Stats:
-    """Mock Stats model for seeding/views if core app is not ready."""
-    @staticmethod
-    def objects():
-        # Mock manager methods needed by the views
-        class MockQueryset:
-            def filter(self, *a, **kw): return self
-            def update(self, *a, **kw): pass
-            def get(self, *a, **kw): return Stats() # Mock get to return a dummy instance
-            def count(self): return 0 # Mock count
-        return MockQueryset()
-
 class IsOwnerOrAdmin(permissions.BasePermission):
     """Mock IsOwnerOrAdmin permission."""
     def has_object_permission(self, request, view, obj):
@@ -242,11 +234,15 @@ class SalonViewSet(viewsets.ModelViewSet):
     queryset = Salon.objects.select_related('owner', 'template').all().order_by('name')
     serializer_class = SalonSerializer
     lookup_field = 'pk' # Default lookup is by primary key (id)
+    # Keyset order for ?pagination=cursor (indexed, see Salon.Meta.indexes)
+    cursor_ordering = ('-created_at', '-id')
 
     # Configure filters and search
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    # Define which fields are searchable via the ?search= query parameter
-    search_fields = ['name', 'location', 'address', 'description', 'hero_subtitle', 'services_tagline', 'gallery_tagline'] # Added address for search
+    # SalonSearchFilter uses the full-text index (FTS5 / tsvector, see salons/search.py):
+    # prefix matching and results ranked by relevance unless ?ordering= is given
+    filter_backends = [SalonSearchFilter, filters.OrderingFilter]
+    # Columns covered by ?search= (the icontains fallback uses them when there is no index)
+    search_fields = SEARCH_FIELDS
 
     # Optional: Define which fields can be used for ordering via the ?ordering= query parameter
     # ordering_fields = ['name', 'location', 'created_at', 'claimed']
@@ -269,8 +265,39 @@ class SalonViewSet(viewsets.ModelViewSet):
                  queryset = queryset.filter(claimed=False)
              # Note: Invalid claimed_param values will just result in no filter applied by this logic
 
+        if self.action == 'list':
+            queryset = self.limit_columns(queryset)
         return queryset
 
+    def limit_columns(self, queryset):
+        """
+        Loads only the columns the list response needs (the compact card fields by default,
+        see SalonListSerializer and ?fields= / ?expand=), so the large text and JSON columns
+        stay in the database. The template/owner joins are only kept when those fields are shown,
+        the template join loads only the preview image when only template_preview_image is.
+        """
+        selected = SalonListSerializer.selected_field_names(self.request)
+        if selected is None:
+            return queryset
+        model_fields = {field.name for field in Salon._meta.concrete_fields}
+        related = [name for name in ('owner', 'template') if name in selected]
+        columns = selected & model_fields
+        if 'template_preview_image' in selected and 'template' not in selected:
+            related.append('template')
+            columns |= {'template', 'template__preview_image'}
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        # Cursor pagination reads its position from the ordering columns, keep them loaded
+        cursor_fields = {field.lstrip('-') for field in self.cursor_ordering}
+        return queryset.only(*(columns | cursor_fields))
+
+    def get_serializer_class(self):
+        # Compact cards for listings, the full salon everywhere else
+        if self.action == 'list':
+            return SalonListSerializer
+        return SalonSerializer
+
 
     def get_permissions(self):
         """
@@ -306,10 +333,10 @@ class SalonViewSet(viewsets.ModelViewSet):
 
     @extend_schema(
         tags=['Salons'], summary="List salons",
-        description="Returns a paginated list of salons with optional search, filtering, and ordering.",
+        description="Returns a paginated list of compact salon cards with optional search, filtering, ordering and field selection.",
         parameters=[
             OpenApiParameter(
-                name='search', description='Search term for salon name, location, address, description, or taglines.',
+                name='search', description='Search term for salon name, location, address, description, or taglines. Words match as prefixes; results are ordered by relevance unless ordering is given.',
                 required=False, type=str, location=OpenApiParameter.QUERY
             ),
             OpenApiParameter(name='limit', type=int, location=OpenApiParameter.QUERY, required=False, description='Number of results to return per page.'),
@@ -323,8 +350,16 @@ class SalonViewSet(viewsets.ModelViewSet):
                  name='claimed', description='Filter by claimed status (true or false).',
                  required=False, type=OpenApiTypes.BOOL, location=OpenApiParameter.QUERY
              ),
+            OpenApiParameter(
+                name='fields', description='Comma-separated salon fields to return instead of the compact card fields (e.g., id,name,services).',
+                required=False, type=str, location=OpenApiParameter.QUERY
+            ),
+            OpenApiParameter(
+                name='expand', description='Comma-separated salon fields to add to the compact card fields (e.g., template,gallery_images).',
+                required=False, type=str, location=OpenApiParameter.QUERY
+            ),
         ],
-        responses={200: SalonSerializer(many=True), 400: OpenApiResponse(ErrorSerializer, description="Invalid parameters")}
+        responses={200: SalonListSerializer(many=True), 400: OpenApiResponse(ErrorSerializer, description="Invalid parameters")}
     )
     def list(self, request, *args, **kwargs):
         # Frontend's API.salons.list({ search: '...' }) hits here.
@@ -335,19 +370,8 @@ class SalonViewSet(viewsets.ModelViewSet):
     @extend_schema(tags=['Salons'], summary="Create salon", description="Admin-only endpoint to create a new salon (sample site).", request=SalonSerializer, responses={201: SalonSerializer, 400: OpenApiResponse(ErrorSerializer, description="Invalid data"), 403: OpenApiResponse(ErrorSerializer, description="Forbidden - Admin only")})
     def create(self, request, *args, **kwargs):
         # Frontend could potentially hit this if an admin creates a sample site.
-        response = super().create(request, *args, **kwargs)
-        if response.status_code == status.HTTP_201_CREATED:
-             try:
-                # Update stats after successful creation
-                # Requires Stats model from core.models
-                Stats.objects.filter(pk=1).update(
-                    total_salons=F('total_salons') + 1,
-                    sample_sites=F('sample_sites') + 1,
-                    pending_contacts=F('pending_contacts') + 1
-                )
-             except Stats.DoesNotExist: print("Warning: Stats object with pk=1 not found during Salon creation.")
-             except Exception as e: print(f"ERROR updating stats during Salon creation: {e}")
-        return response
+        # Stats are counted by the post_save receiver in core/stats.py
+        return super().create(request, *args, **kwargs)
 
     @extend_schema(tags=['Salons'], summary="Retrieve salon", description="Get detailed information about a specific salon by ID.", responses={200: SalonSerializer, 404: OpenApiResponse(ErrorSerializer, description="Salon not found")})
     def retrieve(self, request, *args, **kwargs):
@@ -367,23 +391,8 @@ class SalonViewSet(viewsets.ModelViewSet):
     @extend_schema(tags=['Salons'], summary="Delete salon", description="Owner or admin can delete a salon by ID.", responses={204: OpenApiResponse(None, description="No content - Successfully deleted"), 403: OpenApiResponse(ErrorSerializer, description="Forbidden - Not owner/admin"), 404: OpenApiResponse(ErrorSerializer, description="Salon not found")})
     def destroy(self, request, *args, **kwargs):
         # Frontend portal/dashboard could hit this for deleting a salon
-        instance = self.get_object()
-        response = super().destroy(request, *args, **kwargs)
-        if response.status_code == status.HTTP_204_NO_CONTENT:
-            try:
-                # Update stats after successful deletion
-                 # Requires Stats model from core.models
-                update_fields = {
-                    'total_salons': F('total_salons') - 1,
-                    'sample_sites': F('sample_sites') - 1,
-                }
-                # Decrement pending contacts if the deleted salon was in that status
-                if instance.contact_status == 'notContacted':
-                    update_fields['pending_contacts'] = F('pending_contacts') - 1
-                Stats.objects.filter(pk=1).update(**update_fields)
-            except Stats.DoesNotExist: print("Warning: Stats object with pk=1 not found during Salon deletion.")
-            except Exception as e: print(f"ERROR updating stats during Salon deletion: {e}")
-        return response
+        # Stats are counted by the post_delete receiver in core/stats.py
+        return super().destroy(request, *args, **kwargs)
 
 
     # --- Custom Actions ---
@@ -393,9 +402,28 @@ class SalonViewSet(viewsets.ModelViewSet):
     def sample_lookup(self, request, sample_url=None):
         """Lookup a salon based on its sample_url slug."""
         # This action is hit by frontend's API.salons.getBySampleUrl(sampleUrl)
-        salon = get_object_or_404(self.get_queryset(), sample_url=sample_url)
-        serializer = self.get_serializer(salon) # Use the ViewSet's serializer
-        return Response(serializer.data)
+        # It's the hot path of every public salon site, so the serialized payload is cached
+        # (see salons/site_cache.py) and repeat visits are answered with a 304 when possible.
+        if 'fields' in request.query_params or 'expand' in request.query_params:
+            # Sparse fieldsets vary the payload, serve them uncached
+            salon = get_object_or_404(self.get_queryset(), sample_url=sample_url)
+            return Response(self.get_serializer(salon).data)
+
+        host = request.get_host()
+        cached = get_cached_site(sample_url, host)
+        if cached is None:
+            token = get_site_token(sample_url) # Read before the fetch, see cache_site()
+            salon = get_object_or_404(self.get_queryset(), sample_url=sample_url)
+            cached = cache_site(salon, host, self.get_serializer(salon).data, token)
+
+        response = get_conditional_response(request, etag=cached['etag'], last_modified=cached['last_modified'])
+        if response is None:
+            response = Response(cached['data'])
+        response['ETag'] = cached['etag']
+        response['Last-Modified'] = http_date(cached['last_modified'])
+        # Public data: any cache may keep it but must revalidate (cheap thanks to the ETag)
+        patch_cache_control(response, public=True, no_cache=True)
+        return response
 
     @extend_schema(tags=['Salons'], summary="Claim a salon", description="Authenticated users can claim an unclaimed sample salon by its ID.", responses={200: SalonSerializer, 400: OpenApiResponse(ErrorSerializer, description="Bad Request - Already claimed or owned"), 401: OpenApiResponse(ErrorSerializer, description="Unauthorized - Not authenticated"), 404: OpenApiResponse(ErrorSerializer, description="Salon not found")})
     @action(detail=True, methods=['post'])
@@ -412,7 +440,7 @@ class SalonViewSet(viewsets.ModelViewSet):
         if salon.claimed or salon.owner is not None:
             return Response({"detail": "This salon has already been claimed or assigned."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Store whether it was pending contact BEFORE updating, for stats
+        # Store whether it was pending contact BEFORE updating
         was_pending_contact = (salon.contact_status == 'notContacted')
 
         # Assign the user as the owner and mark as claimed
@@ -427,23 +455,9 @@ class SalonViewSet(viewsets.ModelViewSet):
         update_fields_list = ['owner', 'claimed', 'claimed_at', 'updated_at']
         if was_pending_contact:
              update_fields_list.append('contact_status')
+        # The save signals move the salon out of sample_sites (and pending_contacts) in Stats
         salon.save(update_fields=update_fields_list)
 
-
-        try:
-            # Update stats after successful claim
-            # Requires Stats model from core.models
-            # Decrement sample_sites count
-            update_stats_fields = {'sample_sites': F('sample_sites') - 1}
-            # If it was pending contact, decrement pending_contacts as well
-            if was_pending_contact:
-                 update_stats_fields['pending_contacts'] = F('pending_contacts') - 1
-
-            Stats.objects.filter(pk=1).update(**update_stats_fields)
-
-        except Stats.DoesNotExist: print("Warning: Stats object with pk=1 not found during Salon claim.")
-        except Exception as e: print(f"ERROR updating stats during Salon claim: {e}")
-
         # Re-fetch or serialize the updated instance to include latest changes and all fields
         salon.refresh_from_db() # Get the latest state from the db, including updated fields
         serializer = self.get_serializer(salon) # Serialize the updated salon object
@@ -473,20 +487,13 @@ class SalonViewSet(viewsets.ModelViewSet):
         )
 
         # Update the contact status for the filtered salons
-        updated_count = salons_to_update.update(contact_status='contacted')
+        # update() skips the save signals, so drop their cached site payloads explicitly
+        updated_ids = list(salons_to_update.values_list('pk', flat=True))
+        updated_count = Salon.objects.filter(pk__in=updated_ids, contact_status='notContacted').update(contact_status='contacted')
+        invalidate_salon_sites(updated_ids)
 
         # --- Update Stats ---
-        # We need to count how many were 'notContacted' before the update
-        # A more efficient way to update stats might involve F() expressions or signals,
-        # but recalculating here is simple after the update.
-        try:
-             # Requires Stats model from core.models
-            stats_obj = Stats.objects.get(pk=1)
-            # Recalculate the number of pending contacts directly from the DB
-            stats_obj.pending_contacts = Salon.objects.filter(contact_status='notContacted').count()
-            stats_obj.save(update_fields=['pending_contacts']) # Save only the updated field
-
-        except Stats.DoesNotExist: print("Warning: Stats object with pk=1 not found during contact_leads update.")
-        except Exception as e: print(f"ERROR updating pending contacts stats: {e}")
+        # Every updated salon was 'notContacted' before, no need to recount the table
+        adjust_stats(pending_contacts=-updated_count)
 
         return Response({"message": f"Successfully marked {updated_count} leads as contacted."}, status=status.HTTP_200_OK)
\ No newline at end of file
@@ -1,12 +1,12 @@
 from django.contrib import admin
 from django.urls import reverse # Needed to generate links
 from django.utils.html import format_html # Needed to render HTML links
-from .models import Visit
+from .models import Visit, DailyVisitSummary, DailyVisitRollup
 
 @admin.register(Visit)
 class VisitAdmin(admin.ModelAdmin):
     # Columns to display in the list view
-    list_display = ('path', 'timestamp', 'user_link', 'ip_address', 'session_key')
+    list_display = ('path', 'timestamp', 'user_link', 'ip_address', 'session_key', 'sample_weight')
 
     # Fields to filter the list view by
     list_filter = ('timestamp', 'user', 'ip_address')
@@ -18,7 +18,7 @@ class VisitAdmin(admin.ModelAdmin):
     date_hierarchy = 'timestamp'
 
     # Fields that cannot be edited in the detail view (all fields for Visit)
-    readonly_fields = ('path', 'timestamp', 'ip_address', 'user', 'session_key')
+    readonly_fields = ('path', 'timestamp', 'ip_address', 'user', 'session_key', 'sample_weight')
 
     # Disable Add, Change, and Delete permissions - visits should only be created by middleware
     def has_add_permission(self, request):
@@ -49,4 +49,32 @@ class VisitAdmin(admin.ModelAdmin):
     user_link.admin_order_field = 'user'
 
 
+@admin.register(DailyVisitSummary)
+class DailyVisitSummaryAdmin(admin.ModelAdmin):
+    list_display = ('day', 'visits', 'unique_ips', 'unique_sessions', 'unique_users', 'archived', 'computed_at')
+    list_filter = ('archived',)
+    date_hierarchy = 'day'
+
+    # Rollups are built by tracking.rollups / the rollup_visits command, never by hand
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DailyVisitRollup)
+class DailyVisitRollupAdmin(admin.ModelAdmin):
+    list_display = ('day', 'path', 'visits', 'unique_ips', 'unique_sessions', 'unique_users')
+    list_filter = ('day',)
+    search_fields = ('path',)
+    date_hierarchy = 'day'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 # Optional: Add custom actions, filters, or views later if needed for more complex reporting in admin
\ No newline at end of file
@@ -0,0 +1,136 @@
+import logging
+import queue
+
+from django.conf import settings
+
+from core.background import PeriodicWriter, ProcessWriter
+
+from .models import Visit
+
+logger = logging.getLogger(__name__)
+
+
+class VisitBuffer(PeriodicWriter):
+    """
+    In-process buffer for Visit rows written by the tracking middleware.
+
+    Requests only push an unsaved Visit onto a bounded queue; a background
+    writer thread (see core/background.py) drains the queue and saves the rows
+    with bulk_create, either when `batch_size` visits are waiting or every
+    `flush_interval` seconds. When the queue is full the visit is dropped and
+    counted instead of blocking the request.
+    """
+    thread_name = 'visit-buffer-writer'
+
+    def __init__(self, batch_size=100, flush_interval=2.0, max_queue_size=10000):
+        super().__init__(flush_interval)
+        self.batch_size = max(1, int(batch_size))
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self.dropped = 0 # Visits discarded because the queue was full
+        self.written = 0 # Visits successfully saved
+        self.failed = 0 # Visits that could not be saved, even on their own
+
+    def put(self, visit):
+        """Queue a visit for writing. Returns False if it had to be dropped."""
+        self.ensure_writer()
+        try:
+            self._queue.put_nowait(visit)
+        except queue.Full:
+            self.dropped += 1
+            # Log the first drop and then every 1000th so overload is visible without flooding the logs
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning(f"Visit buffer full, {self.dropped} visits dropped so far.")
+            return False
+
+        # Size threshold reached: wake the writer instead of waiting for the interval
+        if self._queue.qsize() >= self.batch_size:
+            self.wake()
+        return True
+
+    async def aput(self, visit):
+        """Async variant of put(). Queuing never blocks, so this doesn't wait on the database either."""
+        return self.put(visit)
+
+    def pending(self):
+        """Approximate number of visits waiting to be written."""
+        return self._queue.qsize()
+
+    def write_pending(self):
+        while True:
+            batch = self._drain()
+            if not batch:
+                break
+            self._write(batch)
+
+    def _write(self, batch):
+        """
+        Save a batch with bulk_create. If that fails, its halves are retried in turn,
+        so a bad row only costs itself instead of the whole batch.
+        """
+        try:
+            Visit.objects.bulk_create(batch, batch_size=self.batch_size)
+            self.written += len(batch)
+        except Exception as e:
+            # Never let a bad batch kill the writer thread
+            if len(batch) == 1:
+                self.failed += 1
+                logger.error(f"Error writing visit to {batch[0].path!r}, dropped: {e}", exc_info=True)
+                return
+            logger.warning(f"Error writing batch of {len(batch)} visits, retrying it in halves: {e}")
+            middle = len(batch) // 2
+            self._write(batch[:middle])
+            self._write(batch[middle:])
+
+    def _drain(self):
+        """Take up to batch_size visits off the queue without blocking."""
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+
+class SynchronousVisitWriter:
+    """Fallback used when buffering is disabled: saves each visit immediately."""
+
+    def __init__(self):
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+
+    def put(self, visit):
+        visit.save()
+        self.written += 1
+        return True
+
+    async def aput(self, visit):
+        await visit.asave()
+        self.written += 1
+        return True
+
+    def pending(self):
+        return 0
+
+    def flush(self):
+        pass
+
+
+def build_visit_writer():
+    if getattr(settings, 'TRACKING_BUFFER_ENABLED', True):
+        return VisitBuffer(
+            batch_size=getattr(settings, 'TRACKING_BATCH_SIZE', 100),
+            flush_interval=getattr(settings, 'TRACKING_FLUSH_INTERVAL', 2.0),
+            max_queue_size=getattr(settings, 'TRACKING_MAX_QUEUE_SIZE', 10000),
+        )
+    return SynchronousVisitWriter()
+
+
+# Rebuilt when a TRACKING_* setting is overridden (e.g. in tests)
+_visit_writer = ProcessWriter('TRACKING_', build_visit_writer)
+
+
+def get_visit_buffer():
+    """Returns the process-wide visit writer configured from settings."""
+    return _visit_writer.get()
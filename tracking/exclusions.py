@@ -0,0 +1,115 @@
+import re
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.db.models import Q
+from django.dispatch import receiver
+
+# Used when the TRACKING_EXCLUDED_* settings are not defined
+DEFAULT_EXCLUDED_PATH_PREFIXES = [
+    '/static/',
+    '/media/',
+    '/admin/',
+    '/api/schema/',
+    '/stripe/webhook/',
+    '/favicon.ico',
+    '/robots.txt',
+    '/__debug__/',
+]
+DEFAULT_EXCLUDED_METHODS = ['HEAD', 'OPTIONS']
+DEFAULT_EXCLUDED_USER_AGENTS = [
+    r'bot\b', 'crawler', 'spider', 'slurp', 'facebookexternalhit',
+    'ELB-HealthChecker', 'kube-probe', 'GoogleHC', 'UptimeRobot', 'Pingdom',
+]
+
+
+class TrackingExclusions:
+    """
+    Decides which requests the tracking middleware ignores and which paths the reports hide.
+
+    The path prefixes are compiled into one anchored regex and the user agent patterns into
+    one case-insensitive regex, so checking a request is a single match call per rule instead
+    of a loop over every prefix. Build it once (see get_tracking_exclusions) and reuse it.
+    """
+
+    def __init__(self, path_prefixes=(), methods=(), user_agents=(), report_path_prefixes=()):
+        self.path_prefixes = tuple(prefix for prefix in path_prefixes if prefix)
+        # Prefixes hidden from the reports: everything the middleware skips plus report-only ones
+        self.report_path_prefixes = self.path_prefixes + tuple(
+            prefix for prefix in report_path_prefixes if prefix and prefix not in self.path_prefixes
+        )
+        self.methods = frozenset(method.upper() for method in methods)
+
+        self._path_re = self._compile_prefixes(self.path_prefixes)
+        self._report_path_re = self._compile_prefixes(self.report_path_prefixes)
+        try:
+            self._user_agent_re = re.compile('|'.join(f'(?:{pattern})' for pattern in user_agents), re.IGNORECASE) if user_agents else None
+        except re.error as e:
+            raise ImproperlyConfigured(f"Invalid pattern in TRACKING_EXCLUDED_USER_AGENTS: {e}")
+
+    @staticmethod
+    def _compile_prefixes(prefixes):
+        if not prefixes:
+            return None
+        # Longest first so the alternation never stops at a shorter overlapping prefix
+        ordered = sorted(prefixes, key=len, reverse=True)
+        return re.compile('|'.join(re.escape(prefix) for prefix in ordered))
+
+    def excludes_path(self, path):
+        return bool(self._path_re and self._path_re.match(path))
+
+    def excludes_report_path(self, path):
+        return bool(self._report_path_re and self._report_path_re.match(path))
+
+    def excludes_method(self, method):
+        return method.upper() in self.methods
+
+    def excludes_user_agent(self, user_agent):
+        return bool(self._user_agent_re and user_agent and self._user_agent_re.search(user_agent))
+
+    def excludes_request(self, request):
+        """True if the request should not be recorded as a visit."""
+        return (
+            self.excludes_method(request.method)
+            or self.excludes_path(request.path)
+            or self.excludes_user_agent(request.META.get('HTTP_USER_AGENT', ''))
+        )
+
+    def report_path_filter(self):
+        """
+        Q matching the paths hidden from the reports, for querysets with a `path` field.
+        Rows recorded before a prefix was added to the settings are hidden this way too.
+        """
+        condition = Q()
+        for prefix in self.report_path_prefixes:
+            condition |= Q(path__startswith=prefix)
+        return condition
+
+
+_exclusions = None
+_exclusions_lock = threading.Lock()
+
+
+def get_tracking_exclusions():
+    """Returns the process-wide TrackingExclusions compiled from settings."""
+    global _exclusions
+    if _exclusions is None:
+        with _exclusions_lock:
+            if _exclusions is None:
+                _exclusions = TrackingExclusions(
+                    path_prefixes=getattr(settings, 'TRACKING_EXCLUDED_PATH_PREFIXES', DEFAULT_EXCLUDED_PATH_PREFIXES),
+                    methods=getattr(settings, 'TRACKING_EXCLUDED_METHODS', DEFAULT_EXCLUDED_METHODS),
+                    user_agents=getattr(settings, 'TRACKING_EXCLUDED_USER_AGENTS', DEFAULT_EXCLUDED_USER_AGENTS),
+                    report_path_prefixes=getattr(settings, 'TRACKING_REPORT_EXCLUDED_PATH_PREFIXES', []),
+                )
+    return _exclusions
+
+
+@receiver(setting_changed)
+def reset_tracking_exclusions(setting, **kwargs):
+    """Recompile on the next use when an exclusion setting is overridden (e.g. in tests)."""
+    global _exclusions
+    if setting.startswith('TRACKING_') and 'EXCLUDED' in setting:
+        _exclusions = None
@@ -0,0 +1,120 @@
+# tracking/management/commands/archive_visits.py
+
+import gzip
+import json
+import os
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+
+from tracking.models import Visit, DailyVisitSummary
+from tracking.rollups import day_bounds, ensure_rollups, today_utc
+
+ARCHIVE_FIELDS = ('id', 'path', 'timestamp', 'ip_address', 'user_id', 'session_key', 'sample_weight')
+
+
+class Command(BaseCommand):
+    help = (
+        'Moves raw visits older than the retention period to gzip\'d JSONL files (one per month) '
+        'and deletes them in chunks. The daily rollups are built first, so reports keep working.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=getattr(settings, 'TRACKING_RETENTION_DAYS', 180),
+            help='Keep raw visits for this many days (default: TRACKING_RETENTION_DAYS).'
+        )
+        parser.add_argument(
+            '--archive-dir',
+            type=str,
+            default=getattr(settings, 'TRACKING_ARCHIVE_DIR', None),
+            help='Directory for the visits-YYYY-MM.jsonl.gz files (default: TRACKING_ARCHIVE_DIR).'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Number of visits read and deleted per query (default: 5000).'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many visits would be archived.'
+        )
+
+    def handle(self, *args, **options):
+        retention_days = options['days']
+        archive_dir = options['archive_dir']
+        chunk_size = options['chunk_size']
+
+        if retention_days < 1:
+            raise CommandError('--days must be at least 1 (today is never archived).')
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+        if not archive_dir:
+            raise CommandError('No archive directory configured. Set TRACKING_ARCHIVE_DIR or pass --archive-dir.')
+
+        # Everything before the cutoff day gets archived
+        cutoff = today_utc() - timedelta(days=retention_days)
+        expired = Visit.objects.filter(timestamp__lt=day_bounds(cutoff)[0])
+
+        first_visit = expired.aggregate(first=Min('timestamp'))['first']
+        if first_visit is None:
+            self.stdout.write(self.style.SUCCESS(f'No visits before {cutoff} to archive.'))
+            return
+        first_day = first_visit.astimezone(dt_timezone.utc).date()
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'Dry run: {expired.count()} visits from {first_day} to {cutoff - timedelta(days=1)} would be archived to {archive_dir}.'))
+            return
+
+        # --- 1. Make sure every expired day has its rollup before the raw rows disappear ---
+        built = ensure_rollups(first_day, cutoff - timedelta(days=1))
+        if built:
+            self.stdout.write(f'Rolled up {len(built)} day(s) before archiving.')
+
+        os.makedirs(archive_dir, exist_ok=True)
+
+        # --- 2. Archive and delete day by day ---
+        # Working one day at a time keeps memory flat and means an interrupted run only ever
+        # leaves a single partially archived day behind (records carry their id to spot duplicates).
+        total_archived = 0
+        day = first_day
+        while day < cutoff:
+            archived = self.archive_day(day, archive_dir, chunk_size)
+            if archived:
+                self.stdout.write(f'  {day}: archived {archived} visits')
+                total_archived += archived
+            # Mark the day so its rollup is never rebuilt from the (now missing) raw rows
+            DailyVisitSummary.objects.filter(day=day).update(archived=True)
+            day += timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(f'Archived {total_archived} visits older than {cutoff} to {archive_dir}.'))
+
+    def archive_day(self, day, archive_dir, chunk_size):
+        """Appends one day's visits to its month file, then deletes them in chunks."""
+        start, end = day_bounds(day)
+        visits = Visit.objects.filter(timestamp__gte=start, timestamp__lt=end)
+        if not visits.exists():
+            return 0
+
+        # Each run appends a new gzip member, gzip readers treat the concatenation as one stream
+        path = os.path.join(archive_dir, f'visits-{day:%Y-%m}.jsonl.gz')
+        count = 0
+        with gzip.open(path, 'at', encoding='utf-8') as archive:
+            for visit in visits.order_by('id').values(*ARCHIVE_FIELDS).iterator(chunk_size=chunk_size):
+                visit['timestamp'] = visit['timestamp'].isoformat()
+                archive.write(json.dumps(visit) + '\n')
+                count += 1
+
+        # Delete by primary key in chunks to keep each transaction (and lock) short
+        while True:
+            ids = list(visits.order_by('id').values_list('id', flat=True)[:chunk_size])
+            if not ids:
+                break
+            Visit.objects.filter(id__in=ids).delete()
+        return count
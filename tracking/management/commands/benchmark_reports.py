@@ -0,0 +1,168 @@
+# tracking/management/commands/benchmark_reports.py
+
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models
+from django.test.utils import setup_databases, teardown_databases
+
+from tracking import reports
+from tracking.models import Visit, DailyVisitSummary, DailyVisitRollup
+from tracking.rollups import day_bounds, ensure_rollups, today_utc
+
+# The single-column indexes Visit had before the composite ones replaced them
+OLD_INDEXES = [
+    models.Index(fields=['path'], name='bench_visit_path_idx'),
+    models.Index(fields=['timestamp'], name='bench_visit_timestamp_idx'),
+    models.Index(fields=['ip_address'], name='bench_visit_ip_idx'),
+    models.Index(fields=['session_key'], name='bench_visit_session_idx'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Seeds a throwaway test database with visits and times every tracking report function, '
+        'once with the old single-column indexes and once with the current composite indexes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--visits', type=int, default=1_000_000, help='Number of visits to seed (default: 1,000,000).')
+        parser.add_argument('--days', type=int, default=30, help='Spread the visits over this many days up to today (default: 30).')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per function, the best time is reported (default: 3).')
+        parser.add_argument('--insert-sample', type=int, default=50_000, help='Visits inserted per layout to measure write cost (default: 50,000).')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for the generated data.')
+
+    def handle(self, *args, **options):
+        if options['visits'] < 1 or options['days'] < 1 or options['repeat'] < 1:
+            raise CommandError('--visits, --days and --repeat must be at least 1.')
+
+        # Never touch the real data: run everything against the test database
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+        try:
+            self.rng = random.Random(options['seed'])
+            self.seed_visits(options['visits'], options['days'])
+
+            start_date = today_utc() - timedelta(days=options['days'] - 1)
+            results = {}
+            for layout in ('old', 'new'):
+                self.apply_layout(layout)
+                results[layout] = self.run_layout(layout, start_date, options)
+            self.print_results(results)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+    # --- Data ---
+
+    def make_visits(self, count, days, users):
+        today = today_utc()
+        paths = [f'/salons/{i}/' for i in range(150)] + [f'/blog/post-{i}/' for i in range(50)] + ['/']
+        for _ in range(count):
+            day_start = day_bounds(today - timedelta(days=self.rng.randrange(days)))[0]
+            user = self.rng.choice(users) if self.rng.random() < 0.1 else None
+            yield Visit(
+                path=self.rng.choice(paths),
+                timestamp=day_start + timedelta(seconds=self.rng.randrange(86400)),
+                ip_address=f'10.{self.rng.randrange(80)}.{self.rng.randrange(256)}.{self.rng.randrange(1, 255)}',
+                user_id=user,
+                session_key=f'{self.rng.randrange(200_000):040x}',
+            )
+
+    def seed_visits(self, count, days):
+        User = get_user_model()
+        User.objects.bulk_create([User(username=f'bench-user-{i}', email=f'bench-user-{i}@example.com') for i in range(200)])
+        users = list(User.objects.values_list('pk', flat=True))
+        self.users = users
+
+        self.stdout.write(f'Seeding {count} visits over {days} days...')
+        started = time.perf_counter()
+        batch = []
+        for visit in self.make_visits(count, days, users):
+            batch.append(visit)
+            if len(batch) == 10_000:
+                Visit.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Visit.objects.bulk_create(batch)
+        self.stdout.write(f'  done in {time.perf_counter() - started:.1f}s')
+
+    # --- Index layouts ---
+
+    def apply_layout(self, layout):
+        """Swaps the Visit table between the old single-column and the current composite indexes."""
+        current, previous = (OLD_INDEXES, Visit._meta.indexes) if layout == 'old' else (Visit._meta.indexes, OLD_INDEXES)
+        with connection.schema_editor() as editor:
+            for index in previous:
+                editor.execute(f'DROP INDEX IF EXISTS {editor.quote_name(index.name)}')
+            for index in current:
+                editor.add_index(Visit, index)
+        if connection.vendor in ('sqlite', 'postgresql'):
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+    # --- Timing ---
+
+    def best_of(self, repeat, func, setup=None):
+        best = None
+        for _ in range(repeat):
+            if setup:
+                setup()
+            started = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def run_layout(self, layout, start_date, options):
+        repeat = options['repeat']
+        self.stdout.write(f'Timing with the {"old single-column" if layout == "old" else "composite"} indexes...')
+        timings = {}
+
+        def clear_rollups():
+            DailyVisitRollup.objects.all().delete()
+            DailyVisitSummary.objects.all().delete()
+
+        # Building the rollups is the heaviest raw read, it runs once per closed day
+        timings['ensure_rollups'] = self.best_of(repeat, lambda: ensure_rollups(start_date, None), setup=clear_rollups)
+
+        cases = {
+            'get_total_visits': lambda: reports.get_total_visits(start_date),
+            'get_visits_by_day': lambda: reports.get_visits_by_day(start_date),
+            'get_most_popular_pages': lambda: reports.get_most_popular_pages(start_date),
+            'get_unique_visitors_by_ip': lambda: reports.get_unique_visitors_by_ip(start_date),
+            'get_unique_visitors_by_ip(exact)': lambda: reports.get_unique_visitors_by_ip(start_date, exact=True),
+            'get_unique_visitors_by_session': lambda: reports.get_unique_visitors_by_session(start_date),
+            'get_unique_visitors_by_session(exact)': lambda: reports.get_unique_visitors_by_session(start_date, exact=True),
+            'get_unique_authenticated_users': lambda: reports.get_unique_authenticated_users(start_date),
+            'get_unique_authenticated_users(exact)': lambda: reports.get_unique_authenticated_users(start_date, exact=True),
+            'get_estimated_unique_visitors': lambda: reports.get_estimated_unique_visitors(start_date),
+            'get_estimated_unique_visitors(exact)': lambda: reports.get_estimated_unique_visitors(start_date, exact=True),
+            'get_report_overview': lambda: reports.get_report_overview(start_date),
+            'get_report_overview(exact)': lambda: reports.get_report_overview(start_date, exact=True),
+            # VisitListAPIView with ?path=, first page
+            'visit_list(path)': lambda: list(Visit.objects.filter(path='/salons/7/').order_by('-timestamp')[:50]),
+        }
+        for name, func in cases.items():
+            timings[name] = self.best_of(repeat, func)
+
+        # Write cost: every extra index is paid on each insert
+        sample = options['insert_sample']
+        if sample > 0:
+            visits = list(self.make_visits(sample, options['days'], self.users))
+            last_id = Visit.objects.order_by('-id').values_list('id', flat=True).first()
+            started = time.perf_counter()
+            Visit.objects.bulk_create(visits, batch_size=1000)
+            timings[f'bulk_create({sample})'] = time.perf_counter() - started
+            Visit.objects.filter(id__gt=last_id).delete()
+        return timings
+
+    def print_results(self, results):
+        self.stdout.write('')
+        self.stdout.write(f'{"function":<42}{"old (ms)":>12}{"new (ms)":>12}{"change":>10}')
+        for name, old in results['old'].items():
+            new = results['new'][name]
+            change = f'{(new - old) / old * 100:+.0f}%' if old else '-'
+            self.stdout.write(f'{name:<42}{old * 1000:>12.1f}{new * 1000:>12.1f}{change:>10}')
+        self.stdout.write(self.style.SUCCESS('Benchmark finished, the test database has been removed.'))
@@ -0,0 +1,121 @@
+# tracking/management/commands/benchmark_tracking_middleware.py
+
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, RequestFactory
+from django.test.utils import setup_databases, teardown_databases
+from django.utils.deprecation import MiddlewareMixin
+
+from tracking.buffer import get_visit_buffer
+from tracking.middleware import VisitorTrackingMiddleware
+
+
+class ThreadHopTrackingMiddleware(MiddlewareMixin):
+    """The previous shape of the middleware: a sync process_request that ASGI runs in a thread."""
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.tracker = VisitorTrackingMiddleware(lambda request: None)
+
+    def process_request(self, request):
+        self.tracker(request)
+
+
+class Command(BaseCommand):
+    help = (
+        'Pushes concurrent requests through VisitorTrackingMiddleware in a test database and '
+        'compares WSGI (threads), ASGI (native async) and ASGI with the old thread hop.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000, help='Requests per mode (default: 5000).')
+        parser.add_argument('--concurrency', type=int, default=50, help='Requests in flight at once (default: 50).')
+        parser.add_argument('--view-latency', type=float, default=5.0, help='Simulated view I/O time in ms (default: 5).')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests and --concurrency must be at least 1.')
+
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+        try:
+            results = {
+                'wsgi (threads)': self.run_wsgi(options),
+                'asgi (native async)': asyncio.run(self.run_asgi(VisitorTrackingMiddleware, options)),
+                'asgi (thread hop)': asyncio.run(self.run_asgi(ThreadHopTrackingMiddleware, options)),
+            }
+            get_visit_buffer().flush()
+            self.print_results(results, options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+    def prepare(self, request):
+        # What SessionMiddleware and AuthenticationMiddleware would have attached
+        request.session = SessionStore()
+        request.user = AnonymousUser()
+
+        async def auser():
+            return request.user
+        request.auser = auser
+        return request
+
+    def run_wsgi(self, options):
+        latency = options['view_latency'] / 1000
+
+        def view(request):
+            time.sleep(latency)
+            return HttpResponse()
+
+        middleware = VisitorTrackingMiddleware(view)
+        factory = RequestFactory()
+
+        def handle(i):
+            request = self.prepare(factory.get(f'/salons/{i % 100}/'))
+            started = time.perf_counter()
+            middleware(request)
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            latencies = list(pool.map(handle, range(options['requests'])))
+        return time.perf_counter() - started, latencies
+
+    async def run_asgi(self, middleware_class, options):
+        latency = options['view_latency'] / 1000
+
+        async def view(request):
+            await asyncio.sleep(latency)
+            return HttpResponse()
+
+        middleware = middleware_class(view)
+        factory = AsyncRequestFactory()
+        semaphore = asyncio.Semaphore(options['concurrency'])
+
+        async def handle(i):
+            async with semaphore:
+                request = self.prepare(factory.get(f'/salons/{i % 100}/'))
+                started = time.perf_counter()
+                await middleware(request)
+                return time.perf_counter() - started
+
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(handle(i) for i in range(options['requests'])))
+        return time.perf_counter() - started, latencies
+
+    def print_results(self, results, options):
+        self.stdout.write(
+            f"{options['requests']} requests, {options['concurrency']} concurrent, "
+            f"{options['view_latency']:g} ms simulated view latency"
+        )
+        self.stdout.write(f'{"mode":<24}{"req/s":>10}{"p50 (ms)":>12}{"p95 (ms)":>12}')
+        for mode, (elapsed, latencies) in results.items():
+            p50 = statistics.median(latencies) * 1000
+            p95 = statistics.quantiles(latencies, n=20)[-1] * 1000 if len(latencies) > 1 else p50
+            self.stdout.write(f'{mode:<24}{len(latencies) / elapsed:>10.0f}{p50:>12.2f}{p95:>12.2f}')
+        self.stdout.write(self.style.SUCCESS('Benchmark finished, the test database has been removed.'))
@@ -0,0 +1,65 @@
+# tracking/management/commands/rollup_visits.py
+
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tracking.models import DailyVisitSummary
+from tracking.rollups import ensure_rollups, first_open_day, rollup_day
+
+
+class Command(BaseCommand):
+    help = 'Builds the daily visit rollups used by the tracking reports (backfills missing days by default).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start-date',
+            type=str,
+            default=None,
+            help='First day to roll up (YYYY-MM-DD). Defaults to the oldest recorded visit.'
+        )
+        parser.add_argument(
+            '--end-date',
+            type=str,
+            default=None,
+            help='Last day to roll up (YYYY-MM-DD). Defaults to the last closed day; today (and yesterday, shortly after midnight) is never rolled up.'
+        )
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Recompute days that already have rollups instead of only filling in missing ones.'
+        )
+
+    def parse_date(self, value, name):
+        if value is None:
+            return None
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError(f'Invalid {name} "{value}". Use YYYY-MM-DD.')
+
+    def handle(self, *args, **options):
+        start_date = self.parse_date(options['start_date'], '--start-date')
+        end_date = self.parse_date(options['end_date'], '--end-date')
+
+        # Buffered visits of yesterday may still be arriving shortly after midnight, see first_open_day()
+        last_closed = first_open_day() - timedelta(days=1)
+        if end_date is None or end_date > last_closed:
+            end_date = last_closed
+        if start_date and start_date > end_date:
+            raise CommandError('--start-date cannot be after --end-date (or today).')
+
+        if options['rebuild']:
+            # Recompute days that were already rolled up, missing ones are filled in below
+            summaries = DailyVisitSummary.objects.filter(day__lte=end_date, archived=False)
+            if start_date:
+                summaries = summaries.filter(day__gte=start_date)
+            self.stdout.write(f'Rebuilding {summaries.count()} existing day(s)...')
+            for day in list(summaries.values_list('day', flat=True)):
+                rollup_day(day)
+
+        built = ensure_rollups(start_date, end_date)
+        for day in built:
+            self.stdout.write(f'  Rolled up {day}')
+
+        self.stdout.write(self.style.SUCCESS(f'Visit rollups up to date through {end_date} ({len(built)} new day(s)).'))
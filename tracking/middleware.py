@@ -1,67 +1,82 @@
 import logging
-from django.utils.deprecation import MiddlewareMixin
-from django.urls import resolve, Resolver404 # Useful for checking URL patterns, but simple path check is fine here
-from django.conf import settings
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.utils import timezone # Get current time consistently
+from core.http import get_client_ip
 from .models import Visit
+from .buffer import get_visit_buffer
+from .exclusions import get_tracking_exclusions
+from .sampling import get_visit_sampler
 
 # Configure a logger for your middleware
 logger = logging.getLogger(__name__)
 
-class VisitorTrackingMiddleware(MiddlewareMixin):
+class VisitorTrackingMiddleware:
     """
     Middleware to log incoming requests as 'Visit' objects.
-    Excludes static/media files, admin, and other configured paths.
+    Excludes static/media files, admin, bots and anything else configured in TRACKING_EXCLUDED_*.
     Captures path, user, IP, and session key.
+
+    Works both under WSGI and ASGI: when the rest of the chain is async the middleware runs
+    as a coroutine itself, so Django doesn't move every request to a worker thread for it,
+    and the visit is queued without awaiting any database write.
     """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Run as a coroutine when the next handler is one (ASGI), see __acall__
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        # Compile the exclusion rules at startup so a bad pattern fails early
+        get_tracking_exclusions()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        if self.should_track(request):
+            visit = self.build_visit(request, request.user)
+            if visit is not None:
+                self.queue_visit(visit)
+        return self.get_response(request)
 
-    def process_request(self, request):
-        # --- 1. Define Paths to Exclude ---
-        # Add any paths you don't want to track (e.g., static, admin, health checks)
-        # Use startswith for prefixes like /static/, /media/, /admin/
-        # Use exact matches for specific files like /favicon.ico
-        excluded_prefixes = [
-            settings.STATIC_URL,
-            settings.MEDIA_URL,
-            '/admin/',
-            '/api/schema/', # Exclude schema endpoints
-            '/stripe/webhook/', # Exclude webhook endpoint
-            '/favicon.ico', # Common static file
-            '/robots.txt', # Common static file
-            '/__debug__/', # Django debug toolbar if used
-             # Add prefixes for specific API endpoints you don't need to track, e.g.:
-             # '/api/status/'
-        ]
-        # Check if the current request path starts with any excluded prefix
-        if any(request.path.startswith(prefix) for prefix in excluded_prefixes):
-            # logger.debug(f"Excluding path from tracking: {request.path}")
-            return None # Don't process this request for tracking
-
-        # --- 2. Optional: Exclude specific HTTP methods ---
-        # By default, it tracks all methods (GET, POST, etc.). You might only want GET.
-        # if request.method != 'GET':
-        #     return None
-
-        # --- 3. Capture Data ---
+    async def __acall__(self, request):
+        if self.should_track(request):
+            # request.user would hit the database synchronously, auser() is its async twin
+            visit = self.build_visit(request, await request.auser())
+            if visit is not None:
+                await self.aqueue_visit(visit)
+        return await self.get_response(request)
+
+    def should_track(self, request):
+        # --- 1. Skip Excluded Requests ---
+        # Paths (static, admin, webhooks...), HTTP methods and user agents (bots, health checkers)
+        # come from the TRACKING_EXCLUDED_* settings, compiled once in tracking/exclusions.py.
+        # The same rules hide these paths from the reports. Excluded requests never load the user.
+        return not get_tracking_exclusions().excludes_request(request)
+
+    def build_visit(self, request, user):
+        """Returns the unsaved Visit for a tracked request, or None if sampling skips it."""
+        # --- 2. Capture Data ---
         # Get the full path including query string if needed, otherwise just path
         # tracked_path = request.get_full_path() # Use this for full URL
         tracked_path = request.path # Use this for path only
 
         # Get the user if authenticated
         # AuthenticationMiddleware must be before this middleware for request.user to be available
-        user = request.user if request.user.is_authenticated else None
-
-        # Get IP address
-        # This is tricky behind proxies (like Nginx).
-        # HTTP_X_FORWARDED_FOR is the standard header set by proxies.
-        # request.META['REMOTE_ADDR'] is the address of the direct client (Nginx in this case).
-        # Configure your web server (Nginx) to correctly set X-Forwarded-For.
-        ip_address = request.META.get('HTTP_X_FORWARDED_FOR')
-        if ip_address:
-            # X-Forwarded-For can contain a comma-separated list. The client's IP is typically first.
-            ip_address = ip_address.split(',')[0].strip()
-        else:
-            ip_address = request.META.get('REMOTE_ADDR')
+        if not user.is_authenticated:
+            user = None
+
+        # Sampling (TRACKING_SAMPLE_* settings): skip a share of the traffic at high volume.
+        # Kept visits carry the weight 1/rate so the reports can scale their counts back up.
+        sample_weight = get_visit_sampler().sample(tracked_path, is_authenticated=user is not None)
+        if sample_weight is None:
+            return None
+
+        # Get IP address (behind a proxy like Nginx, the first X-Forwarded-For entry)
+        ip_address = get_client_ip(request)
 
         # Get the session key
         # SessionMiddleware must be before this middleware for request.session to be available
@@ -71,25 +86,29 @@ class VisitorTrackingMiddleware(MiddlewareMixin):
         # If you need session_key for every visit, you might need to ensure session creation
         # or handle the None case. Default middleware often lazy-loads sessions.
 
-        # --- 4. Save the Visit ---
+        # Use user_id to avoid resolving the lazy user object again
+        return Visit(
+            path=tracked_path,
+            timestamp=timezone.now(), # Capture time now, not when the batch is written
+            ip_address=ip_address,
+            user_id=user.pk if user else None,
+            session_key=session_key,
+            sample_weight=sample_weight,
+        )
+
+    # --- 3. Queue the Visit ---
+    # The visit is handed to the in-process buffer and written later in a batch
+    # by the background writer (see tracking/buffer.py), so the request doesn't
+    # wait on the INSERT. Buffering errors are logged without stopping the request.
+    def queue_visit(self, visit):
         try:
-            Visit.objects.create(
-                path=tracked_path,
-                timestamp=timezone.now(), # Capture time now
-                ip_address=ip_address,
-                user=user,
-                session_key=session_key
-            )
-            # logger.debug(f"Logged visit: {tracked_path}")
+            get_visit_buffer().put(visit)
+            # logger.debug(f"Queued visit: {visit.path}")
         except Exception as e:
-            # Log any database saving errors without stopping the request
-            logger.error(f"Error logging visit for path {tracked_path}: {e}", exc_info=True)
-
+            logger.error(f"Error logging visit for path {visit.path}: {e}", exc_info=True)
 
-        # --- 5. Continue Request Processing ---
-        # Must return None or a HttpResponse object to continue the middleware chain.
-        return None
-
-    # process_response is not strictly needed for basic logging, but can be used
-    # def process_response(self, request, response):
-    #     return response
\ No newline at end of file
+    async def aqueue_visit(self, visit):
+        try:
+            await get_visit_buffer().aput(visit)
+        except Exception as e:
+            logger.error(f"Error logging visit for path {visit.path}: {e}", exc_info=True)
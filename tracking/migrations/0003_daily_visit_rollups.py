@@ -0,0 +1,48 @@
+# Generated by Django 5.2 on 2026-10-17 04:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyVisitSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('visits', models.PositiveIntegerField(default=0)),
+                ('unique_ips', models.PositiveIntegerField(default=0)),
+                ('unique_sessions', models.PositiveIntegerField(default=0)),
+                ('unique_users', models.PositiveIntegerField(default=0)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Daily Visit Summary',
+                'verbose_name_plural': 'Daily Visit Summaries',
+                'ordering': ['-day'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyVisitRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('path', models.CharField(max_length=255)),
+                ('visits', models.PositiveIntegerField(default=0)),
+                ('unique_ips', models.PositiveIntegerField(default=0)),
+                ('unique_sessions', models.PositiveIntegerField(default=0)),
+                ('unique_users', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Daily Visit Rollup',
+                'verbose_name_plural': 'Daily Visit Rollups',
+                'ordering': ['-day', '-visits'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'path'), name='unique_rollup_day_path')],
+            },
+        ),
+    ]
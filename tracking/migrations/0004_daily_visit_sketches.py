@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-17 04:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0003_daily_visit_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailyvisitsummary',
+            name='anonymous_session_sketch',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='dailyvisitsummary',
+            name='ip_sketch',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='dailyvisitsummary',
+            name='session_sketch',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='dailyvisitsummary',
+            name='user_sketch',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
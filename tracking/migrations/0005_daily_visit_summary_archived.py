@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-17 04:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0004_daily_visit_sketches'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailyvisitsummary',
+            name='archived',
+            field=models.BooleanField(default=False),
+        ),
+    ]
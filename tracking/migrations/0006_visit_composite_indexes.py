@@ -0,0 +1,44 @@
+# Generated by Django 5.2 on 2026-10-17 04:34
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0005_daily_visit_summary_archived'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='visit',
+            name='ip_address',
+            field=models.GenericIPAddressField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='visit',
+            name='path',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='visit',
+            name='session_key',
+            field=models.CharField(blank=True, max_length=40, null=True),
+        ),
+        migrations.AlterField(
+            model_name='visit',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='visit',
+            index=models.Index(fields=['timestamp', 'path'], name='visit_timestamp_path_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='visit',
+            index=models.Index(fields=['timestamp', 'session_key', 'ip_address', 'user'], name='visit_timestamp_visitor_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-17 04:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0006_visit_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='visit',
+            name='sample_weight',
+            field=models.FloatField(default=1.0),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-17 10:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0007_visit_sample_weight'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='visit',
+            name='visit_timestamp_visitor_idx',
+        ),
+        migrations.AddIndex(
+            model_name='visit',
+            index=models.Index(fields=['path', 'timestamp'], name='visit_path_timestamp_idx'),
+        ),
+    ]
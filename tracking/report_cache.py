@@ -0,0 +1,65 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .rollups import first_open_day
+
+# Bumped whenever rollups are rebuilt, so every cached report computed from the old rows is skipped
+GENERATION_KEY = 'tracking:report:generation'
+
+
+def get_report_cache():
+    return caches[getattr(settings, 'TRACKING_REPORT_CACHE_ALIAS', 'default')]
+
+
+def get_report_cache_ttl(end_date):
+    """Closed ranges never change once their days are rolled up; ranges including an open day do."""
+    if end_date is not None and end_date < first_open_day():
+        return getattr(settings, 'TRACKING_REPORT_CACHE_TTL', 60 * 60 * 24)
+    return getattr(settings, 'TRACKING_REPORT_CACHE_TTL_TODAY', 60)
+
+
+def report_cache_key(name, start_date, end_date, **params):
+    """Builds the cache key for a report from its normalized date range and options."""
+    cache = get_report_cache()
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # Start from the clock rather than 0 so an evicted counter never revives old entries
+        generation = int(time.time())
+        cache.add(GENERATION_KEY, generation, None)
+    parts = [
+        start_date.isoformat() if start_date else '-',
+        end_date.isoformat() if end_date else '-',
+    ] + [f"{key}={params[key]}" for key in sorted(params)]
+    return f"tracking:report:{name}:{generation}:{':'.join(parts)}"
+
+
+def get_cached_report(key):
+    """Returns the cached {'data', 'etag', 'last_modified'} entry for a key, or None."""
+    return get_report_cache().get(key)
+
+
+def cache_report(key, data, end_date):
+    """Stores a report's response data together with its validators and returns the entry."""
+    body = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True)
+    entry = {
+        'data': data,
+        'etag': '"%s"' % hashlib.md5(body.encode('utf-8')).hexdigest(),
+        'last_modified': int(timezone.now().timestamp()),
+    }
+    get_report_cache().set(key, entry, get_report_cache_ttl(end_date))
+    return entry
+
+
+def invalidate_report_cache():
+    """Makes every cached report stale (their keys are simply never read again and expire)."""
+    cache = get_report_cache()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError: # Counter was never set or got evicted
+        cache.set(GENERATION_KEY, int(time.time()), None)
@@ -1,65 +1,137 @@
-from django.db.models import Count, F
+from django.db.models import Count, F, Q, Sum
 # Truncation functions for grouping by time periods (day, month, etc.)
 from django.db.models.functions import TruncDay, TruncMonth
 from django.utils import timezone
-from datetime import timedelta, date # Import date for date object handling
+from datetime import timedelta, date, timezone as dt_timezone # Import date for date object handling
 
-from .models import Visit
+from .models import Visit, DailyVisitSummary, DailyVisitRollup
+from .exclusions import get_tracking_exclusions
+from .hll import HyperLogLog
+from .rollups import (
+    SKETCH_SOURCES, VISIT_COUNT, add_visit_to_sketches, day_bounds, ensure_rollups, merge_sketches,
+    round_visits, split_date_range, today_utc,
+)
 
 # Helper function to handle date filtering across report functions
 def filter_visits_by_date_range(queryset, start_date, end_date):
     """Helper to apply date range filtering to a Visit queryset."""
+    # day_bounds() gives aware UTC datetimes, plain dates would be compared as naive datetimes
     if start_date:
         # Filter from the start of the start_date
-        queryset = queryset.filter(timestamp__gte=start_date)
+        queryset = queryset.filter(timestamp__gte=day_bounds(start_date)[0])
     if end_date:
         # Filter up to the end of the end_date
-        # Add timedelta(days=1) and use __lt to include the whole end_date day
-        queryset = queryset.filter(timestamp__lt=end_date + timedelta(days=1))
+        # Use the start of the next day with __lt to include the whole end_date day
+        queryset = queryset.filter(timestamp__lt=day_bounds(end_date)[1])
     return queryset
 
+# Closed days are read from the DailyVisitSummary/DailyVisitRollup tables (see rollups.py),
+# only the open part of the range (today onwards, see split_date_range) is counted from raw Visit rows.
+def filter_rollups_by_date_range(queryset, start_date, closed_end):
+    """Helper to apply the closed part of a date range to a rollup/summary queryset."""
+    if start_date:
+        queryset = queryset.filter(day__gte=start_date)
+    return queryset.filter(day__lte=closed_end)
+
+def get_open_days(raw_start, end_date):
+    """Helper listing the days of the open part of a range that can have visits (up to today)."""
+    if raw_start is None:
+        return []
+    last_day = min(end_date, today_utc()) if end_date else today_utc()
+    return [raw_start + timedelta(days=offset) for offset in range((last_day - raw_start).days + 1)]
+
+def get_raw_visits_since(raw_start, end_date):
+    """Helper returning the raw visits in the open (not yet rolled up) part of a date range."""
+    queryset = Visit.objects.filter(timestamp__gte=day_bounds(raw_start)[0])
+    if end_date:
+        queryset = queryset.filter(timestamp__lt=day_bounds(end_date)[1])
+    return queryset
+
+# Unique counts default to merging the per-day HyperLogLog sketches (see hll.py), which costs the
+# same for any range. Pass exact=True to run the COUNT(DISTINCT) over the raw visits instead.
+# Days whose raw visits were archived (archive_visits) only have their sketches left: over a range
+# including any of them, exact=True falls back to the estimate rather than undercount.
+def estimate_unique_count(start_date, end_date, sketch_field):
+    """Helper returning the HyperLogLog estimate for one DailyVisitSummary sketch over a date range."""
+    ensure_rollups(start_date, end_date)
+    return merge_sketches(start_date, end_date, sketch_field).count()
+
+def includes_archived_days(start_date, end_date):
+    """Helper telling whether the raw visits of any day in a date range were archived."""
+    start_date, closed_end, _ = split_date_range(start_date, end_date)
+    if closed_end is None:
+        return False
+    return filter_rollups_by_date_range(DailyVisitSummary.objects.filter(archived=True), start_date, closed_end).exists()
+
 def get_total_visits(start_date=None, end_date=None):
     """
     Returns the total number of visits within a date range.
     Dates should be Python date objects.
     """
-    qs = Visit.objects.all()
-    qs = filter_visits_by_date_range(qs, start_date, end_date)
-    return qs.count()
+    ensure_rollups(start_date, end_date)
+    start_date, closed_end, raw_start = split_date_range(start_date, end_date)
+
+    total = 0
+    if closed_end:
+        summaries = filter_rollups_by_date_range(DailyVisitSummary.objects.all(), start_date, closed_end)
+        total += summaries.aggregate(total=Sum('visits'))['total'] or 0
+    if raw_start:
+        total += round_visits(get_raw_visits_since(raw_start, end_date).aggregate(total=VISIT_COUNT)['total'])
+    return total
 
 def get_visits_by_day(start_date=None, end_date=None):
     """
     Returns the count of visits grouped by day within a date range.
     Dates should be Python date objects.
     Returns a list of dictionaries like [{'day': date(YYYY, M, D), 'count': N}, ...].
+    Closed days come from the daily summaries, the open days (if in range) from raw visits.
     """
-    qs = Visit.objects.all()
-    qs = filter_visits_by_date_range(qs, start_date, end_date)
+    ensure_rollups(start_date, end_date)
+    start_date, closed_end, raw_start = split_date_range(start_date, end_date)
 
-    # Truncate timestamp to day, group by the truncated day, count visits, order chronologically
-    return qs.annotate(day=TruncDay('timestamp', tzinfo=timezone.utc)) \
-             .values('day') \
-             .annotate(count=Count('id')) \
-             .order_by('day')
+    days = []
+    if closed_end:
+        # Summaries also exist for days without visits, skip those like the raw GROUP BY would
+        summaries = filter_rollups_by_date_range(DailyVisitSummary.objects.filter(visits__gt=0), start_date, closed_end)
+        days.extend({'day': day, 'count': count} for day, count in summaries.order_by('day').values_list('day', 'visits'))
+    if raw_start:
+        # Truncate timestamp to day, group by the truncated day, count visits, order chronologically
+        qs = get_raw_visits_since(raw_start, end_date)
+        raw_days = qs.annotate(day=TruncDay('timestamp', tzinfo=dt_timezone.utc)) \
+                     .values('day') \
+                     .annotate(count=VISIT_COUNT) \
+                     .order_by('day')
+        days.extend({'day': entry['day'].date(), 'count': round_visits(entry['count'])} for entry in raw_days)
+    return days
 
 
-def get_unique_visitors_by_ip(start_date=None, end_date=None):
+def get_unique_visitors_by_ip(start_date=None, end_date=None, exact=False):
     """
     Returns the count of unique non-null IP addresses within a date range.
     Dates should be Python date objects.
+    Estimated from the daily sketches unless exact=True (and no day of the range is archived).
     """
-    qs = Visit.objects.exclude(ip_address__isnull=True).exclude(ip_address='') # Exclude null/empty IPs
+    if not exact or includes_archived_days(start_date, end_date):
+        return estimate_unique_count(start_date, end_date, 'ip_sketch')
+
+    # GenericIPAddressField stores blank IPs as NULL (and ip_address='' compiles to "= NULL",
+    # which matched nothing), so excluding NULL covers empty IPs as well
+    qs = Visit.objects.exclude(ip_address__isnull=True)
     qs = filter_visits_by_date_range(qs, start_date, end_date)
 
     # Use distinct() on values('ip_address') to count unique IPs
     return qs.values('ip_address').distinct().count()
 
-def get_unique_visitors_by_session(start_date=None, end_date=None):
+def get_unique_visitors_by_session(start_date=None, end_date=None, exact=False):
     """
     Returns the count of unique non-null session keys within a date range.
     Useful for estimating unique users who are NOT logged in.
     Dates should be Python date objects.
+    Estimated from the daily sketches unless exact=True (and no day of the range is archived).
     """
+    if not exact or includes_archived_days(start_date, end_date):
+        return estimate_unique_count(start_date, end_date, 'session_sketch')
+
     qs = Visit.objects.exclude(session_key__isnull=True).exclude(session_key='') # Exclude null/empty sessions
     qs = filter_visits_by_date_range(qs, start_date, end_date)
 
@@ -67,11 +139,15 @@ def get_unique_visitors_by_session(start_date=None, end_date=None):
     return qs.values('session_key').distinct().count()
 
 
-def get_unique_authenticated_users(start_date=None, end_date=None):
+def get_unique_authenticated_users(start_date=None, end_date=None, exact=False):
     """
     Returns the count of unique authenticated users who had visits within a date range.
     Dates should be Python date objects.
+    Estimated from the daily sketches unless exact=True (and no day of the range is archived).
     """
+    if not exact or includes_archived_days(start_date, end_date):
+        return estimate_unique_count(start_date, end_date, 'user_sketch')
+
     qs = Visit.objects.exclude(user__isnull=True) # Only include visits linked to a user
     qs = filter_visits_by_date_range(qs, start_date, end_date)
 
@@ -84,41 +160,56 @@ def get_most_popular_pages(start_date=None, end_date=None, limit=10):
     Dates should be Python date objects.
     Returns a list of dictionaries like [{'path': '/some-url/', 'count': N}, ...].
     """
-    qs = Visit.objects.all()
-    qs = filter_visits_by_date_range(qs, start_date, end_date)
+    ensure_rollups(start_date, end_date)
+    start_date, closed_end, raw_start = split_date_range(start_date, end_date)
+    return count_popular_pages(start_date, closed_end, raw_start, end_date, limit)
+
+def count_popular_pages(start_date, closed_end, raw_start, end_date, limit=10):
+    """
+    Helper behind get_most_popular_pages, taking an already split date range (see split_date_range).
+    Rollup counts for closed days and raw counts for the open days are read in a single UNION query.
+    """
+    # Hide the paths the middleware excludes (older rows may predate a rule) plus the
+    # report-only prefixes, see TRACKING_EXCLUDED_PATH_PREFIXES / TRACKING_REPORT_EXCLUDED_PATH_PREFIXES
+    excluded_paths = get_tracking_exclusions().report_path_filter()
 
-    # Group by path, count visits, order by count descending, and limit
-    # Exclude paths that are likely static or API endpoints if not already excluded by middleware
-    # This provides a second layer of filtering for paths that might slip through middleware
-    # Or if you want popular *API* endpoints, remove this exclusion.
-    # Adjust excluded_prefixes to match middleware or specific report needs
-    excluded_prefixes = [
-         '/static/',
-         '/media/',
-         '/admin/',
-         '/api/', # Exclude API endpoints from popular pages? Adjust as needed.
-         '/favicon.ico',
-         '/robots.txt',
-         '/__debug__/',
-     ]
-    for prefix in excluded_prefixes:
-         qs = qs.exclude(path__startswith=prefix)
-
-
-    return qs.values('path') \
-             .annotate(count=Count('id')) \
-             .order_by('-count')[:limit] # Get top N pages
+    # Group by path and count visits, from the rollups for closed days and raw rows for the open days
+    querysets = []
+    if closed_end:
+        rollups = filter_rollups_by_date_range(DailyVisitRollup.objects.all(), start_date, closed_end)
+        querysets.append(rollups.values('path').annotate(count=Sum('visits')))
+    if raw_start:
+        querysets.append(get_raw_visits_since(raw_start, end_date).values('path').annotate(count=VISIT_COUNT))
+    if not querysets:
+        return []
+
+    querysets = [qs.exclude(excluded_paths).order_by() for qs in querysets] # Compound queries can't order their parts
+    combined = querysets[0].union(*querysets[1:], all=True)
+
+    counts = {}
+    for row in combined:
+        counts[row['path']] = counts.get(row['path'], 0) + row['count']
+
+    # Order by count descending, and limit (raw counts are summed sample weights)
+    counts = {path: round_visits(count) for path, count in counts.items()}
+    popular = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:limit] # Get top N pages
+    return [{'path': path, 'count': count} for path, count in popular]
 
 
 # --- Example of combining unique counts for a rough "Total Unique Visitors" ---
 # Note: This is just an *estimate*. A user might clear cookies (new session_key),
 # switch networks (new IP), log in/out (new user link vs session).
 # True unique visitor tracking across long periods is complex.
-def get_estimated_unique_visitors(start_date=None, end_date=None):
+def get_estimated_unique_visitors(start_date=None, end_date=None, exact=False):
     """
     Provides a rough estimate of unique visitors by combining authenticated users and unique sessions for unauthenticated visits.
     This is not a perfect measure due to IP changes, session expiry/deletion, etc.
+    The two parts are estimated from the daily sketches unless exact=True (and no day of the range is archived).
     """
+    if not exact or includes_archived_days(start_date, end_date):
+        return (estimate_unique_count(start_date, end_date, 'user_sketch')
+                + estimate_unique_count(start_date, end_date, 'anonymous_session_sketch'))
+
     qs = Visit.objects.all()
     qs = filter_visits_by_date_range(qs, start_date, end_date)
 
@@ -133,4 +224,124 @@ def get_estimated_unique_visitors(start_date=None, end_date=None):
     num_unique_sessions = unique_sessions_qs.count()
 
     # Return the sum as an estimate
-    return num_unique_users + num_unique_sessions
\ No newline at end of file
+    return num_unique_users + num_unique_sessions
+
+
+# --- Combined report engine ---
+# ReportOverviewAPIView used to call six of the functions above, each re-filtering Visit by the
+# same range. get_report_overview() computes the same numbers in a fixed number of queries
+# (three for a range that includes today, two otherwise), however long the range is:
+#   1. the DailyVisitSummary rows of the closed days (histogram, totals and sketches),
+#   2. one pass over the raw visits (the open days' visits grouped by day and visitor, or in
+#      exact mode a single conditional aggregation with every distinct count),
+#   3. the popular pages UNION query from count_popular_pages().
+# Closed days that haven't been rolled up yet are built first, which costs extra queries once.
+# A range starting before the first summary costs one more (indexed) query checking that no raw
+# visits precede it.
+
+EXACT_UNIQUE_AGGREGATES = {
+    'unique_ips': Count('ip_address', distinct=True),
+    'unique_sessions': Count('session_key', distinct=True, filter=~Q(session_key='')),
+    'unique_authenticated_users': Count('user', distinct=True),
+    'unique_anonymous_sessions': Count('session_key', distinct=True, filter=Q(user__isnull=True) & ~Q(session_key='')),
+}
+
+def load_daily_summaries(start_date, closed_end, with_sketches=True):
+    """
+    Helper returning the DailyVisitSummary rows (as dicts, oldest first) for the closed part
+    of a range, rolling up any missing days first.
+    """
+    if closed_end is None:
+        return []
+    if start_date is None:
+        ensure_rollups(None, closed_end) # Unknown number of days, let ensure_rollups find the first one
+
+    fields = ['day', 'visits', 'archived'] + (list(SKETCH_SOURCES) if with_sketches else [])
+    summaries = filter_rollups_by_date_range(DailyVisitSummary.objects.all(), start_date, closed_end)
+    rows = list(summaries.order_by('day').values(*fields))
+
+    if start_date is not None:
+        # Days before the tracked history have no rows (see ensure_rollups): a range starting
+        # before the first summary is only incomplete if raw visits precede that summary
+        first_day = rows[0]['day'] if rows else closed_end + timedelta(days=1)
+        expected_days = (closed_end - max(start_date, first_day)).days + 1
+        missing_sketches = with_sketches and any(row['ip_sketch'] is None for row in rows)
+        if (
+            len(rows) < expected_days or missing_sketches
+            or (start_date < first_day and filter_visits_by_date_range(Visit.objects.all(), start_date, first_day - timedelta(days=1)).exists())
+        ):
+            ensure_rollups(start_date, closed_end)
+            rows = list(summaries.order_by('day').values(*fields))
+    return rows
+
+def get_report_overview(start_date=None, end_date=None, exact=False, popular_limit=10):
+    """
+    Returns every metric of the tracking overview for a date range in one go:
+    total_visits, unique_ips, unique_sessions, unique_authenticated_users,
+    estimated_unique_visitors, visits_by_day and popular_pages.
+    Dates should be Python date objects. Unique counts are HyperLogLog estimates unless exact=True.
+    A range including archived days is estimated anyway, exact_unique_counts says which it was.
+    Visit counts are scaled by the sample weights; unique counts only see the sampled visitors.
+    """
+    range_start, closed_end, raw_start = split_date_range(start_date, end_date)
+    summaries = load_daily_summaries(range_start, closed_end, with_sketches=not exact)
+    if exact and any(row['archived'] for row in summaries):
+        # The raw visits of those days are gone, only their sketches can count them
+        exact = False
+        summaries = load_daily_summaries(range_start, closed_end)
+
+    visits_by_day = [{'day': row['day'], 'count': row['visits']} for row in summaries if row['visits']]
+    total_visits = sum(row['visits'] for row in summaries)
+
+    open_visits = {} # Summed sample weights of the open days (today, and yesterday during the grace period)
+    if exact:
+        # One scan of the raw range: every distinct count plus each open day's visits via conditional aggregation
+        qs = filter_visits_by_date_range(Visit.objects.all(), start_date, end_date)
+        aggregates = dict(EXACT_UNIQUE_AGGREGATES)
+        open_days = get_open_days(raw_start, end_date)
+        for day in open_days:
+            day_start, day_end = day_bounds(day)
+            aggregates[f'visits_{day:%Y%m%d}'] = Sum('sample_weight', filter=Q(timestamp__gte=day_start, timestamp__lt=day_end))
+        counts = qs.aggregate(**aggregates)
+        open_visits = {day: counts.pop(f'visits_{day:%Y%m%d}') for day in open_days}
+    else:
+        sketches = {field: HyperLogLog() for field in SKETCH_SOURCES}
+        for row in summaries:
+            for field, sketch in sketches.items():
+                sketch.merge(HyperLogLog.from_bytes(row[field]))
+
+        if raw_start:
+            # The open days' visits grouped by day and visitor: the group sizes give the counts, the keys feed the sketches
+            visitors = get_raw_visits_since(raw_start, end_date).order_by() \
+                           .annotate(day=TruncDay('timestamp', tzinfo=dt_timezone.utc)) \
+                           .values('day', 'ip_address', 'session_key', 'user_id') \
+                           .annotate(count=VISIT_COUNT)
+            for visitor in visitors:
+                day = visitor['day'].date()
+                open_visits[day] = open_visits.get(day, 0) + visitor['count']
+                add_visit_to_sketches(sketches, visitor['ip_address'], visitor['session_key'], visitor['user_id'])
+
+        counts = {
+            'unique_ips': sketches['ip_sketch'].count(),
+            'unique_sessions': sketches['session_sketch'].count(),
+            'unique_authenticated_users': sketches['user_sketch'].count(),
+            'unique_anonymous_sessions': sketches['anonymous_session_sketch'].count(),
+        }
+
+    for day in sorted(open_visits):
+        count = round_visits(open_visits[day])
+        if count:
+            visits_by_day.append({'day': day, 'count': count})
+            total_visits += count
+
+    return {
+        'total_visits': total_visits,
+        'unique_ips': counts['unique_ips'],
+        'unique_sessions': counts['unique_sessions'],
+        'unique_authenticated_users': counts['unique_authenticated_users'],
+        # Same estimate as get_estimated_unique_visitors(): users plus anonymous sessions
+        'estimated_unique_visitors': counts['unique_authenticated_users'] + counts['unique_anonymous_sessions'],
+        'exact_unique_counts': exact,
+        'visits_by_day': visits_by_day,
+        'popular_pages': count_popular_pages(range_start, closed_end, raw_start, end_date, popular_limit),
+    }
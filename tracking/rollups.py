@@ -0,0 +1,209 @@
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min, Q, Sum
+from django.utils import timezone
+
+from .hll import HyperLogLog
+from .models import Visit, DailyVisitSummary, DailyVisitRollup
+
+# Visits are counted by summing their sample weights rather than rows, so sampled traffic
+# (see tracking/sampling.py) is scaled back up. Unsampled visits weigh 1.0.
+VISIT_COUNT = Sum('sample_weight')
+
+# Unique counts skip empty session keys the same way the raw report functions do
+# (blank IPs are already stored as NULL by GenericIPAddressField)
+ROLLUP_AGGREGATES = {
+    'visits': VISIT_COUNT,
+    'unique_ips': Count('ip_address', distinct=True),
+    'unique_sessions': Count('session_key', distinct=True, filter=~Q(session_key='')),
+    'unique_users': Count('user', distinct=True),
+}
+
+# Values fed into each DailyVisitSummary sketch, mirroring the filters of the exact report functions
+SKETCH_SOURCES = {
+    'ip_sketch': lambda qs: qs.exclude(ip_address__isnull=True).values_list('ip_address', flat=True),
+    'session_sketch': lambda qs: qs.exclude(session_key__isnull=True).exclude(session_key='').values_list('session_key', flat=True),
+    'user_sketch': lambda qs: qs.exclude(user__isnull=True).values_list('user_id', flat=True),
+    'anonymous_session_sketch': lambda qs: qs.filter(user__isnull=True).exclude(session_key__isnull=True).exclude(session_key='').values_list('session_key', flat=True),
+}
+
+
+def add_visit_to_sketches(sketches, ip_address, session_key, user_id):
+    """Adds one visitor to a {sketch field: HyperLogLog} dict, with the same rules as SKETCH_SOURCES."""
+    if ip_address is not None:
+        sketches['ip_sketch'].add(ip_address)
+    if session_key:
+        sketches['session_sketch'].add(session_key)
+        if user_id is None:
+            sketches['anonymous_session_sketch'].add(session_key)
+    if user_id is not None:
+        sketches['user_sketch'].add(user_id)
+
+
+def round_visits(total):
+    """Rounds a summed sample weight (None for no rows) to a whole visit count."""
+    return int(round(total or 0))
+
+
+def today_utc():
+    """The current UTC day. Rollups only ever cover days before this one."""
+    return timezone.now().astimezone(dt_timezone.utc).date()
+
+
+def get_rollup_grace():
+    """
+    How long after its end a day may still get visits: buffered visits (tracking/buffer.py) reach
+    the database up to TRACKING_FLUSH_INTERVAL late, per worker, plus TRACKING_ROLLUP_GRACE_MARGIN.
+    """
+    seconds = getattr(settings, 'TRACKING_FLUSH_INTERVAL', 2.0) + getattr(settings, 'TRACKING_ROLLUP_GRACE_MARGIN', 60)
+    return timedelta(seconds=seconds)
+
+
+def first_open_day():
+    """
+    The first UTC day that is not closed yet: today, or yesterday until the grace period after
+    midnight has passed. Only the days before it are rolled up (and then never rebuilt).
+    """
+    return (timezone.now() - get_rollup_grace()).astimezone(dt_timezone.utc).date()
+
+
+def day_bounds(day):
+    """Returns the aware [start, end) datetimes covering a UTC day."""
+    start = datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def split_date_range(start_date, end_date):
+    """
+    Splits a report range into the closed part served by rollups and the open part
+    (today onwards, and yesterday during the grace period, see first_open_day()) that still
+    has to be read from raw Visit rows.
+    Returns (closed_start, closed_end, raw_start); any part may be None if empty.
+    closed_start is None when the range is unbounded on the left.
+    """
+    open_day = first_open_day()
+    closed_end = open_day - timedelta(days=1)
+    if end_date is not None and end_date < closed_end:
+        closed_end = end_date
+    if start_date is not None and start_date > closed_end:
+        closed_end = None # Range lies entirely in the open days/the future
+
+    raw_start = None
+    if end_date is None or end_date >= open_day:
+        raw_start = max(start_date, open_day) if start_date else open_day
+
+    return start_date, closed_end, raw_start
+
+
+def rollup_day(day):
+    """
+    (Re)builds the summary and per-path rollup rows for a single day from raw visits.
+    Archived days are left untouched.
+    """
+    if DailyVisitSummary.objects.filter(day=day, archived=True).exists():
+        return 0 # Raw visits are gone, rebuilding would wipe the rollup
+
+    start, end = day_bounds(day)
+    qs = Visit.objects.filter(timestamp__gte=start, timestamp__lt=end)
+
+    rows = [
+        DailyVisitRollup(day=day, **dict(row, visits=round_visits(row['visits'])))
+        for row in qs.order_by().values('path').annotate(**ROLLUP_AGGREGATES)
+    ]
+    if rows:
+        totals = qs.aggregate(**ROLLUP_AGGREGATES)
+        totals['visits'] = round_visits(totals['visits'])
+        totals.update((field, sketch.to_bytes()) for field, sketch in build_sketches(qs).items())
+    else:
+        # No visits: skip the aggregates and sketches, the zero row only marks the day as rolled up
+        totals = dict.fromkeys(ROLLUP_AGGREGATES, 0)
+        totals.update(dict.fromkeys(SKETCH_SOURCES, b'')) # Zero-length data loads as an empty sketch
+
+    with transaction.atomic():
+        DailyVisitRollup.objects.filter(day=day).delete()
+        DailyVisitRollup.objects.bulk_create(rows, batch_size=500)
+        summary, created = DailyVisitSummary.objects.update_or_create(day=day, defaults=totals)
+
+    if not created:
+        # A day that was already rolled up changed, cached reports covering it are stale
+        from .report_cache import invalidate_report_cache # Local import to avoid circular deps
+        invalidate_report_cache()
+    return len(rows)
+
+
+def get_first_tracked_day():
+    """The first day with tracking data: the oldest raw visit or (once archived) summary, or None."""
+    first_visit = Visit.objects.aggregate(first=Min('timestamp'))['first']
+    first_summary = DailyVisitSummary.objects.aggregate(first=Min('day'))['first']
+    days = [day for day in (first_visit and first_visit.astimezone(dt_timezone.utc).date(), first_summary) if day]
+    return min(days) if days else None
+
+
+def ensure_rollups(start_date=None, end_date=None):
+    """
+    Rolls up every closed day in the range that doesn't have a summary yet.
+    Already rolled-up days are left alone, so after the first call this only
+    processes the days that closed since the last one. Returns the days built.
+    The range is clamped to the tracked history: no rows are made up for the days
+    before the first visit, however early start_date is.
+    """
+    start_date, closed_end, _ = split_date_range(start_date, end_date)
+    if closed_end is None:
+        return []
+
+    first_day = get_first_tracked_day()
+    if first_day is None:
+        return []
+    start_date = first_day if start_date is None else max(start_date, first_day)
+    if start_date > closed_end:
+        return []
+
+    # Summaries rolled up before sketches existed are rebuilt as well (unless already archived)
+    done = set(
+        DailyVisitSummary.objects.filter(day__gte=start_date, day__lte=closed_end)
+        .filter(Q(ip_sketch__isnull=False) | Q(archived=True))
+        .values_list('day', flat=True)
+    )
+    built = []
+    day = start_date
+    while day <= closed_end:
+        if day not in done:
+            rollup_day(day)
+            built.append(day)
+        day += timedelta(days=1)
+    return built
+
+
+def build_sketches(queryset):
+    """Builds one HyperLogLog per SKETCH_SOURCES entry from a Visit queryset."""
+    return {
+        field: HyperLogLog().update(source(queryset).order_by().distinct().iterator())
+        for field, source in SKETCH_SOURCES.items()
+    }
+
+
+def merge_sketches(start_date, end_date, field):
+    """
+    Returns a HyperLogLog of the distinct values of one sketch field over a date range:
+    the stored sketches of the closed days merged with a sketch of today's raw visits.
+    Expects ensure_rollups() to have run for the range.
+    """
+    start_date, closed_end, raw_start = split_date_range(start_date, end_date)
+    sketch = HyperLogLog()
+
+    if closed_end:
+        summaries = DailyVisitSummary.objects.filter(day__lte=closed_end)
+        if start_date:
+            summaries = summaries.filter(day__gte=start_date)
+        for data in summaries.values_list(field, flat=True).iterator():
+            sketch.merge(HyperLogLog.from_bytes(data))
+
+    if raw_start:
+        qs = Visit.objects.filter(timestamp__gte=day_bounds(raw_start)[0])
+        if end_date:
+            qs = qs.filter(timestamp__lt=day_bounds(end_date)[1])
+        sketch.update(SKETCH_SOURCES[field](qs).order_by().distinct().iterator())
+
+    return sketch
@@ -0,0 +1,82 @@
+import random
+import re
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+
+class VisitSampler:
+    """
+    Decides whether the tracking middleware records a request, and with which weight.
+
+    A request under a path prefix in `prefix_rates` is kept with that probability (the
+    longest matching prefix wins), anything else with `rate`. Authenticated requests are
+    always kept when `always_authenticated` is set. A kept visit gets the weight 1 / rate,
+    so summing the weights gives an unbiased estimate of the real number of requests.
+    """
+
+    def __init__(self, rate=1.0, prefix_rates=None, always_authenticated=True):
+        self.rate = self._check_rate(rate, 'TRACKING_SAMPLE_RATE')
+        self.prefix_rates = {
+            prefix: self._check_rate(prefix_rate, f'TRACKING_SAMPLE_RATES[{prefix!r}]')
+            for prefix, prefix_rate in (prefix_rates or {}).items() if prefix
+        }
+        self.always_authenticated = always_authenticated
+
+        # One anchored regex for every prefix, longest first so the most specific prefix matches
+        ordered = sorted(self.prefix_rates, key=len, reverse=True)
+        self._prefix_re = re.compile('|'.join(re.escape(prefix) for prefix in ordered)) if ordered else None
+
+    @staticmethod
+    def _check_rate(rate, name):
+        rate = float(rate)
+        if not 0.0 <= rate <= 1.0:
+            raise ImproperlyConfigured(f"{name} must be between 0 and 1, got {rate}.")
+        return rate
+
+    def rate_for(self, path):
+        if self._prefix_re:
+            match = self._prefix_re.match(path)
+            if match:
+                return self.prefix_rates[match.group(0)]
+        return self.rate
+
+    def sample(self, path, is_authenticated=False):
+        """Returns the weight to record the visit with, or None if it isn't sampled."""
+        if is_authenticated and self.always_authenticated:
+            return 1.0
+        rate = self.rate_for(path)
+        if rate >= 1.0:
+            return 1.0
+        if rate <= 0.0 or random.random() >= rate:
+            return None
+        return 1.0 / rate
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def get_visit_sampler():
+    """Returns the process-wide VisitSampler configured from settings."""
+    global _sampler
+    if _sampler is None:
+        with _sampler_lock:
+            if _sampler is None:
+                _sampler = VisitSampler(
+                    rate=getattr(settings, 'TRACKING_SAMPLE_RATE', 1.0),
+                    prefix_rates=getattr(settings, 'TRACKING_SAMPLE_RATES', {}),
+                    always_authenticated=getattr(settings, 'TRACKING_SAMPLE_ALWAYS_AUTHENTICATED', True),
+                )
+    return _sampler
+
+
+@receiver(setting_changed)
+def reset_visit_sampler(setting, **kwargs):
+    """Rebuild the sampler on the next use when a sampling setting is overridden (e.g. in tests)."""
+    global _sampler
+    if setting.startswith('TRACKING_SAMPLE'):
+        _sampler = None
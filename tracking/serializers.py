@@ -0,0 +1,12 @@
+from rest_framework import serializers
+
+from .models import Visit
+
+
+class VisitSerializer(serializers.ModelSerializer):
+    """Read-only representation of a raw Visit row."""
+
+    class Meta:
+        model = Visit
+        fields = ['id', 'path', 'timestamp', 'ip_address', 'user', 'session_key', 'sample_weight']
+        read_only_fields = fields
@@ -1,3 +1,499 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import time as time_module
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .buffer import VisitBuffer
+from .hll import HyperLogLog
+from .models import Visit, DailyVisitRollup, DailyVisitSummary
+from .reports import (
+    get_report_overview,
+    get_total_visits,
+    get_visits_by_day,
+    get_unique_visitors_by_ip,
+    get_unique_visitors_by_session,
+    get_unique_authenticated_users,
+    get_most_popular_pages,
+    get_estimated_unique_visitors,
+)
+from .report_cache import get_report_cache_ttl
+from .rollups import ensure_rollups, get_rollup_grace, rollup_day, today_utc
+
+User = get_user_model()
+
+
+@override_settings(TRACKING_BUFFER_ENABLED=False)
+class ReportOverviewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', email='admin@example.com', password='password', is_staff=True)
+        cls.member = User.objects.create_user(username='member', email='member@example.com', password='password')
+
+        now = timezone.now()
+        visits = []
+        for days_ago in range(0, 45):
+            for i in range(days_ago % 4 + 1):
+                visits.append(Visit(
+                    path=f'/page-{i}/',
+                    timestamp=now - timedelta(days=days_ago),
+                    ip_address=f'10.0.0.{i}',
+                    session_key=f'session-{days_ago % 7}-{i}',
+                    user=cls.member if i == 0 else None,
+                ))
+        visits.append(Visit(path='/api/salons/', timestamp=now, ip_address='10.0.0.9'))
+        Visit.objects.bulk_create(visits)
+
+        cls.end_date = today_utc()
+        cls.start_date = cls.end_date - timedelta(days=29)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_overview_matches_individual_reports(self):
+        report = get_report_overview(self.start_date, self.end_date, exact=True)
+
+        self.assertEqual(report['total_visits'], get_total_visits(self.start_date, self.end_date))
+        self.assertEqual(report['unique_ips'], get_unique_visitors_by_ip(self.start_date, self.end_date, exact=True))
+        self.assertEqual(report['unique_sessions'], get_unique_visitors_by_session(self.start_date, self.end_date, exact=True))
+        self.assertEqual(report['unique_authenticated_users'], get_unique_authenticated_users(self.start_date, self.end_date, exact=True))
+        self.assertEqual(report['estimated_unique_visitors'], get_estimated_unique_visitors(self.start_date, self.end_date, exact=True))
+        self.assertEqual(report['visits_by_day'], get_visits_by_day(self.start_date, self.end_date))
+        self.assertEqual(report['popular_pages'], get_most_popular_pages(self.start_date, self.end_date))
+
+    def test_estimated_unique_counts_are_close_to_exact(self):
+        exact = get_report_overview(self.start_date, self.end_date, exact=True)
+        estimated = get_report_overview(self.start_date, self.end_date)
+
+        self.assertEqual(estimated['total_visits'], exact['total_visits'])
+        for key in ('unique_ips', 'unique_sessions', 'unique_authenticated_users', 'estimated_unique_visitors'):
+            self.assertAlmostEqual(estimated[key], exact[key], delta=max(1, exact[key] * 0.05))
+
+    def test_overview_query_count_does_not_grow_with_range(self):
+        ensure_rollups(self.end_date - timedelta(days=364), self.end_date)
+
+        for days in (7, 30, 365):
+            start_date = self.end_date - timedelta(days=days - 1)
+            for exact in (False, True):
+                with self.subTest(days=days, exact=exact):
+                    # Closed-day summaries, one pass over raw visits, popular pages, and for the
+                    # year (which starts before the first visit) a check for older raw visits
+                    with self.assertNumQueries(3 if days < 45 else 4):
+                        get_report_overview(start_date, self.end_date, exact=exact)
+
+    def test_overview_query_count_for_closed_range(self):
+        end_date = self.end_date - timedelta(days=1)
+        ensure_rollups(end_date - timedelta(days=29), end_date)
+
+        # No raw visits to scan in estimated mode: summaries and popular pages only
+        with self.assertNumQueries(2):
+            get_report_overview(end_date - timedelta(days=29), end_date)
+
+    def test_overview_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+
+        response = client.get(reverse('tracking-api:report_overview'), {
+            'start_date': self.start_date.strftime('%Y-%m-%d'),
+            'end_date': self.end_date.strftime('%Y-%m-%d'),
+            'exact': 'true',
+        })
+
+        self.assertEqual(response.status_code, 200)
+        report = get_report_overview(self.start_date, self.end_date, exact=True)
+        self.assertEqual(response.data['unique_ips'], report['unique_ips'])
+        self.assertTrue(response.data['exact_unique_counts'])
+        self.assertEqual(len(response.data['visits_by_day']), 30)
+        self.assertNotIn('/api/salons/', [page['path'] for page in response.data['popular_pages']])
+
+    def test_overview_requires_admin(self):
+        client = APIClient()
+        client.force_authenticate(self.member)
+
+        response = client.get(reverse('tracking-api:report_overview'))
+
+        self.assertEqual(response.status_code, 403)
+
+
+class HyperLogLogTests(SimpleTestCase):
+    def test_counts_are_within_the_error_bound(self):
+        for n in (10, 1000, 50000):
+            with self.subTest(n=n):
+                sketch = HyperLogLog().update(f'10.0.{i // 256}.{i % 256}' for i in range(n))
+                # Three standard errors (1.6% each) for precision 12
+                self.assertAlmostEqual(sketch.count(), n, delta=max(1, n * 0.05))
+
+    def test_merge_is_the_union(self):
+        first = HyperLogLog().update(range(0, 6000))
+        second = HyperLogLog().update(range(4000, 10000))
+        merged = HyperLogLog().merge(first).merge(second)
+        self.assertAlmostEqual(merged.count(), 10000, delta=500)
+        self.assertEqual(merged.registers, HyperLogLog().update(range(10000)).registers)
+
+        with self.assertRaises(ValueError):
+            first.merge(HyperLogLog(precision=10))
+
+    def test_serialization_round_trip(self):
+        self.assertEqual(HyperLogLog().to_bytes(), b'')
+        self.assertEqual(HyperLogLog.from_bytes(b'').count(), 0)
+        self.assertEqual(HyperLogLog.from_bytes(None).count(), 0)
+
+        for n, max_size in ((5, 15), (100, 300), (20000, 4096)):
+            with self.subTest(n=n):
+                sketch = HyperLogLog().update(range(n))
+                data = sketch.to_bytes()
+                self.assertLessEqual(len(data), max_size) # Sparse until the dense registers are smaller
+                self.assertEqual(HyperLogLog.from_bytes(data).registers, sketch.registers)
+
+        with self.assertRaises(ValueError):
+            HyperLogLog.from_bytes(b'\x00\x01')
+
+
+@override_settings(TRACKING_BUFFER_ENABLED=False)
+class RollupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = today_utc()
+        noon = datetime.combine(self.today, time(12), tzinfo=dt_timezone.utc)
+        Visit.objects.bulk_create([
+            Visit(path='/a/', timestamp=noon - timedelta(days=5), ip_address='10.0.0.1', session_key='s1'),
+            Visit(path='/a/', timestamp=noon - timedelta(days=5), ip_address='10.0.0.2', session_key='s2'),
+            Visit(path='/b/', timestamp=noon - timedelta(days=5), ip_address='10.0.0.1', session_key='s1', sample_weight=2.0),
+            Visit(path='/a/', timestamp=noon - timedelta(days=2), ip_address='10.0.0.3'),
+        ])
+
+    def test_rollup_day_totals(self):
+        day = self.today - timedelta(days=5)
+        self.assertEqual(rollup_day(day), 2)
+
+        summary = DailyVisitSummary.objects.get(day=day)
+        self.assertEqual((summary.visits, summary.unique_ips, summary.unique_sessions), (4, 2, 2))
+        self.assertEqual(HyperLogLog.from_bytes(summary.ip_sketch).count(), 2)
+        self.assertEqual(
+            sorted(DailyVisitRollup.objects.filter(day=day).values_list('path', 'visits')), [('/a/', 2), ('/b/', 2)]
+        )
+
+    def test_ensure_rollups_is_clamped_to_the_first_visit(self):
+        built = ensure_rollups(date(2000, 1, 1), self.today)
+
+        first_day = self.today - timedelta(days=5)
+        self.assertEqual(built, [first_day + timedelta(days=i) for i in range(5)])
+        self.assertEqual(ensure_rollups(date(2000, 1, 1), self.today), []) # Nothing left to build
+
+        # Days without visits only get a zero row marking them done, without sketch data
+        empty = DailyVisitSummary.objects.get(day=self.today - timedelta(days=4))
+        self.assertEqual(empty.visits, 0)
+        self.assertEqual(bytes(empty.ip_sketch), b'')
+        self.assertFalse(DailyVisitRollup.objects.filter(day=empty.day).exists())
+
+    def test_yesterday_stays_open_until_buffered_visits_are_written(self):
+        midnight = datetime.combine(self.today, time.min, tzinfo=dt_timezone.utc)
+        yesterday = self.today - timedelta(days=1)
+        with mock.patch('django.utils.timezone.now', return_value=midnight + timedelta(seconds=10)):
+            before = get_report_overview(yesterday, self.today)
+            # A visit of 23:59:59 still in a worker's buffer at the first dashboard load after midnight
+            Visit.objects.create(path='/late/', timestamp=midnight - timedelta(seconds=1), ip_address='10.0.0.9')
+            during = get_report_overview(yesterday, self.today)
+            # Cached like a range including today, not for a day
+            self.assertEqual(get_report_cache_ttl(yesterday), get_report_cache_ttl(self.today))
+        self.assertFalse(DailyVisitSummary.objects.filter(day=yesterday).exists())
+        self.assertEqual(during['total_visits'], before['total_visits'] + 1)
+        self.assertEqual(during['visits_by_day'][-1], {'day': yesterday, 'count': 1})
+
+        with mock.patch('django.utils.timezone.now', return_value=midnight + get_rollup_grace() + timedelta(seconds=1)):
+            after = get_report_overview(yesterday, self.today)
+        self.assertEqual(DailyVisitSummary.objects.get(day=yesterday).visits, 1)
+        self.assertEqual(after['visits_by_day'], during['visits_by_day'])
+
+    def test_ensure_rollups_without_visits_builds_nothing(self):
+        Visit.objects.all().delete()
+        self.assertEqual(ensure_rollups(date(2000, 1, 1), self.today), [])
+        self.assertFalse(DailyVisitSummary.objects.exists())
+
+    def test_overview_endpoint_rejects_long_ranges(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='admin', password='password', is_staff=True))
+
+        with self.settings(TRACKING_REPORT_MAX_DAYS=30):
+            response = client.get(reverse('tracking-api:report_overview'), {'start_date': '2000-01-01'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(DailyVisitSummary.objects.exists())
+
+
+@override_settings(TRACKING_BUFFER_ENABLED=False, TRACKING_REPORT_CACHE_TTL=3600, TRACKING_REPORT_CACHE_TTL_TODAY=30)
+class ReportCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', email='admin@example.com', password='password', is_staff=True)
+        Visit.objects.create(path='/salons/', ip_address='10.0.0.1', session_key='session-1')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.url = reverse('tracking-api:report_overview')
+
+    def test_repeated_range_is_served_from_cache(self):
+        with mock.patch('tracking.views_api.get_report_overview', wraps=get_report_overview) as overview:
+            first = self.client.get(self.url)
+            second = self.client.get(self.url)
+
+        self.assertEqual(overview.call_count, 1)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first['ETag'], second['ETag'])
+        self.assertIn('Last-Modified', first)
+
+    def test_matching_etag_returns_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_ttl_depends_on_whether_range_includes_today(self):
+        today = today_utc()
+
+        self.assertEqual(get_report_cache_ttl(today - timedelta(days=1)), 3600)
+        self.assertEqual(get_report_cache_ttl(today), 30)
+        self.assertEqual(get_report_cache_ttl(None), 30)
+
+
+@override_settings(TRACKING_BUFFER_ENABLED=False)
+class ArchiveVisitsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        now = timezone.now()
+        Visit.objects.bulk_create(
+            [Visit(path='/old/', timestamp=now - timedelta(days=40 + i % 3), ip_address=f'10.0.0.{i}') for i in range(9)]
+            + [Visit(path='/recent/', timestamp=now - timedelta(days=2), ip_address='10.0.1.1')]
+        )
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir)
+
+    def test_archives_old_visits_and_keeps_report_totals(self):
+        # A sampled visit standing for 4
+        Visit.objects.create(path='/old/', timestamp=timezone.now() - timedelta(days=41), ip_address='10.0.2.1', sample_weight=4)
+        start_date = today_utc() - timedelta(days=60)
+        before = get_report_overview(start_date, today_utc(), exact=True)
+
+        call_command('archive_visits', days=30, archive_dir=self.archive_dir, chunk_size=4, stdout=io.StringIO())
+
+        self.assertEqual(list(Visit.objects.values_list('path', flat=True)), ['/recent/'])
+        archived = []
+        for name in os.listdir(self.archive_dir):
+            with gzip.open(os.path.join(self.archive_dir, name), 'rt') as archive:
+                archived.extend(json.loads(line) for line in archive)
+        self.assertEqual(len(archived), 10)
+        self.assertEqual(sorted(visit['sample_weight'] for visit in archived), [1.0] * 9 + [4.0])
+
+        after = get_report_overview(start_date, today_utc())
+        self.assertEqual(after['total_visits'], before['total_visits'])
+        self.assertEqual(after['visits_by_day'], before['visits_by_day'])
+        self.assertEqual(after['popular_pages'], before['popular_pages'])
+
+    def test_exact_counts_over_archived_days_fall_back_to_the_sketches(self):
+        start_date = today_utc() - timedelta(days=60)
+        call_command('archive_visits', days=30, archive_dir=self.archive_dir, stdout=io.StringIO())
+
+        # The raw visits of the archived days are gone, COUNT(DISTINCT) would only see '/recent/'
+        report = get_report_overview(start_date, today_utc(), exact=True)
+        self.assertFalse(report['exact_unique_counts'])
+        self.assertEqual(report['unique_ips'], 10)
+        self.assertEqual(get_unique_visitors_by_ip(start_date, today_utc(), exact=True), 10)
+
+        recent_start = today_utc() - timedelta(days=7)
+        report = get_report_overview(recent_start, today_utc(), exact=True)
+        self.assertTrue(report['exact_unique_counts'])
+        self.assertEqual(report['unique_ips'], 1)
+
+    def test_archived_days_are_not_rebuilt(self):
+        old_day = (timezone.now() - timedelta(days=40)).date()
+        call_command('archive_visits', days=30, archive_dir=self.archive_dir, stdout=io.StringIO())
+
+        rollup_day(old_day)
+
+        summary = DailyVisitSummary.objects.get(day=old_day)
+        self.assertTrue(summary.archived)
+        self.assertEqual(summary.visits, 3)
+
+
+@override_settings(TRACKING_BUFFER_ENABLED=False)
+class TrackingExclusionTests(TestCase):
+    def test_excluded_requests_are_not_recorded(self):
+        self.client.get('/admin/login/')
+        self.client.head('/')
+        self.client.get('/', HTTP_USER_AGENT='Mozilla/5.0 (compatible; Googlebot/2.1)')
+        self.client.get('/', HTTP_USER_AGENT='ELB-HealthChecker/2.0')
+        self.assertEqual(Visit.objects.count(), 0)
+
+        self.client.get('/', HTTP_USER_AGENT='Mozilla/5.0 (X11; Linux x86_64)')
+        self.assertEqual(list(Visit.objects.values_list('path', flat=True)), ['/'])
+
+    async def test_async_requests_are_recorded(self):
+        # AsyncClient runs the ASGI handler, where the middleware runs as a coroutine
+        await self.async_client.get('/', headers={'user-agent': 'ELB-HealthChecker/2.0'})
+        await self.async_client.get('/blog/')
+        self.assertEqual([visit.path async for visit in Visit.objects.all()], ['/blog/'])
+
+    @override_settings(TRACKING_EXCLUDED_PATH_PREFIXES=['/private/'], TRACKING_REPORT_EXCLUDED_PATH_PREFIXES=['/api/'])
+    def test_settings_are_shared_with_reports(self):
+        self.client.get('/private/page/')
+        self.assertEqual(Visit.objects.count(), 0)
+
+        now = timezone.now()
+        Visit.objects.bulk_create([
+            Visit(path='/private/old/', timestamp=now), # Recorded before the rule existed
+            Visit(path='/api/salons/', timestamp=now),
+            Visit(path='/salons/', timestamp=now),
+        ])
+        pages = get_most_popular_pages(today_utc(), today_utc())
+        self.assertEqual([page['path'] for page in pages], ['/salons/'])
+
+
+@override_settings(TRACKING_BUFFER_ENABLED=False, TRACKING_SAMPLE_RATE=0.5, TRACKING_SAMPLE_RATES={'/salons/': 0.25})
+class VisitSamplingTests(TestCase):
+    def test_sampled_visits_are_weighted_in_reports(self):
+        with mock.patch('tracking.sampling.random.random', return_value=0.1):
+            self.client.get('/salons/1/')
+            self.client.get('/blog/')
+        with mock.patch('tracking.sampling.random.random', return_value=0.9):
+            self.client.get('/salons/2/') # Not sampled
+
+        self.assertEqual(
+            sorted(Visit.objects.values_list('path', 'sample_weight')),
+            [('/blog/', 2.0), ('/salons/1/', 4.0)],
+        )
+        today = today_utc()
+        self.assertEqual(get_total_visits(today, today), 6)
+        self.assertEqual(get_report_overview(today, today)['total_visits'], 6)
+        self.assertEqual(get_most_popular_pages(today, today)[0], {'path': '/salons/1/', 'count': 4})
+
+    def test_authenticated_users_are_always_recorded(self):
+        user = User.objects.create_user(username='sampled', email='sampled@example.com', password='password')
+        self.client.force_login(user)
+        with mock.patch('tracking.sampling.random.random', return_value=0.99):
+            self.client.get('/salons/1/')
+        self.assertEqual(list(Visit.objects.values_list('user', 'sample_weight')), [(user.pk, 1.0)])
+
+
+# The listing requests themselves must not be tracked
+@override_settings(TRACKING_BUFFER_ENABLED=False, TRACKING_EXCLUDED_PATH_PREFIXES=['/api/'])
+class VisitListTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create_user(username='admin', email='admin@example.com', password='password', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+        now = timezone.now()
+        Visit.objects.bulk_create([Visit(path=f'/page-{i}/', timestamp=now - timedelta(minutes=i)) for i in range(25)])
+        self.url = reverse('tracking-api:visit_list')
+
+    def test_cursor_pagination_walks_every_visit_without_counting(self):
+        paths = []
+        url, params = self.url, {'pagination': 'cursor'}
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, params)
+            self.assertFalse(any('COUNT(' in query['sql'] for query in queries.captured_queries))
+            self.assertNotIn('count', response.data)
+            paths.extend(visit['path'] for visit in response.data['results'])
+            url, params = response.data['next'], None
+        self.assertEqual(paths, [f'/page-{i}/' for i in range(25)])
+
+    def test_count_modes(self):
+        response = self.client.get(self.url, {'count': 'none', 'offset': 20})
+        self.assertNotIn('count', response.data)
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertIsNone(response.data['next'])
+
+        # Off PostgreSQL the "estimate" is a capped count, and says so
+        response = self.client.get(self.url, {'count': 'estimate'})
+        self.assertEqual((response.data['count'], response.data['count_mode']), (25, 'exact'))
+        self.assertFalse(response.data['count_estimated'])
+        self.assertIsNotNone(response.data['next'])
+        with mock.patch('core.pagination.COUNT_ESTIMATE_CAP', 10):
+            response = self.client.get(self.url, {'count': 'estimate'})
+        self.assertEqual((response.data['count'], response.data['count_mode']), (10, 'at_least'))
+
+        self.assertEqual(self.client.get(self.url).data['count'], 25)
+
+
+# Real writer threads: their own DB connection must see (and commit) the rows, hence no TestCase transaction
+class VisitBufferTests(TransactionTestCase):
+    def wait_for(self, condition, timeout=5):
+        deadline = time_module.monotonic() + timeout
+        while not condition():
+            if time_module.monotonic() > deadline:
+                self.fail("Timed out waiting for the visit buffer")
+            time_module.sleep(0.01)
+
+    def make_buffer(self, **kwargs):
+        buffer = VisitBuffer(**kwargs)
+        self.addCleanup(buffer.flush)
+        return buffer
+
+    def test_full_batch_is_written_without_waiting_for_the_interval(self):
+        buffer = self.make_buffer(batch_size=3, flush_interval=3600)
+        for i in range(3):
+            buffer.put(Visit(path=f'/page-{i}/'))
+
+        self.wait_for(lambda: buffer.written == 3)
+        self.assertEqual(Visit.objects.count(), 3)
+        self.assertEqual(buffer.pending(), 0)
+
+    def test_partial_batch_is_written_after_the_interval(self):
+        buffer = self.make_buffer(batch_size=100, flush_interval=0.05)
+        buffer.put(Visit(path='/page/'))
+
+        self.wait_for(lambda: buffer.written == 1)
+        self.assertEqual(list(Visit.objects.values_list('path', flat=True)), ['/page/'])
+
+    def test_visits_beyond_the_queue_size_are_dropped_and_counted(self):
+        buffer = self.make_buffer(batch_size=100, flush_interval=3600, max_queue_size=2)
+        with self.assertLogs('tracking.buffer', 'WARNING'):
+            results = [buffer.put(Visit(path=f'/page-{i}/')) for i in range(3)]
+
+        self.assertEqual(results, [True, True, False])
+        self.assertEqual((buffer.dropped, buffer.pending()), (1, 2))
+        buffer.flush()
+        self.assertEqual(Visit.objects.count(), 2)
+
+    def test_writer_is_restarted_in_a_forked_process(self):
+        buffer = self.make_buffer(batch_size=1, flush_interval=3600)
+        buffer.put(Visit(path='/parent/'))
+        parent_thread = buffer._thread
+
+        buffer._pid = -1 # As seen from a child process: the parent's writer thread didn't survive the fork
+        buffer.put(Visit(path='/child/'))
+
+        self.assertIsNot(buffer._thread, parent_thread)
+        self.assertTrue(buffer._thread.is_alive())
+        self.wait_for(lambda: buffer.written == 2)
+
+    def test_a_bad_row_only_loses_itself(self):
+        buffer = self.make_buffer(batch_size=9, flush_interval=3600) # One batch, the writer isn't woken
+        visits = [Visit(path=f'/page-{i}/') for i in range(7)]
+        visits.insert(3, Visit(path=None)) # NOT NULL violation fails the batch INSERT
+        for visit in visits:
+            buffer.put(visit)
+
+        with self.assertLogs('tracking.buffer', 'WARNING'):
+            buffer.flush()
+
+        self.assertEqual((buffer.written, buffer.failed), (7, 1))
+        self.assertEqual(Visit.objects.count(), 7)
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views_api import ReportOverviewAPIView # Import your API view(s)
+from .views_api import ReportOverviewAPIView, VisitListAPIView # Import your API view(s)
 
 # Define the app namespace for DRF and URL reversing
 app_name = 'tracking_api'
@@ -7,6 +7,8 @@ app_name = 'tracking_api'
 urlpatterns = [
     # Maps requests to /api/tracking/overview/ (because it will be included under 'api/tracking/')
     path('overview/', ReportOverviewAPIView.as_view(), name='report_overview'),
+    # Raw visit listing (admin), supports ?pagination=cursor for deep pages
+    path('visits/', VisitListAPIView.as_view(), name='visit_list'),
 
     # Add other paths here if you create more API views in views_api.py
     # path('popular-pages/', PopularPagesAPIView.as_view(), name='popular_pages'),
@@ -1,20 +1,22 @@
 from rest_framework.views import APIView
+from rest_framework.generics import ListAPIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAdminUser, IsAuthenticated # Adjust permissions as needed
 from rest_framework.exceptions import ParseError # More specific error for bad input
 
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
 from datetime import datetime, date, timedelta
 
-from .reports import (
-    get_total_visits,
-    get_visits_by_day,
-    get_unique_visitors_by_ip,
-    get_unique_visitors_by_session, # Added unique sessions
-    get_unique_authenticated_users,
-    get_most_popular_pages,
-    get_estimated_unique_visitors # Added estimated unique visitors
-)
+# The individual get_* report functions are still available in .reports for other callers
+from .models import Visit
+from .reports import get_report_overview
+from .rollups import day_bounds
+from .serializers import VisitSerializer
+from .report_cache import cache_report, get_cached_report, report_cache_key
 
 # Helper to parse date query parameters
 def parse_date_params(request):
@@ -48,7 +50,9 @@ class ReportOverviewAPIView(APIView):
     API endpoint to get an overview of key visit metrics.
     Requires admin or staff user permission to access detailed stats.
     Supports optional 'start_date' and 'end_date' query parameters (YYYY-MM-DD).
-    Defaults to last 30 days if no dates are provided.
+    Defaults to last 30 days if no dates are provided; ranges longer than TRACKING_REPORT_MAX_DAYS are rejected.
+    Unique counts are estimated from daily HyperLogLog sketches; pass 'exact=true' for exact counts
+    (still estimated when the range includes archived days, see 'exact_unique_counts').
     """
     # Adjust permission class based on who should see these stats
     # IsAdminUser is for Django admin users
@@ -57,6 +61,38 @@ class ReportOverviewAPIView(APIView):
     permission_classes = [IsAdminUser] # Requires superuser or staff status
 
 
+    def build_report(self, start_date, end_date, exact):
+        """Computes the response data for a range (used on a report cache miss)."""
+        # --- Fetch Data using the combined report engine ---
+        # All metrics come from a fixed number of queries regardless of the range length
+        report = get_report_overview(start_date, end_date, exact=exact, popular_limit=10)
+
+        # --- Format Data for Response ---
+        # visits_by_day returns date objects, format them as strings (YYYY-MM-DD)
+        formatted_visits_by_day = [
+            {'day': entry['day'].strftime('%Y-%m-%d'), 'count': entry['count']}
+            for entry in report['visits_by_day']
+        ]
+
+        # popular_pages is already formatted as list of dicts, no change needed
+
+        # --- Construct Response Data ---
+        return {
+            "total_visits": report['total_visits'],
+            "unique_ips": report['unique_ips'], # May not be useful for dashboard, keep for admin?
+            "unique_authenticated_users": report['unique_authenticated_users'], # Might be useful
+            "estimated_unique_visitors": report['estimated_unique_visitors'], # Good for overall dashboard metric
+            "exact_unique_counts": report['exact_unique_counts'], # False when the unique counts above are sketch estimates
+
+            "visits_by_day": formatted_visits_by_day,
+            "popular_pages": report['popular_pages'],
+
+            "date_range": {
+                "start_date": start_date.strftime('%Y-%m-%d') if start_date else None,
+                "end_date": end_date.strftime('%Y-%m-%d') if end_date else None,
+            }
+        }
+
     def get(self, request, *args, **kwargs):
         try:
             start_date, end_date = parse_date_params(request)
@@ -82,44 +118,35 @@ class ReportOverviewAPIView(APIView):
         if start_date and end_date and start_date > end_date:
              return Response({"error": "start_date cannot be after end_date."}, status=status.HTTP_400_BAD_REQUEST)
 
+        # Bound the range: every closed day in it may have to be rolled up on a cache miss
+        max_days = getattr(settings, 'TRACKING_REPORT_MAX_DAYS', 366)
+        if (end_date - start_date).days + 1 > max_days:
+             return Response({"error": f"Date range cannot exceed {max_days} days."}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            # --- Fetch Data using Reporting Functions ---
-            total_visits = get_total_visits(start_date, end_date)
-            unique_ips = get_unique_visitors_by_ip(start_date, end_date)
-            unique_authenticated_users = get_unique_authenticated_users(start_date, end_date)
-            # Optional: get_unique_visitors_by_session(start_date, end_date)
-            estimated_unique_visitors = get_estimated_unique_visitors(start_date, end_date) # Use estimated for dashboard
-
-            visits_by_day_data = get_visits_by_day(start_date, end_date)
-            popular_pages_data = get_most_popular_pages(start_date, end_date, limit=10)
-
-            # --- Format Data for Response ---
-            # visits_by_day returns date objects, format them as strings (YYYY-MM-DD)
-            formatted_visits_by_day = [
-                {'day': entry['day'].strftime('%Y-%m-%d'), 'count': entry['count']}
-                for entry in visits_by_day_data
-            ]
-
-            # popular_pages is already formatted as list of dicts, no change needed
-
-            # --- Construct Response Data ---
-            data = {
-                "total_visits": total_visits,
-                "unique_ips": unique_ips, # May not be useful for dashboard, keep for admin?
-                "unique_authenticated_users": unique_authenticated_users, # Might be useful
-                "estimated_unique_visitors": estimated_unique_visitors, # Good for overall dashboard metric
-
-                "visits_by_day": formatted_visits_by_day,
-                "popular_pages": popular_pages_data,
-
-                "date_range": {
-                    "start_date": start_date.strftime('%Y-%m-%d') if start_date else None,
-                    "end_date": end_date.strftime('%Y-%m-%d') if end_date else None,
-                }
-            }
 
-            return Response(data, status=status.HTTP_200_OK)
+        # Unique counts are HyperLogLog estimates by default, ?exact=true runs the exact DISTINCT counts
+        exact_param = request.query_params.get('exact', '')
+        exact = exact_param.lower() in ['true', '1', 'yes']
+
+        # --- Serve from the report cache when possible ---
+        # Keyed by the normalized range, so every dashboard poll for the same window shares one entry.
+        # Closed ranges are kept for a day, ranges including today only for a minute (see report_cache.py).
+        cache_key = report_cache_key('overview', start_date, end_date, exact=exact)
+        cached = get_cached_report(cache_key)
+
+        try:
+            if cached is None:
+                cached = cache_report(cache_key, self.build_report(start_date, end_date, exact), end_date)
+
+            # Answer conditional requests (If-None-Match / If-Modified-Since) with a bodyless 304
+            response = get_conditional_response(request, etag=cached['etag'], last_modified=cached['last_modified'])
+            if response is None:
+                response = Response(cached['data'], status=status.HTTP_200_OK)
+            response['ETag'] = cached['etag']
+            response['Last-Modified'] = http_date(cached['last_modified'])
+            # Admin-only data: browsers may keep it but must revalidate before reuse
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
 
         except Exception as e:
             # Log the error and return a generic server error
@@ -129,4 +156,30 @@ class ReportOverviewAPIView(APIView):
             return Response({"error": "An internal error occurred while generating the report."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 # You can add more API views here if you want separate endpoints for different reports
-# e.g., A view for /api/tracking/popular-pages/ that supports different limits or filtering.
\ No newline at end of file
+# e.g., A view for /api/tracking/popular-pages/ that supports different limits or filtering.
+
+
+class VisitListAPIView(ListAPIView):
+    """
+    API endpoint listing raw visits, newest first. Admin only.
+    Supports optional 'start_date' / 'end_date' (YYYY-MM-DD, UTC days) and 'path' (exact) filters.
+    The table grows by every request, so use ?pagination=cursor (or ?count=none) to page through it:
+    deep pages then cost the same as the first one (see core/pagination.py).
+    """
+    permission_classes = [IsAdminUser]
+    serializer_class = VisitSerializer
+    # Keyset order for ?pagination=cursor, served by the timestamp-led indexes on Visit
+    cursor_ordering = ('-timestamp', '-id')
+
+    def get_queryset(self):
+        start_date, end_date = parse_date_params(self.request)
+        queryset = Visit.objects.order_by('-timestamp', '-id')
+        if start_date:
+            queryset = queryset.filter(timestamp__gte=day_bounds(start_date)[0])
+        if end_date:
+            queryset = queryset.filter(timestamp__lt=day_bounds(end_date)[1])
+        path = self.request.query_params.get('path')
+        if path:
+            queryset = queryset.filter(path=path)
+        return queryset
+